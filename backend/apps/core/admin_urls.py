@@ -1,7 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from . import admin_views
 
+if settings.ASYNC_VIEWS:
+    from .async_views import dashboard_overview
+else:
+    dashboard_overview = admin_views.dashboard_overview
+
 urlpatterns = [
     path('dashboard/', admin_views.admin_dashboard, name='admin-dashboard'),
     path('dashboard/stats/', admin_views.dashboard_stats, name='admin-dashboard-stats'),
+    path('dashboard/overview/', dashboard_overview, name='admin-dashboard-overview'),
+    path('analytics/timeseries/', admin_views.analytics_timeseries, name='admin-analytics-timeseries'),
 ]
@@ -0,0 +1,137 @@
+"""
+Helpers for async views.
+
+The async views (see ASYNC_VIEWS in settings) are plain Django views that
+serve the same JSON as their DRF counterparts; DRF has no async views. The
+helpers here supply the parts of APIView they need: a DRF Request for query
+parameters and authentication, permission checks, DRF's error responses
+and its JSON rendering.
+
+The async ORM runs every query of a request on that request's one sync
+thread, so queries awaited together still run one after another.
+in_own_connection() runs a blocking function on a worker thread with its
+own database connection, which is what lets independent queries overlap.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.http import Http404, HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from .profiling import ProfiledJSONRenderer
+
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def render_json(data, status=200):
+    """``data`` rendered as a DRF Response would be"""
+    return HttpResponse(ProfiledJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def async_api_view(sync_view):
+    """
+    Decorator for the async twin of the DRF view ``sync_view``. The async
+    view answers GET and HEAD: it gets a DRF Request, and API errors become
+    DRF's error responses. Other methods go to ``sync_view``.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+            api_request = Request(
+                request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+            )
+            try:
+                return await view(api_request, *args, **kwargs)
+            except (exceptions.APIException, Http404) as exc:
+                return error_response(api_request, exc)
+
+        # As with APIView, SessionAuthentication enforces CSRF itself
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def error_response(request, exc):
+    """DRF's response for ``exc``"""
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        # As APIView.handle_exception: 401 only with a WWW-Authenticate challenge
+        header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+        if header:
+            exc.auth_header = header
+        else:
+            exc.status_code = 403
+    response = exception_handler(exc, {'request': request})
+    rendered = render_json(response.data, response.status_code)
+    for name, value in response.headers.items():
+        if name.lower() != 'content-type':
+            rendered[name] = value
+    return rendered
+
+
+async def check_permissions(request, permission_classes):
+    """Authenticate ``request`` and apply ``permission_classes`` as APIView does"""
+    await sync_to_async(_check_permissions)(request, permission_classes)
+
+
+def _check_permissions(request, permission_classes):
+    for permission in (permission_class() for permission_class in permission_classes):
+        if not permission.has_permission(request, None):
+            if request.authenticators and not request.successful_authenticator:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+
+def _api_view(view_class, request, kwargs):
+    return view_class(request=request, args=(), kwargs=kwargs, format_kwarg=None, headers={})
+
+
+def _filtered_queryset(view):
+    # As APIView.initial() and GenericAPIView; filters may validate against the database
+    _check_permissions(view.request, view.permission_classes)
+    return view.filter_queryset(view.get_queryset())
+
+
+async def list_response(view_class, request, **kwargs):
+    """
+    The response of ``view_class``'s list action, fetched with the async
+    ORM: the same filters, pagination and serializer
+    """
+    view = _api_view(view_class, request, kwargs)
+    queryset = await sync_to_async(_filtered_queryset)(view)
+    page = await view.paginator.apaginate_queryset(queryset, request, view)
+    return render_json(view.paginator.get_paginated_data(view.get_serializer(page, many=True).data))
+
+
+async def retrieve_response(view_class, request, **kwargs):
+    """The response of ``view_class``'s retrieve action, fetched with the async ORM"""
+    view = _api_view(view_class, request, kwargs)
+    queryset = await sync_to_async(_filtered_queryset)(view)
+    lookup = kwargs[view.lookup_url_kwarg or view.lookup_field]
+    try:
+        instance = await queryset.aget(**{view.lookup_field: lookup})
+    except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+        raise Http404
+    return render_json(view.get_serializer(instance).data)
+
+
+async def in_own_connection(func, *args):
+    """
+    Run blocking ``func(*args)`` on a worker thread with a database
+    connection of its own, closed afterwards
+    """
+    return await sync_to_async(_call_and_close, thread_sensitive=False)(func, *args)
+
+
+def _call_and_close(func, *args):
+    try:
+        return func(*args)
+    finally:
+        connections.close_all()
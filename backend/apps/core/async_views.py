@@ -0,0 +1,39 @@
+"""
+Async core views, served instead of the ones in views.py and admin_views.py
+with ASYNC_VIEWS (see apps.core.aio)
+"""
+from django.http import JsonResponse
+
+from apps.authentication.permissions import IsAdminUser
+from . import admin_views, health, views
+from .aio import async_api_view, check_permissions, in_own_connection, list_response, render_json
+from .dashboard import aget_overview
+
+
+async def liveness(request):
+    """
+    Liveness probe: answers as long as the event loop can serve requests.
+    Does no I/O.
+    """
+    return JsonResponse({'status': 'alive'})
+
+
+async def readiness(request):
+    """
+    Readiness probe: the latest background database, cache and disk checks
+    (see apps.core.health). 503 when any check fails.
+    """
+    # The first probe in a process waits for the initial checks
+    result = await in_own_connection(health.monitor.get)
+    return JsonResponse(result, status=200 if result['ready'] else 503)
+
+
+@async_api_view(views.CategoryListCreateView.as_view())
+async def category_list(request):
+    return await list_response(views.CategoryListCreateView, request)
+
+
+@async_api_view(admin_views.dashboard_overview)
+async def dashboard_overview(request):
+    await check_permissions(request, [IsAdminUser])
+    return render_json(await aget_overview())
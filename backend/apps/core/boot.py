@@ -0,0 +1,154 @@
+"""
+Container boot.
+
+boot() brings the database up to date for the code being started, in the
+process that calls it:
+- it applies pending migrations
+- it creates the admin user
+- it loads the sample catalogue (BOOT_SAMPLE_DATA)
+
+start.sh runs it on every start, as ``manage.py boot``, which also
+writes the OpenAPI schema file when the image was built without it
+(build_schema_if_missing). When it finishes it
+stores a fingerprint of the migration files on disk and of the sample data
+in BootRecord. While the fingerprint matches, a boot is one query.
+
+Otherwise it takes an exclusive lock on BOOT_LOCK_FILE before doing
+anything, so that replicas starting together do not race. The replicas
+that waited read the fingerprint again and find nothing left to do.
+"""
+import fcntl
+import hashlib
+import os
+import pkgutil
+import tempfile
+import time
+from contextlib import contextmanager
+from importlib import import_module
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.loader import MigrationLoader
+
+from .management.commands import load_sample_data
+from .models import BootRecord
+
+
+ADMIN_USERNAME = 'admin'
+ADMIN_EMAIL = 'admin@ipswichretail.com'
+ADMIN_PASSWORD = 'admin123'
+
+
+def migration_names():
+    """Every migration on disk, as app_label.name, without importing any"""
+    names = []
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            module = import_module(module_name)
+        except ImportError:
+            continue
+        names.extend(
+            f'{app_config.label}.{name}'
+            for _, name, is_package in pkgutil.iter_modules(getattr(module, '__path__', []))
+            if not is_package and name[0] not in '_~'
+        )
+    return sorted(names)
+
+
+def fingerprint(sample_data):
+    """Changes whenever a boot would have something to do"""
+    digest = hashlib.sha256()
+    digest.update('\n'.join(migration_names()).encode())
+    digest.update(f'\n{ADMIN_USERNAME}\n'.encode())
+    if sample_data:
+        digest.update(Path(load_sample_data.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def stored_fingerprint():
+    try:
+        return BootRecord.objects.filter(pk=1).values_list('fingerprint', flat=True).first()
+    except DatabaseError:
+        # No table yet: the database has never been migrated
+        return None
+
+
+def lock_path():
+    if settings.BOOT_LOCK_FILE:
+        return settings.BOOT_LOCK_FILE
+    if connection.vendor == 'sqlite' and not connection.is_in_memory_db():
+        return f"{connection.settings_dict['NAME']}.boot-lock"
+    return os.path.join(tempfile.gettempdir(), 'ipswich-retail-boot-lock')
+
+
+@contextmanager
+def boot_lock():
+    with open(lock_path(), 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def migrate(stdout, verbosity):
+    executor = MigrationExecutor(connection)
+    # migrate also refreshes content types and permissions, even when there
+    # is nothing to apply
+    if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+        call_command('migrate', interactive=False, verbosity=verbosity, stdout=stdout)
+
+
+def create_admin(stdout, verbosity):
+    if not User.objects.filter(username=ADMIN_USERNAME).exists():
+        User.objects.create_superuser(ADMIN_USERNAME, ADMIN_EMAIL, ADMIN_PASSWORD)
+
+
+def load_samples(stdout, verbosity):
+    call_command('load_sample_data', verbosity=verbosity, stdout=stdout)
+
+
+def build_schema_if_missing(stdout=None, verbosity=1):
+    """
+    Write OPENAPI_SCHEMA_FILE unless it exists or the schema is served live;
+    returns whether it was written
+    """
+    if settings.OPENAPI_SCHEMA_LIVE or Path(settings.OPENAPI_SCHEMA_FILE).exists():
+        return False
+    call_command('build_schema', verbosity=verbosity, stdout=stdout)
+    return True
+
+
+def boot(sample_data=None, force=False, stdout=None, verbosity=1):
+    """
+    Bring the database up to date; returns the seconds each step took, or
+    None if the fingerprint matched and there was nothing to do
+    """
+    if sample_data is None:
+        sample_data = settings.BOOT_SAMPLE_DATA
+    expected = fingerprint(sample_data)
+    if not force and stored_fingerprint() == expected:
+        return None
+
+    steps = [('migrate', migrate), ('admin', create_admin)]
+    if sample_data:
+        steps.append(('sample_data', load_samples))
+    with boot_lock():
+        # Another replica may have finished the boot while this one waited
+        if not force and stored_fingerprint() == expected:
+            return None
+        timings = {}
+        for name, step in steps:
+            start = time.perf_counter()
+            step(stdout, verbosity)
+            timings[name] = time.perf_counter() - start
+        BootRecord.objects.update_or_create(pk=1, defaults={'fingerprint': expected})
+    return timings
@@ -0,0 +1,116 @@
+"""
+Cache helpers.
+
+get_or_refresh() caches a computed value and makes sure that only one
+caller at a time recomputes it, across every worker sharing the cache.
+While one caller refreshes an expired value the others keep serving the
+previous one, and on a cold cache they wait for the first caller instead
+of all running the same queries at once.
+
+aget_or_refresh() is the same for async views, with async cache calls and
+an async ``compute``.
+
+Lookups are counted per key prefix (the part before the first ':') in the
+ipswich_cache_lookups metric.
+"""
+import asyncio
+import time
+
+from django.core.cache import caches
+
+from .metrics import CACHE_LOOKUPS
+from .profiling import profiled_cache
+
+
+def store_fresh(key, value, ttl, stale_ttl=60, alias='default'):
+    """Store ``value`` as the fresh result for ``key``, e.g. from a background job"""
+    profiled_cache(caches[alias]).set(key, {'value': value, 'fresh_until': time.time() + ttl}, ttl + stale_ttl)
+
+
+async def astore_fresh(key, value, ttl, stale_ttl=60, alias='default'):
+    await profiled_cache(caches[alias]).aset(key, {'value': value, 'fresh_until': time.time() + ttl}, ttl + stale_ttl)
+
+
+def expire(key, stale_ttl=60, alias='default'):
+    """
+    Mark the value for ``key`` as expired. The next get_or_refresh() call
+    recomputes it while others keep serving the old value for up to
+    ``stale_ttl`` seconds.
+    """
+    store = profiled_cache(caches[alias])
+    entry = store.get(key)
+    if entry is not None and entry['fresh_until'] > 0:
+        store.set(key, {**entry, 'fresh_until': 0}, stale_ttl)
+
+
+def get_or_refresh(key, compute, ttl, stale_ttl=60, lock_timeout=30, wait_timeout=5, alias='default'):
+    """
+    Return the cached value for ``key``, calling ``compute()`` when it is
+    older than ``ttl`` seconds.
+
+    An expired value is still served for up to ``stale_ttl`` seconds while
+    another caller refreshes it.
+    """
+    store = profiled_cache(caches[alias])
+    prefix = key.split(':', 1)[0]
+    entry = store.get(key)
+    if entry is not None and entry['fresh_until'] > time.time():
+        CACHE_LOOKUPS.labels(prefix, 'hit').inc()
+        return entry['value']
+    CACHE_LOOKUPS.labels(prefix, 'miss' if entry is None else 'stale').inc()
+
+    lock_key = f'{key}:refresh'
+    if store.add(lock_key, True, lock_timeout):
+        try:
+            value = compute()
+            store_fresh(key, value, ttl, stale_ttl, alias)
+            return value
+        finally:
+            store.delete(lock_key)
+
+    if entry is not None:
+        return entry['value']
+
+    deadline = time.monotonic() + wait_timeout
+    delay = 0.01
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+        entry = store.get(key)
+        if entry is not None:
+            return entry['value']
+    # The refreshing caller is stuck; answer without waiting any longer
+    return compute()
+
+
+async def aget_or_refresh(key, compute, ttl, stale_ttl=60, lock_timeout=30, wait_timeout=5, alias='default'):
+    """get_or_refresh() for async code: ``compute`` is an async callable"""
+    store = profiled_cache(caches[alias])
+    prefix = key.split(':', 1)[0]
+    entry = await store.aget(key)
+    if entry is not None and entry['fresh_until'] > time.time():
+        CACHE_LOOKUPS.labels(prefix, 'hit').inc()
+        return entry['value']
+    CACHE_LOOKUPS.labels(prefix, 'miss' if entry is None else 'stale').inc()
+
+    lock_key = f'{key}:refresh'
+    if await store.aadd(lock_key, True, lock_timeout):
+        try:
+            value = await compute()
+            await astore_fresh(key, value, ttl, stale_ttl, alias)
+            return value
+        finally:
+            await store.adelete(lock_key)
+
+    if entry is not None:
+        return entry['value']
+
+    deadline = time.monotonic() + wait_timeout
+    delay = 0.01
+    while time.monotonic() < deadline:
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.25)
+        entry = await store.aget(key)
+        if entry is not None:
+            return entry['value']
+    return await compute()
@@ -0,0 +1,54 @@
+"""
+Admin dashboard overview.
+
+Everything the dashboard's landing page shows, in one response, from three
+independent aggregations: order figures from the daily sales rollup
+(apps.orders.stats, cached), customer counts (apps.customers.metrics) and
+catalogue counts. get_overview() runs them one after another;
+aget_overview() runs them at the same time, each on its own database
+connection.
+"""
+import asyncio
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from apps.customers.metrics import get_customer_stats
+from apps.orders.stats import aget_dashboard_stats, get_dashboard_stats
+from apps.products.models import Product
+from .aio import in_own_connection
+
+
+def get_catalogue_counts():
+    """Product counts, in one query"""
+    counts = Product.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        featured=Count('id', filter=Q(is_active=True, is_featured=True)),
+        low_stock=Count(
+            'id', filter=Q(is_active=True, stock_count__lte=getattr(settings, 'LOW_STOCK_THRESHOLD', 5))
+        ),
+    )
+    return {
+        'totalProducts': counts['total'],
+        'activeProducts': counts['active'],
+        'featuredProducts': counts['featured'],
+        'lowStockProducts': counts['low_stock'],
+    }
+
+
+def get_overview():
+    return {
+        'orders': get_dashboard_stats(),
+        'customers': get_customer_stats(),
+        'catalogue': get_catalogue_counts(),
+    }
+
+
+async def aget_overview():
+    orders, customers, catalogue = await asyncio.gather(
+        aget_dashboard_stats(),
+        in_own_connection(get_customer_stats),
+        in_own_connection(get_catalogue_counts),
+    )
+    return {'orders': orders, 'customers': customers, 'catalogue': catalogue}
@@ -0,0 +1,139 @@
+"""
+Readiness checks.
+
+Probes must be cheap: orchestrators poll every few seconds per instance.
+The database, cache and disk checks therefore run in a background thread
+every HEALTH_CHECK_INTERVAL seconds and the readiness endpoint only reads
+the latest result, so probe traffic adds no database load however often
+it arrives. Each process starts its own thread on the first probe.
+
+If the thread stops refreshing, results older than three intervals count
+as not ready. With HEALTH_CHECK_BACKGROUND = False (tests, one-off
+commands) the checks run on the probe path instead, still at most once
+per interval.
+"""
+import logging
+import shutil
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def check_database():
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    latency_ms = (time.perf_counter() - start) * 1000
+    return latency_ms <= _setting('HEALTH_DB_MAX_LATENCY_MS', 500), {'latencyMs': round(latency_ms, 1)}
+
+
+def check_cache():
+    key = f'health:{uuid.uuid4().hex}'
+    start = time.perf_counter()
+    cache.set(key, 1, 10)
+    found = cache.get(key) == 1
+    cache.delete(key)
+    latency_ms = (time.perf_counter() - start) * 1000
+    ok = found and latency_ms <= _setting('HEALTH_CACHE_MAX_LATENCY_MS', 200)
+    return ok, {'latencyMs': round(latency_ms, 1)}
+
+
+def check_disk():
+    usage = shutil.disk_usage(_setting('HEALTH_DISK_PATH', settings.BASE_DIR))
+    free_percent = usage.free / usage.total * 100
+    return free_percent >= _setting('HEALTH_DISK_MIN_FREE_PERCENT', 5), {'freePercent': round(free_percent, 1)}
+
+
+CHECKS = {
+    'database': check_database,
+    'cache': check_cache,
+    'disk': check_disk,
+}
+
+
+def run_checks():
+    checks = {}
+    for name, check in CHECKS.items():
+        try:
+            ok, detail = check()
+        except Exception as exc:
+            logger.warning('Readiness check %s failed: %s', name, exc)
+            ok, detail = False, {'error': exc.__class__.__name__}
+        checks[name] = {'ok': ok, **detail}
+    return {
+        'ready': all(check['ok'] for check in checks.values()),
+        'checkedAt': time.time(),
+        'checks': checks,
+    }
+
+
+class ReadinessMonitor:
+    """Holds the latest readiness result for this process"""
+
+    def __init__(self):
+        self._result = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        return _setting('HEALTH_CHECK_INTERVAL', 10)
+
+    def refresh(self):
+        self._result = run_checks()
+        return self._result
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            finally:
+                # The thread keeps no connection open between rounds
+                connections.close_all()
+            time.sleep(self.interval)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='readiness-checks', daemon=True)
+                self._thread.start()
+
+    def get(self):
+        result = self._result
+        age = time.time() - result['checkedAt'] if result else None
+
+        if not _setting('HEALTH_CHECK_BACKGROUND', True):
+            if result is None or age >= self.interval:
+                with self._lock:
+                    result = self.refresh()
+            return result
+
+        self._ensure_thread()
+        if result is None:
+            # First probe in this process: wait for the initial round
+            deadline = time.monotonic() + 5
+            while self._result is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            result = self._result
+        if result is None:
+            return {'ready': False, 'checkedAt': None, 'checks': {}, 'reason': 'starting'}
+        if time.time() - result['checkedAt'] > self.interval * 3:
+            return {**result, 'ready': False, 'reason': 'stale'}
+        return result
+
+
+monitor = ReadinessMonitor()
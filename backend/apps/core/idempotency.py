@@ -0,0 +1,143 @@
+"""
+Idempotency-Key support for unsafe API requests.
+
+The first request carrying an ``Idempotency-Key`` header runs the view and
+its response is kept in the cache for IDEMPOTENCY_KEY_TTL seconds. A retry
+with the same key and payload gets the stored response back without running
+the view again. A retry that arrives while the first request is still
+running waits for its result. Reusing a key with a different payload is
+rejected.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from .profiling import profiled_cache
+
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _store():
+    return profiled_cache(caches[_setting('IDEMPOTENCY_CACHE_ALIAS', 'default')])
+
+
+def cache_key_for(user_id, path, key):
+    """Cache key for an Idempotency-Key; keys are scoped to the user and endpoint"""
+    digest = hashlib.sha256(f'{user_id or "anon"}:{path}:{key}'.encode()).hexdigest()
+    return f'idempotency:{digest}'
+
+
+def _cache_key(request, key):
+    user_id = request.user.pk if request.user and request.user.is_authenticated else None
+    return cache_key_for(user_id, request.path, key)
+
+
+def _fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method}:{request.path}:{payload}'.encode()).hexdigest()
+
+
+def _replay(entry):
+    response = Response(entry['data'], status=entry['status'], headers=entry['headers'])
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def wait_for_result(cache_key, timeout):
+    """Poll until the in-flight request for ``cache_key`` finishes; returns its entry or None"""
+    store = _store()
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while time.monotonic() < deadline:
+        entry = store.get(cache_key)
+        if entry is None or entry['state'] == DONE:
+            return entry
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+    return store.get(cache_key)
+
+
+def idempotent(handler):
+    """
+    Decorator for APIView handler methods such as ``create``.
+
+    Requests without the header are passed straight through.
+    """
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        store = _store()
+        cache_key = _cache_key(request, key)
+        fingerprint = _fingerprint(request)
+
+        while not store.add(
+            cache_key,
+            {'state': IN_FLIGHT, 'fingerprint': fingerprint},
+            _setting('IDEMPOTENCY_LOCK_TIMEOUT', 60),
+        ):
+            entry = store.get(cache_key)
+            if entry is None:
+                # Expired between add() and get(); try to claim it again
+                continue
+            if entry['fingerprint'] != fingerprint:
+                return Response(
+                    {'error': 'Idempotency-Key has already been used with a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if entry['state'] == IN_FLIGHT:
+                entry = wait_for_result(cache_key, _setting('IDEMPOTENCY_WAIT_TIMEOUT', 10))
+            if entry is None:
+                continue
+            if entry['state'] == DONE:
+                return _replay(entry)
+            return Response(
+                {'error': 'A request with this Idempotency-Key is still being processed'},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Retry-After': '1'}
+            )
+
+        try:
+            response = handler(view, request, *args, **kwargs)
+        except Exception:
+            # Let the client retry once the error has been dealt with
+            store.delete(cache_key)
+            raise
+
+        if response.status_code >= 500:
+            store.delete(cache_key)
+            return response
+
+        store.set(cache_key, {
+            'state': DONE,
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'data': response.data,
+            'headers': {name: value for name, value in response.items() if name == 'Location'},
+        }, _setting('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+        return response
+
+    return wrapper
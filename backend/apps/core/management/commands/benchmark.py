@@ -0,0 +1,411 @@
+"""
+Management command to load-test the API in-process.
+
+Seeds the database up to --scale products, customers and orders, then
+replays a weighted mix of storefront and admin requests through Django's
+WSGI test client from several threads (and optionally several processes).
+Reports throughput, p50/p95/p99 latency and queries per request for each
+endpoint, and can write the results as JSON and compare them with a
+previous run:
+
+    python manage.py benchmark --scale 5000 --output before.json
+    python manage.py benchmark --scale 5000 --compare before.json
+
+With --url the same mix is sent over HTTP to a running server that uses
+the same database, e.g. to compare the WSGI and ASGI deployments at high
+concurrency. Queries per request then come from the Server-Timing header,
+which the server sends to the benchmark's staff user, or to everyone with
+PROFILING_SERVER_TIMING; other requests count as 0.
+
+A comparison fails the command when an endpoint's p95 latency or
+throughput is more than --threshold percent worse, or when it runs more
+queries per request than before.
+"""
+import http.client
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from functools import partial
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from apps.core.models import Category
+from apps.core.testing import seed_dataset
+from apps.customers.models import Customer
+from apps.orders.models import Order
+from apps.products.models import Product
+
+
+BENCHMARK_USER = 'benchmark-admin'
+
+DEFAULT_MIX = {
+    'product_list': 25,
+    'product_detail': 20,
+    'product_search': 10,
+    'category_list': 10,
+    'order_create': 10,
+    'admin_dashboard': 10,
+    'customer_list': 15,
+    'product_batch': 0,
+}
+
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def parse_mix(value):
+    mix = dict(DEFAULT_MIX)
+    for part in filter(None, (value or '').split(',')):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise CommandError(f"Unknown endpoint '{name}'; choose from {', '.join(DEFAULT_MIX)}")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise CommandError(f"Weight for '{name}' must be an integer")
+    if not any(mix.values()):
+        raise CommandError('The mix must give at least one endpoint a weight')
+    return mix
+
+
+class RequestPlanner:
+    """Builds concrete requests for each endpoint from a sample of the data"""
+
+    def __init__(self, rng, sample=500):
+        self.rng = rng
+        self.slugs = list(Product.objects.filter(is_active=True).values_list('slug', flat=True)[:sample])
+        self.categories = list(Category.objects.filter(is_active=True).values_list('pk', flat=True))
+        self.in_stock = list(Product.objects.filter(is_active=True, stock_count__gte=10).values_list('pk', flat=True)[:sample])
+        self.emails = list(Customer.objects.values_list('email', flat=True)[:sample])
+        words = {word for name in Product.objects.values_list('name', flat=True)[:sample] for word in name.split()}
+        self.search_terms = sorted(words) or ['product']
+        if not self.slugs or not self.in_stock or not self.emails:
+            raise CommandError('Not enough data to benchmark; increase --scale')
+
+    def build(self, name):
+        """(method, path, params or body, needs the admin user)"""
+        choice = self.rng.choice
+        if name == 'product_list':
+            params = {'page_size': choice([12, 24, 48])}
+            if self.rng.random() < 0.5 and self.categories:
+                params['category'] = choice(self.categories)
+            if self.rng.random() < 0.3:
+                params['min_price'] = choice([10, 25, 50])
+            if self.rng.random() < 0.3:
+                params['ordering'] = choice(['price', '-price', '-rating', 'name'])
+            return 'get', '/api/products/', params, False
+        if name == 'product_detail':
+            return 'get', f'/api/products/{choice(self.slugs)}/', {}, False
+        if name == 'product_search':
+            return 'get', '/api/products/', {'search': choice(self.search_terms)}, False
+        if name == 'category_list':
+            return 'get', '/api/categories/', {}, False
+        if name == 'product_batch':
+            ids = self.rng.sample(self.in_stock, k=min(len(self.in_stock), self.rng.randint(2, 10)))
+            return 'get', '/api/products/batch/', {'ids': ','.join(map(str, ids))}, False
+        if name == 'order_create':
+            lines = self.rng.sample(self.in_stock, k=min(len(self.in_stock), self.rng.randint(1, 3)))
+            body = {
+                'customer_email': choice(self.emails),
+                'customer_first_name': 'Bench',
+                'customer_last_name': 'Mark',
+                'shipping_address_line1': '1 Benchmark Street',
+                'shipping_city': 'Ipswich',
+                'shipping_state': 'Suffolk',
+                'shipping_zip_code': 'IP1 1AA',
+                'order_items': [{'product_id': pk, 'quantity': 1} for pk in lines],
+            }
+            return 'post', '/api/orders/', body, True
+        if name == 'admin_dashboard':
+            return 'get', '/api/admin/dashboard/', {}, True
+        if name == 'customer_list':
+            return 'get', '/api/admin/customers/', {'page': self.rng.randint(1, 5)}, True
+        raise ValueError(name)
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*' and '*' not in host:
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def run_requests(plan, threads):
+    """Replay ``plan`` from ``threads`` threads; returns (endpoint, seconds, status, queries, order number)"""
+    admin = User.objects.get(username=BENCHMARK_USER)
+    results = []
+    lock = threading.Lock()
+    slices = [plan[i::threads] for i in range(threads)]
+
+    def worker(requests):
+        host = _host()
+        public = Client(HTTP_HOST=host, raise_request_exception=False)
+        staff = Client(HTTP_HOST=host, raise_request_exception=False)
+        staff.force_login(admin)
+        samples = []
+        counter = {'n': 0}
+
+        def count(execute, sql, params, many, context):
+            counter['n'] += 1
+            return execute(sql, params, many, context)
+
+        try:
+            for name, method, path, data, needs_admin in requests:
+                client = staff if needs_admin else public
+                counter['n'] = 0
+                started = time.perf_counter()
+                with connection.execute_wrapper(count):
+                    if method == 'post':
+                        response = client.post(path, json.dumps(data), content_type='application/json')
+                    else:
+                        response = client.get(path, data)
+                elapsed = time.perf_counter() - started
+                order_number = None
+                if method == 'post' and response.status_code == 201:
+                    order_number = response.json().get('order_number')
+                samples.append((name, elapsed, response.status_code, counter['n'], order_number))
+        finally:
+            connection.close()
+        with lock:
+            results.extend(samples)
+
+    workers = [threading.Thread(target=worker, args=(requests,)) for requests in slices if requests]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results
+
+
+def staff_session():
+    """A database session key logged in as the benchmark user, for HTTP runs"""
+    admin = User.objects.get(username=BENCHMARK_USER)
+    session = SessionStore()
+    session[SESSION_KEY] = str(admin.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = admin.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+def run_http_requests(plan, threads, url, session_key):
+    """run_requests() against the server at ``url``, one keep-alive connection per thread"""
+    target = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if target.scheme == 'https' else http.client.HTTPConnection
+    csrf_token = get_random_string(32)
+    staff_headers = {
+        'Cookie': f'{settings.SESSION_COOKIE_NAME}={session_key}; {settings.CSRF_COOKIE_NAME}={csrf_token}',
+        'X-CSRFToken': csrf_token,
+    }
+    results = []
+    lock = threading.Lock()
+    slices = [plan[i::threads] for i in range(threads)]
+
+    def worker(requests):
+        conn = connection_class(target.hostname, target.port, timeout=60)
+        samples = []
+        for name, method, path, data, needs_admin in requests:
+            headers = dict(staff_headers) if needs_admin else {}
+            body = None
+            if method == 'post':
+                body = json.dumps(data)
+                headers['Content-Type'] = 'application/json'
+            elif data:
+                path = f'{path}?{urlencode(data)}'
+            started = time.perf_counter()
+            try:
+                conn.request(method.upper(), target.path.rstrip('/') + path, body, headers)
+                response = conn.getresponse()
+                content = response.read()
+                status, server_timing = response.status, response.getheader('Server-Timing', '')
+            except (OSError, http.client.HTTPException):
+                # Reconnects on the next request
+                conn.close()
+                content, status, server_timing = b'', 599, ''
+            elapsed = time.perf_counter() - started
+            timing = SERVER_TIMING_QUERIES.search(server_timing)
+            order_number = None
+            if method == 'post' and status == 201:
+                order_number = json.loads(content).get('order_number')
+            samples.append((name, elapsed, status, int(timing.group(1)) if timing else 0, order_number))
+        conn.close()
+        with lock:
+            results.extend(samples)
+
+    workers = [threading.Thread(target=worker, args=(requests,)) for requests in slices if requests]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results
+
+
+def summarise(samples, elapsed):
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample[0]].append(sample)
+
+    endpoints = {}
+    for name, rows in sorted(by_endpoint.items()):
+        latencies = np.array([row[1] for row in rows]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        endpoints[name] = {
+            'requests': len(rows),
+            'errors': sum(1 for row in rows if row[2] >= 500),
+            'rejected': sum(1 for row in rows if 400 <= row[2] < 500),
+            'throughput': round(len(rows) / elapsed, 1),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'mean_ms': round(float(latencies.mean()), 2),
+            'queries_per_request': round(sum(row[3] for row in rows) / len(rows), 2),
+        }
+    return endpoints
+
+
+def compare(current, baseline, threshold):
+    """Regression messages for endpoints that got slower or chattier than ``baseline``"""
+    regressions = []
+    limit = 1 + threshold / 100
+    for name, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        if now['p95_ms'] > before['p95_ms'] * limit:
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+        if now['throughput'] * limit < before['throughput']:
+            regressions.append(f"{name}: throughput {before['throughput']} -> {now['throughput']} req/s")
+        if now['queries_per_request'] > before['queries_per_request'] + 0.5:
+            regressions.append(
+                f"{name}: queries per request {before['queries_per_request']} -> {now['queries_per_request']}"
+            )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = 'Replay a weighted request mix in-process and report throughput, latency and queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1000, help='Products, customers and orders to seed up to')
+        parser.add_argument('--requests', type=int, default=2000, help='Measured requests in total')
+        parser.add_argument('--warmup', type=int, default=100, help='Unmeasured requests before the run')
+        parser.add_argument('--threads', type=int, default=8, help='Client threads per process')
+        parser.add_argument('--processes', type=int, default=1, help='Forked client processes')
+        parser.add_argument('--mix', help='Weights to override, e.g. order_create=0,product_detail=40')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the request plan')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--compare', help='Previous JSON results to compare against')
+        parser.add_argument('--threshold', type=float, default=20, help='Allowed slowdown in percent')
+        parser.add_argument('--keep-orders', action='store_true', help='Keep orders created by the run')
+        parser.add_argument('--url', help='Send the requests to the server at this URL instead of in-process')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['processes'] < 1:
+            raise CommandError('--threads and --processes must be at least 1')
+        mix = parse_mix(options['mix'])
+        baseline = self.load_baseline(options['compare'])
+
+        self.seed(options['scale'])
+        User.objects.get_or_create(username=BENCHMARK_USER, defaults={'is_staff': True})
+
+        runner = run_requests
+        if options['url']:
+            runner = partial(run_http_requests, url=options['url'], session_key=staff_session())
+
+        rng = random.Random(options['seed'])
+        planner = RequestPlanner(rng)
+        names, weights = zip(*((name, weight) for name, weight in mix.items() if weight > 0))
+
+        def make_plan(count):
+            return [(name, *planner.build(name)) for name in rng.choices(names, weights=weights, k=count)]
+
+        warmup = runner(make_plan(options['warmup']), options['threads']) if options['warmup'] else []
+        plan = make_plan(options['requests'])
+        started = time.perf_counter()
+        if options['processes'] == 1:
+            measured = runner(plan, options['threads'])
+        else:
+            measured = self.run_processes(runner, plan, options['processes'], options['threads'])
+        elapsed = time.perf_counter() - started
+
+        if not options['keep_orders']:
+            created = [sample[4] for sample in warmup + measured if sample[4]]
+            Order.objects.filter(order_number__in=created).delete()
+
+        results = {
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'scale': options['scale'],
+            'requests': len(measured),
+            'threads': options['threads'],
+            'processes': options['processes'],
+            'url': options['url'],
+            'mix': mix,
+            'elapsed_s': round(elapsed, 3),
+            'throughput': round(len(measured) / elapsed, 1),
+            'endpoints': summarise(measured, elapsed),
+        }
+        self.report(results)
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                for message in regressions:
+                    self.stdout.write(self.style.ERROR(f'Regression: {message}'))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
+            self.stdout.write(self.style.SUCCESS(f'No regressions against {options["compare"]}'))
+
+    def load_baseline(self, path):
+        if not path:
+            return None
+        try:
+            with open(path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+
+    def seed(self, scale):
+        missing = scale - Product.objects.count()
+        if missing > 0:
+            self.stdout.write(f'Seeding {missing} products, customers and orders...')
+            for start in range(0, missing, 1000):
+                seed_dataset(min(1000, missing - start))
+
+    def run_processes(self, runner, plan, processes, threads):
+        # Children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(processes) as pool:
+            parts = pool.starmap(runner, [(plan[i::processes], threads) for i in range(processes)])
+        return [sample for part in parts for sample in part]
+
+    def report(self, results):
+        self.stdout.write(
+            f"{results['url'] or 'in-process'}, {results['database']}, {results['processes']} process(es) x {results['threads']} threads, "
+            f"{results['requests']} requests in {results['elapsed_s']}s ({results['throughput']} req/s)"
+        )
+        header = f"{'endpoint':<16}{'reqs':>6}{'err':>5}{'4xx':>5}{'req/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'queries':>9}"
+        self.stdout.write(header)
+        for name, row in results['endpoints'].items():
+            self.stdout.write(
+                f"{name:<16}{row['requests']:>6}{row['errors']:>5}{row['rejected']:>5}{row['throughput']:>8}"
+                f"{row['p50_ms']:>8}{row['p95_ms']:>8}{row['p99_ms']:>8}{row['queries_per_request']:>9}"
+            )
@@ -0,0 +1,43 @@
+"""
+Management command run by start.sh before the server starts.
+
+    python manage.py boot [--no-sample-data] [--force]
+
+Applies migrations, creates the admin user and loads the sample data in
+one process, and skips all of it while the fingerprint recorded by the
+last boot still matches (see apps.core.boot). Then writes the OpenAPI
+schema file if the image was built without one.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.boot import boot, build_schema_if_missing
+
+
+class Command(BaseCommand):
+    help = 'Prepare the database for serving, skipping the work a previous boot already did'
+    # Checks run with migrate, only when there is something to migrate
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-sample-data', dest='sample_data', action='store_false', default=settings.BOOT_SAMPLE_DATA,
+            help='Do not load the sample catalogue (default: BOOT_SAMPLE_DATA)',
+        )
+        parser.add_argument('--force', action='store_true', help='Run every step even if the fingerprint matches')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        timings = boot(
+            sample_data=options['sample_data'], force=options['force'], stdout=self.stdout, verbosity=options['verbosity']
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+        if timings is None:
+            self.stdout.write(self.style.SUCCESS(f'Database up to date, nothing to do ({elapsed:.0f}ms)'))
+        else:
+            steps = ', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items())
+            self.stdout.write(self.style.SUCCESS(f'Booted in {elapsed:.0f}ms ({steps})'))
+        # Deployments built without the Dockerfile (Nixpacks) have no schema file
+        build_schema_if_missing(stdout=self.stdout, verbosity=options['verbosity'])
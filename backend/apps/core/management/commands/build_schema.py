@@ -0,0 +1,38 @@
+"""
+Management command to write the OpenAPI schema served by /api/schema/.
+
+    python manage.py build_schema [--output PATH] [--if-missing]
+
+Run when the image is built (see the Dockerfile). Writes the schema as JSON
+to OPENAPI_SCHEMA_FILE, where apps.core.schema reads it. ``manage.py boot``
+runs it when the file is missing, for deployments built without the
+Dockerfile.
+"""
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.schema import generate
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema once and write it where the schema view reads it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write (default: OPENAPI_SCHEMA_FILE)')
+        parser.add_argument('--if-missing', action='store_true', help='Do nothing if the file already exists')
+
+    def handle(self, *args, **options):
+        path = Path(options['output'] or settings.OPENAPI_SCHEMA_FILE)
+        if options['if_missing'] and path.exists():
+            self.stdout.write(f'{path} already exists')
+            return
+        started = time.perf_counter()
+        content = generate()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {path} ({len(content) / 1024:.0f} KiB) in {(time.perf_counter() - started) * 1000:.0f}ms'
+        ))
@@ -0,0 +1,167 @@
+"""
+Management command to report what a cold start spends importing.
+
+    python manage.py importtime
+    python manage.py importtime --budget 900 --repeat 5
+
+Starts a fresh interpreter under ``python -X importtime`` that loads what
+every web worker loads: the apps, the WSGI handler with its middleware
+and the URL configuration with every view. With --warm-up it also runs
+apps.core.warmup, as the preloading gunicorn master does.
+
+Each module's own import time is charged to the closest installed app in
+the chain of modules that imported it (the module itself included), so a
+library is charged to the app that pulled it in. The report also lists
+the most expensive packages with the module that imported each one.
+
+The fastest of --repeat runs is reported. With --budget the command fails
+when that run's start-up takes longer, which is how CI keeps start-up
+time from creeping up.
+"""
+import os
+import re
+import subprocess
+import sys
+from collections import Counter, namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Written to stderr where the measured start-up begins; the interpreter's
+# own imports before it are not counted
+MARKER = 'importtime: start'
+
+STARTUP = f'''
+import sys, time
+print({MARKER!r}, file=sys.stderr, flush=True)
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+'''
+
+WARM_UP = '''
+from apps.core.warmup import warm_up
+warm_up()
+'''
+
+REPORT = '''
+print(time.perf_counter() - started)
+'''
+
+PROJECT = 'project'
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+Import = namedtuple('Import', 'module own cumulative importer')
+
+
+def parse_importtime(output):
+    """
+    The imports in ``-X importtime`` output, each with its own and
+    cumulative time in microseconds and the module that imported it
+    """
+    lines = []
+    output = output.rpartition(MARKER)[2]
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            lines.append((module, int(own), int(cumulative), len(indent) // 2))
+    # Imports are reported after the imports they trigger, so walking back
+    # from the end meets every importer before the modules it imported
+    imports = []
+    stack = []
+    for module, own, cumulative, depth in reversed(lines):
+        del stack[depth:]
+        imports.append(Import(module, own, cumulative, tuple(stack)))
+        stack.append(module)
+    imports.reverse()
+    return imports
+
+
+def app_labels():
+    """Module prefixes of the installed apps and the project, longest first"""
+    prefixes = {app_config.name: app_config.label for app_config in apps.get_app_configs()}
+    prefixes[settings.ROOT_URLCONF.partition('.')[0]] = PROJECT
+    return sorted(prefixes.items(), key=lambda item: -len(item[0]))
+
+
+def owner(module, chain, labels):
+    """The app charged for ``module``: the closest one in its import chain"""
+    for name in (module, *reversed(chain)):
+        for prefix, label in labels:
+            if name == prefix or name.startswith(prefix + '.'):
+                return label
+    return module.partition('.')[0]
+
+
+def by_app(imports, labels):
+    """Microseconds of import time charged to each app"""
+    totals = Counter()
+    for record in imports:
+        totals[owner(record.module, record.importer, labels)] += record.own
+    return totals
+
+
+def packages(imports):
+    """
+    Every package imported from outside itself, with its cumulative time
+    and the module that imported it, slowest first
+    """
+    found = []
+    for record in imports:
+        top = record.module.partition('.')[0]
+        importer = record.importer[-1] if record.importer else None
+        if importer is None or importer.partition('.')[0] != top:
+            found.append((record.module, record.cumulative, importer))
+    return sorted(found, key=lambda item: -item[1])
+
+
+class Command(BaseCommand):
+    help = 'Report the import time of a cold start per app, optionally against a budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Start-ups to run; the fastest is reported')
+        parser.add_argument('--budget', type=float, help='Fail if start-up takes longer than this many milliseconds')
+        parser.add_argument('--top', type=int, default=15, help='Number of apps and packages to list')
+        parser.add_argument('--warm-up', action='store_true', help='Include apps.core.warmup, as a preloading server does')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        code = STARTUP + (WARM_UP if options['warm_up'] else '') + REPORT
+        runs = [self.start_up(code) for _ in range(options['repeat'])]
+        elapsed, imports = min(runs, key=lambda run: run[0])
+
+        labels = app_labels()
+        total = sum(record.own for record in imports)
+        self.stdout.write(
+            f'Start-up {elapsed * 1000:.0f}ms (fastest of {len(runs)}); '
+            f'{total / 1000:.0f}ms importing {len(imports)} modules'
+        )
+        self.stdout.write(f"\n{'App':<24}{'ms':>8}{'share':>8}")
+        for label, micros in by_app(imports, labels).most_common(options['top']):
+            self.stdout.write(f'{label:<24}{micros / 1000:>8.1f}{micros / total:>8.0%}')
+        self.stdout.write(f"\n{'Package':<40}{'ms':>8}  imported by")
+        for module, micros, importer in packages(imports)[:options['top']]:
+            self.stdout.write(f"{module:<40}{micros / 1000:>8.1f}  {importer or '-'}")
+
+        budget = options['budget']
+        if budget is not None:
+            if elapsed * 1000 > budget:
+                raise CommandError(f'Start-up took {elapsed * 1000:.0f}ms, over the {budget:.0f}ms budget')
+            self.stdout.write(self.style.SUCCESS(f'\nWithin the {budget:.0f}ms budget'))
+
+    def start_up(self, code):
+        """Seconds a fresh interpreter takes to run ``code``, and its imports"""
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Start-up failed:\n{result.stderr.strip()}')
+        return float(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
@@ -0,0 +1,106 @@
+"""
+Management command to fill the database with realistic benchmark data.
+
+    python manage.py seed_data --products 5000 --customers 100000 --orders 1000000 --seed 7
+
+The same --seed and --end-date always produce identical rows (see
+apps.core.seeding), so benchmark runs on different machines or branches
+start from the same data. --end-date defaults to today; pass it
+explicitly when results must be reproduced later.
+
+Orders are generated in partitions of 50,000. With --workers above 1 the
+partitions are spread over forked processes; SQLite allows one writer at
+a time, so it always uses a single process.
+"""
+import multiprocessing
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from apps.core import seeding
+from apps.core.models import Category
+from apps.customers.models import Customer
+from apps.orders.models import Order
+from apps.products.models import Product
+
+
+_worker_state = {}
+
+
+def _seed_partition(partition):
+    # Runs in a forked worker, which opens its own connection on first use
+    config, prices, batch_size = _worker_state['args']
+    return seeding.seed_order_partition(config, partition, prices, batch_size)
+
+
+class Command(BaseCommand):
+    help = 'Generate deterministic products, customers and orders for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000, help='Number of products')
+        parser.add_argument('--customers', type=int, default=10000, help='Number of customers')
+        parser.add_argument('--orders', type=int, default=100000, help='Number of orders')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--end-date', type=date.fromisoformat, help='Last order date (YYYY-MM-DD), default today')
+        parser.add_argument('--days', type=int, default=730, help='Days of order history before --end-date')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT')
+        parser.add_argument('--workers', type=int, default=1, help='Processes inserting order partitions')
+        parser.add_argument('--clear', action='store_true', help='Delete existing catalogue, customer and order data first')
+
+    def handle(self, *args, **options):
+        if options['products'] < 1 or options['customers'] < 1 or options['orders'] < 0:
+            raise CommandError('--products and --customers must be at least 1 and --orders at least 0')
+        if options['days'] < 1 or options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--days, --batch-size and --workers must be at least 1')
+
+        config = seeding.SeedConfig(
+            products=options['products'],
+            customers=options['customers'],
+            orders=options['orders'],
+            seed=options['seed'],
+            end_date=options['end_date'],
+            days=options['days'],
+        )
+        if config.start_date < date(2024, 1, 1):
+            raise CommandError('Order history cannot start before 2024-01-01 (the order number epoch)')
+
+        if options['clear']:
+            seeding.clear()
+        elif any(model.objects.exists() for model in (Category, Product, Customer, Order)):
+            raise CommandError('The database already has data; pass --clear to replace it')
+
+        started = time.perf_counter()
+        prices = seeding.seed_catalog(config, options['batch_size'])
+        seeding.seed_customers(config, options['batch_size'])
+        self.stdout.write(f'{config.products} products and {config.customers} customers in {time.perf_counter() - started:.1f}s')
+
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write('SQLite allows one writer at a time; using a single process')
+            workers = 1
+
+        partitions = list(config.partitions())
+        if workers == 1:
+            results = (seeding.seed_order_partition(config, p, prices, options['batch_size']) for p in partitions)
+            self.collect(results, config, started)
+        else:
+            _worker_state['args'] = (config, prices, options['batch_size'])
+            # Forked children must not share the parent's connection
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                self.collect(pool.imap_unordered(_seed_partition, partitions), config, started)
+
+        rebuild_started = time.perf_counter()
+        seeding.finish(config, options['batch_size'])
+        self.stdout.write(f'Rebuilt sales rollup and customer metrics in {time.perf_counter() - rebuild_started:.1f}s')
+        self.stdout.write(self.style.SUCCESS(f'Seeded with --seed {config.seed} in {time.perf_counter() - started:.1f}s'))
+
+    def collect(self, results, config, started):
+        orders = lines = 0
+        for partition_orders, partition_lines in results:
+            orders += partition_orders
+            lines += partition_lines
+            rate = orders / max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(f'{orders}/{config.orders} orders, {lines} lines ({rate:.0f} orders/s)')
@@ -0,0 +1,128 @@
+"""
+Prometheus metrics.
+
+Request metrics are recorded by MetricsMiddleware: a latency histogram and
+a request counter per method, route and status code, plus the number of
+database queries and the time spent in them per route. get_or_refresh()
+counts cache lookups per key prefix as hit, stale or miss.
+
+Under gunicorn each worker is a separate process. When
+PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py) every worker writes
+its samples to memory-mapped files in that directory and a scrape of any
+worker aggregates all of them.
+
+Business gauges (product, order and customer counts) are never computed by
+a scrape. refresh_business_metrics() stores a snapshot in the cache on the
+Celery beat schedule and the collector reads it back; on a cold cache the
+first scrape computes it once through get_or_refresh().
+"""
+import os
+
+from django.conf import settings
+from django.db.models import Count, Q
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+
+APP_VERSION = '1.0.0'
+BUSINESS_METRICS_KEY = 'metrics:business'
+
+REQUEST_LATENCY = Histogram(
+    'django_http_request_duration_seconds',
+    'Time spent handling a request, by route',
+    ['method', 'route', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    'django_http_requests',
+    'Requests handled, by route and status code',
+    ['method', 'route', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'django_http_request_db_queries',
+    'Database queries run while handling a request',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_TIME = Histogram(
+    'django_http_request_db_duration_seconds',
+    'Time spent in database queries while handling a request',
+    ['route'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_LOOKUPS = Counter(
+    'ipswich_cache_lookups',
+    'Cached value lookups by key prefix and result (hit, stale or miss)',
+    ['cache', 'result'],
+)
+
+
+def compute_business_metrics():
+    from apps.customers.models import Customer
+    from apps.orders.models import Order
+    from apps.products.models import Product
+
+    products = Product.objects.aggregate(
+        all=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        featured=Count('id', filter=Q(is_featured=True)),
+    )
+    orders = dict(Order.objects.order_by().values_list('status').annotate(n=Count('id')))
+    customers = dict(Customer.objects.order_by().values_list('status').annotate(n=Count('id')))
+    return {'products': products, 'orders': orders, 'customers': customers}
+
+
+def refresh_business_metrics():
+    from .cache import store_fresh
+
+    snapshot = compute_business_metrics()
+    store_fresh(BUSINESS_METRICS_KEY, snapshot, ttl=_business_metrics_ttl())
+    return snapshot
+
+
+def _business_metrics_ttl():
+    return getattr(settings, 'BUSINESS_METRICS_TTL', 120)
+
+
+class BusinessMetricsCollector:
+    """Exposes the cached business snapshot as gauges"""
+
+    def collect(self):
+        from .cache import get_or_refresh
+
+        info = GaugeMetricFamily('ipswich_application_info', 'Application version', labels=['version'])
+        info.add_metric([APP_VERSION], 1)
+        yield info
+
+        snapshot = get_or_refresh(BUSINESS_METRICS_KEY, compute_business_metrics, ttl=_business_metrics_ttl())
+        families = [
+            ('ipswich_products', 'Products by state', 'state', snapshot['products']),
+            ('ipswich_orders', 'Orders by status', 'status', snapshot['orders']),
+            ('ipswich_customers', 'Customers by status', 'status', snapshot['customers']),
+        ]
+        for name, documentation, label, values in families:
+            family = GaugeMetricFamily(name, documentation, labels=[label])
+            for value, count in sorted(values.items()):
+                family.add_metric([value], count)
+            yield family
+
+
+BUSINESS_REGISTRY = CollectorRegistry()
+BUSINESS_REGISTRY.register(BusinessMetricsCollector())
+
+
+def multiprocess_enabled():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def render_metrics():
+    """The exposition text for a scrape"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(BUSINESS_REGISTRY)
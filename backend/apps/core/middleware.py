@@ -0,0 +1,221 @@
+"""
+Request middleware
+
+The middleware here works for sync and async views alike. Database queries
+are observed through query hooks: run_query_hooks() is installed once on
+every connection and calls the hooks registered with query_hook() for the
+current context. Context variables follow a request into the threads that
+run its ORM calls under ASGI, so the hooks see those queries too.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject, empty
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from . import metrics, profiling
+
+
+slow_request_logger = logging.getLogger('apps.profiling')
+
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+_query_hooks = ContextVar('query_hooks', default=())
+
+
+def run_query_hooks(execute, sql, params, many, context):
+    """execute_wrapper that passes each query through the current hooks"""
+    for hook in reversed(_query_hooks.get()):
+        execute = partial(hook, execute)
+    return execute(sql, params, many, context)
+
+
+def install_query_hooks(connection):
+    if run_query_hooks not in connection.execute_wrappers:
+        connection.execute_wrappers.append(run_query_hooks)
+
+
+@contextmanager
+def query_hook(hook):
+    """Pass queries made in this context through ``hook``, an execute_wrapper"""
+    token = _query_hooks.set((*_query_hooks.get(), hook))
+    try:
+        yield
+    finally:
+        _query_hooks.reset(token)
+
+
+class AsyncCapableMixin:
+    """
+    Runs __acall__ instead of __call__ when the rest of the chain is async,
+    so async views are not pushed into a thread
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+
+
+class QueryTimer:
+    """execute_wrapper that counts queries and adds up their duration"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def route_label(request):
+    """The URL pattern that handled ``request``, so label values stay bounded"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return '/' + match.route if match.route else match.view_name or 'unmatched'
+
+
+class MetricsMiddleware(AsyncCapableMixin):
+    """
+    Records Prometheus request metrics: latency and a counter by method,
+    route and status, and database query count and time by route.
+    Disabled with METRICS_ENABLED = False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with query_hook(timer):
+            response = self.get_response(request)
+        self.record(request, response, timer, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with query_hook(timer):
+            response = await self.get_response(request)
+        self.record(request, response, timer, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def record(request, response, timer, duration):
+        route = route_label(request)
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        labels = (method, route, str(response.status_code))
+        metrics.REQUEST_LATENCY.labels(*labels).observe(duration)
+        metrics.REQUESTS.labels(*labels).inc()
+        metrics.REQUEST_QUERIES.labels(route).observe(timer.count)
+        metrics.REQUEST_DB_TIME.labels(route).observe(timer.duration)
+
+
+class ProfilingMiddleware(AsyncCapableMixin):
+    """
+    Profiles each request (see apps.core.profiling): adds a Server-Timing
+    header for staff users, or for everyone with PROFILING_SERVER_TIMING,
+    and logs requests slower than PROFILING_SLOW_REQUEST_MS. Disabled with
+    PROFILING_ENABLED = False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.server_timing_for_all = getattr(settings, 'PROFILING_SERVER_TIMING', False)
+        self.slow_ms = getattr(settings, 'PROFILING_SLOW_REQUEST_MS', 500)
+
+    def handle(self, request):
+        profile, token = profiling.start_profile()
+        try:
+            with query_hook(profile):
+                response = self.get_response(request)
+        finally:
+            profiling.end_profile(token)
+        return self.report(request, response, profile)
+
+    async def __acall__(self, request):
+        profile, token = profiling.start_profile()
+        try:
+            with query_hook(profile):
+                response = await self.get_response(request)
+        finally:
+            profiling.end_profile(token)
+        return self.report(request, response, profile)
+
+    def report(self, request, response, profile):
+        total = profile.elapsed
+        if self.server_timing_for_all or self._is_staff(request):
+            response['Server-Timing'] = profile.server_timing(total)
+        if total * 1000 >= self.slow_ms:
+            self.log_slow_request(request, response, profile, total)
+        return response
+
+    @staticmethod
+    def _is_staff(request):
+        user = getattr(request, 'user', None)
+        # Never load a user just for the header
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            return False
+        return bool(getattr(user, 'is_staff', False))
+
+    def log_slow_request(self, request, response, profile, total):
+        entry = {
+            'method': request.method,
+            'path': request.path,
+            'route': route_label(request),
+            'status': response.status_code,
+            'totalMs': round(total * 1000, 1),
+            'timings': {name: round(ms, 1) for name, ms, _ in profile.timings(total)},
+            'queries': len(profile.queries),
+            'cacheCalls': profile.cache_calls,
+            'topQueries': profile.top_queries(),
+        }
+        slow_request_logger.warning('Slow request %s', json.dumps(entry), extra={'profile': entry})
+
+
+class WhiteNoiseMiddleware(AsyncCapableMixin, BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise's middleware, made async-capable: as a sync-only middleware
+    it would move every async request onto a thread
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        BaseWhiteNoiseMiddleware.__init__(self, get_response, settings)
+        AsyncCapableMixin.__init__(self, get_response)
+
+    def handle(self, request):
+        return BaseWhiteNoiseMiddleware.__call__(self, request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -1,7 +1,14 @@
 from django.db import models
+from django.db.models import Count, Q
 from django.utils.text import slugify
 
 
+class CategoryQuerySet(models.QuerySet):
+    def with_product_count(self):
+        """Annotate active product counts so product_count needs no query per category"""
+        return self.annotate(active_product_count=Count('products', filter=Q(products__is_active=True)))
+
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
@@ -11,6 +18,8 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = 'Categories'
         ordering = ['name']
@@ -25,4 +34,15 @@ class Category(models.Model):
 
     @property
     def product_count(self):
+        if hasattr(self, 'active_product_count'):
+            return self.active_product_count
         return self.products.filter(is_active=True).count()
+
+
+class BootRecord(models.Model):
+    """The fingerprint of the last completed ``manage.py boot`` (see apps.core.boot)"""
+    fingerprint = models.CharField(max_length=64)
+    booted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.fingerprint
@@ -1,9 +1,18 @@
 """
 Custom pagination classes for API responses
 """
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import InvalidPage
+from django.db import connections
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
+from .cache import get_or_refresh
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     """
@@ -14,8 +23,25 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, using the async ORM"""
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        self.request = request
+        return self.page.object_list
+
     def get_paginated_response(self, data):
-        return Response({
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
             'count': self.page.paginator.count,
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
@@ -29,7 +55,7 @@ class StandardResultsSetPagination(PageNumberPagination):
                 'hasNext': self.page.has_next(),
                 'hasPrevious': self.page.has_previous(),
             }
-        })
+        }
 
 
 class FrontendCompatiblePagination(PageNumberPagination):
@@ -56,3 +82,114 @@ class FrontendCompatiblePagination(PageNumberPagination):
                 'priceRange': {'min': 0, 'max': 1000},  # Will be calculated
             }
         })
+
+
+class OrderCursorPagination(CursorPagination):
+    """
+    Keyset pagination over orders, newest first. Pages are range scans of
+    the created_at index however deep they are. Order numbers are not used:
+    legacy random numbers (ORD-A1B2C3D4) would all sort above the
+    time-sortable ones.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def _positive_int(value, default, cutoff=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    if value < 1:
+        return default
+    return min(value, cutoff) if cutoff else value
+
+
+def estimate_count(model, using='default'):
+    """
+    The database's cheap row count estimate for ``model``'s table, or None
+    when the backend has none
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        elif connection.vendor == 'sqlite':
+            # Rowids only grow, so this is an upper bound once rows are deleted
+            cursor.execute(f'SELECT MAX(rowid) FROM {table}')
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class AdminPagination(BasePagination):
+    """
+    page/pageSize pagination for the admin API with a ``meta`` block.
+
+    The total is counted once per request and cached per filter signature
+    for ADMIN_COUNT_CACHE_TTL seconds. Unfiltered listings of tables larger
+    than ADMIN_ESTIMATED_COUNT_THRESHOLD rows use the database's estimate
+    instead of COUNT(*) and report ``totalIsEstimate``.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_query_param = 'page'
+    page_size_query_param = 'pageSize'
+    results_key = 'results'
+
+    def __init__(self, results_key=None):
+        if results_key:
+            self.results_key = results_key
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        self.page_size_value = _positive_int(params.get(self.page_size_query_param), self.page_size, self.max_page_size)
+        self.page_number = _positive_int(params.get(self.page_query_param), 1)
+        self.total, self.total_is_estimate = self.get_count(queryset)
+        start = (self.page_number - 1) * self.page_size_value
+        return list(queryset[start:start + self.page_size_value])
+
+    def get_count(self, queryset):
+        try:
+            sql = str(queryset.order_by().query)
+        except EmptyResultSet:
+            # A filter that can never match, such as pk__in=[]
+            return 0, False
+        signature = hashlib.sha256(f'{queryset.db}:{sql}'.encode()).hexdigest()
+        return get_or_refresh(
+            f'admin-count:{signature}',
+            lambda: self.count_queryset(queryset),
+            ttl=getattr(settings, 'ADMIN_COUNT_CACHE_TTL', 15),
+        )
+
+    def count_queryset(self, queryset):
+        """(total, is_estimate) for ``queryset``"""
+        threshold = getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000)
+        if threshold and not queryset.query.where.children:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > threshold:
+                return estimate, True
+        return queryset.count(), False
+
+    def get_meta(self):
+        total_pages = (self.total + self.page_size_value - 1) // self.page_size_value
+        meta = {
+            'page': self.page_number,
+            'pageSize': self.page_size_value,
+            'totalItems': self.total,
+            'totalPages': total_pages,
+            'hasNext': self.page_number < total_pages,
+            'hasPrevious': self.page_number > 1,
+        }
+        if self.total_is_estimate:
+            meta['totalIsEstimate'] = True
+        return meta
+
+    def get_paginated_response(self, data):
+        return Response({self.results_key: data, 'meta': self.get_meta()})
@@ -0,0 +1,199 @@
+"""
+Per-request profiling.
+
+ProfilingMiddleware (apps.core.middleware) opens a RequestProfile for each
+request in a context variable. While it is open:
+- every database query is timed, with its SQL kept for the slow log
+- cache calls made through profiled_cache(), sync or async, are counted
+  and timed
+- serializers with ProfiledSerializerMixin time building response data
+- ProfiledJSONRenderer times response rendering
+
+Requests slower than PROFILING_SLOW_REQUEST_MS are logged to the
+``apps.profiling`` logger with the most expensive SQL fingerprints.
+Staff users (or everyone, with PROFILING_SERVER_TIMING) get the figures
+in a Server-Timing header.
+
+With PROFILING_ENABLED = False the middleware removes itself and the hooks
+below return immediately.
+"""
+import re
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from rest_framework.renderers import JSONRenderer
+
+
+_current = ContextVar('request_profile', default=None)
+
+CACHE_METHODS = frozenset({
+    'get', 'set', 'add', 'delete', 'get_many', 'set_many', 'delete_many',
+    'get_or_set', 'incr', 'decr', 'touch', 'has_key',
+})
+ASYNC_CACHE_METHODS = frozenset(f'a{name}' for name in CACHE_METHODS)
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LISTS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """``sql`` with literals and IN lists collapsed, so repeated queries group together"""
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LISTS.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = []
+        self.db_time = 0.0
+        self.cache_calls = 0
+        self.cache_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.db_time += duration
+            self.queries.append((sql, duration))
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def timings(self, total):
+        """Server-Timing entries as (name, milliseconds, description)"""
+        app = total - self.db_time - self.cache_time - self.serialize_time - self.render_time
+        return [
+            ('db', self.db_time * 1000, f'{len(self.queries)} queries'),
+            ('cache', self.cache_time * 1000, f'{self.cache_calls} calls'),
+            ('serialize', self.serialize_time * 1000, 'serializer data'),
+            ('render', self.render_time * 1000, 'response rendering'),
+            ('app', max(app, 0) * 1000, 'view code'),
+            ('total', total * 1000, None),
+        ]
+
+    def server_timing(self, total):
+        parts = []
+        for name, ms, description in self.timings(total):
+            entry = f'{name};dur={ms:.1f}'
+            if description:
+                entry += f';desc="{description}"'
+            parts.append(entry)
+        return ', '.join(parts)
+
+    def top_queries(self, limit=5):
+        groups = defaultdict(lambda: [0, 0.0])
+        for sql, duration in self.queries:
+            group = groups[fingerprint(sql)]
+            group[0] += 1
+            group[1] += duration
+        ranked = sorted(groups.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {'sql': sql, 'count': count, 'ms': round(duration * 1000, 1)}
+            for sql, (count, duration) in ranked
+        ]
+
+
+def start_profile():
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def end_profile(token):
+    _current.reset(token)
+
+
+def current_profile():
+    return _current.get()
+
+
+class _ProfiledCache:
+    """Times calls on a cache backend for the open request profile"""
+
+    def __init__(self, cache, profile):
+        self._cache = cache
+        self._profile = profile
+
+    def __getattr__(self, name):
+        attr = getattr(self._cache, name)
+        if name in ASYNC_CACHE_METHODS:
+            return self._timed_async(attr)
+        if name not in CACHE_METHODS:
+            return attr
+        profile = self._profile
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                profile.cache_time += time.perf_counter() - start
+                profile.cache_calls += 1
+        return timed
+
+    def _timed_async(self, attr):
+        profile = self._profile
+
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await attr(*args, **kwargs)
+            finally:
+                profile.cache_time += time.perf_counter() - start
+                profile.cache_calls += 1
+        return timed
+
+
+def profiled_cache(cache):
+    """``cache``, timed when a request is being profiled"""
+    profile = _current.get()
+    return cache if profile is None else _ProfiledCache(cache, profile)
+
+
+class ProfiledSerializerMixin:
+    """
+    Serializer mixin that adds the time spent building its data to the
+    request profile. Only the outermost serializer is timed, and queries and
+    cache calls made meanwhile stay under db and cache.
+    """
+
+    def to_representation(self, instance):
+        profile = _current.get()
+        if profile is None or profile.serializing:
+            return super().to_representation(instance)
+        profile.serializing = True
+        start = time.perf_counter()
+        io_time = profile.db_time + profile.cache_time
+        try:
+            return super().to_representation(instance)
+        finally:
+            io_time = profile.db_time + profile.cache_time - io_time
+            profile.serialize_time += time.perf_counter() - start - io_time
+            profile.serializing = False
+
+
+class ProfiledJSONRenderer(JSONRenderer):
+    """JSONRenderer that adds its rendering time to the request profile"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        profile = _current.get()
+        if profile is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            profile.render_time += time.perf_counter() - start
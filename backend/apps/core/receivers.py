@@ -0,0 +1,12 @@
+"""
+Reactions to framework signals
+"""
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .middleware import install_query_hooks
+
+
+@receiver(connection_created)
+def add_query_hooks(sender, connection, **kwargs):
+    install_query_hooks(connection)
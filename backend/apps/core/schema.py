@@ -0,0 +1,113 @@
+"""
+The OpenAPI schema, generated once.
+
+drf-spectacular's schema view introspects every view and serializer on
+each request, then renders the result as YAML: about 200ms of CPU per
+request. Here the schema comes from OPENAPI_SCHEMA_FILE, which
+``manage.py build_schema`` writes when the image is built (or
+``manage.py boot`` when the deployment has none), or is generated once per process if the
+file is missing. Each format is rendered once,
+and SchemaView serves it with a weak ETag, so a client that already has
+the schema gets a 304, and a gzip body for clients that accept it.
+
+The preloading gunicorn master renders everything during warm-up, so
+workers share it. With OPENAPI_SCHEMA_LIVE (the default under DEBUG) the
+schema is generated on every request, so it follows code changes.
+
+This module imports drf-spectacular's generator; it is loaded on the first
+schema request (see manage.py importtime).
+"""
+import functools
+import gzip
+import hashlib
+import json
+import logging
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from drf_spectacular.renderers import OpenApiJsonRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+
+logger = logging.getLogger(__name__)
+
+Rendering = namedtuple('Rendering', 'content gzipped etag')
+
+
+def generate():
+    """The schema as JSON, introspected from the URL configuration"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(urlconf=spectacular_settings.SERVE_URLCONF)
+    return OpenApiJsonRenderer().render(generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC))
+
+
+@functools.cache
+def load():
+    """The schema from OPENAPI_SCHEMA_FILE, or generated if there is none"""
+    path = Path(settings.OPENAPI_SCHEMA_FILE)
+    try:
+        content = path.read_bytes()
+    except FileNotFoundError:
+        logger.warning('%s not found, generating the OpenAPI schema; run manage.py build_schema when building', path)
+        content = generate()
+    return json.loads(content)
+
+
+@functools.cache
+def render(renderer_class):
+    content = renderer_class().render(load())
+    etag = 'W/"%s"' % hashlib.sha256(content).hexdigest()[:32]
+    return Rendering(content, gzip.compress(content, mtime=0), etag)
+
+
+def accepts_gzip(request):
+    """Whether the request's Accept-Encoding allows gzip; ``gzip;q=0`` refuses it"""
+    qualities = {}
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, *params = [part.strip() for part in coding.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0)) > 0
+
+
+def preload():
+    """Render every format the schema view offers"""
+    for renderer_class in SchemaView.renderer_classes:
+        render(renderer_class)
+
+
+class SchemaView(SpectacularAPIView):
+    """SpectacularAPIView serving the schema rendered once per format"""
+
+    def get(self, request, *args, **kwargs):
+        if settings.OPENAPI_SCHEMA_LIVE:
+            return super().get(request, *args, **kwargs)
+
+        rendering = render(type(request.accepted_renderer))
+        response = get_conditional_response(request, etag=rendering.etag)
+        if response is None:
+            content_type = request.accepted_media_type
+            if request.accepted_renderer.charset:
+                content_type += f'; charset={request.accepted_renderer.charset}'
+            response = HttpResponse(content_type=content_type)
+            if accepts_gzip(request):
+                response.content = rendering.gzipped
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response.content = rendering.content
+            response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, None)}"'
+        response['ETag'] = rendering.etag
+        patch_vary_headers(response, ['Accept-Encoding'])
+        # Clients keep the schema but check the ETag before using it
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
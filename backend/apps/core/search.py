@@ -0,0 +1,159 @@
+"""
+Indexed search for the order and customer search boxes.
+
+Searches take one of four paths:
+
+- Order numbers (``ORD-...``) are matched as exact prefixes with a range
+  scan on the column's B-tree index.
+- E-mail addresses that start with the local part (``bob@``, ``Bob@Ex``)
+  are matched case-insensitively as prefixes with a range scan on a
+  LOWER(email) expression index.
+- Other terms of three or more characters, including domains
+  (``@gmail.com``), are substring matches answered by a trigram index. On
+  PostgreSQL these are pg_trgm GIN indexes on the same UPPER(column)
+  expression Django's icontains produces, so the plain icontains query
+  uses them. On SQLite they are FTS5 tables with the trigram tokenizer,
+  kept in sync by triggers.
+- Shorter terms cannot use a trigram index and fall back to icontains.
+
+The indexes are created by migrations through create_search_index().
+SQLite rebuilds a table to add or alter most columns, which drops its
+triggers, so such migrations on a searched table must also call
+restore_search_index().
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+
+
+ORDER_NUMBER_PATTERN = re.compile(r'^ORD-[0-9A-Z]*$', re.IGNORECASE)
+MIN_TRIGRAM_LENGTH = 3
+
+ORDER_SEARCH_FIELDS = ['order_number', 'customer_email', 'customer_first_name', 'customer_last_name']
+CUSTOMER_SEARCH_FIELDS = ['email', 'first_name', 'last_name', 'phone']
+
+_fts_tables = {}
+
+
+def search_table_name(table):
+    return f'{table}_search'
+
+
+def _prefix_filter(field, prefix):
+    # gte/lt lets SQLite use the index too; startswith keeps it exact
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper_bound, f'{field}__startswith': prefix})
+
+
+def _is_email_prefix(term):
+    # Domain-only terms (@gmail.com) are substrings, not prefixes
+    return '@' in term and not term.startswith('@')
+
+
+def _email_prefix_filter(queryset, field, term):
+    # Matches the LOWER(email) expression indexes
+    alias = f'{field}_lower'
+    return queryset.alias(**{alias: Lower(field)}).filter(_prefix_filter(alias, term.lower()))
+
+
+def _fts_available(connection, table):
+    key = (connection.alias, table)
+    if key not in _fts_tables:
+        _fts_tables[key] = search_table_name(table) in connection.introspection.table_names()
+    return _fts_tables[key]
+
+
+def _substring_filter(queryset, term, fields):
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'sqlite' and len(term) >= MIN_TRIGRAM_LENGTH and _fts_available(connection, table):
+        fts_table = search_table_name(table)
+        phrase = '"{}"'.format(term.replace('"', '""'))
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s', [phrase]
+        ))
+    # PostgreSQL answers this from the trigram indexes
+    return queryset.filter(reduce(or_, [Q(**{f'{field}__icontains': term}) for field in fields]))
+
+
+def search_orders(queryset, term):
+    term = term.strip()
+    if not term:
+        return queryset
+    if ORDER_NUMBER_PATTERN.match(term):
+        return queryset.filter(_prefix_filter('order_number', term.upper()))
+    if _is_email_prefix(term):
+        return _email_prefix_filter(queryset, 'customer_email', term)
+    return _substring_filter(queryset, term, ORDER_SEARCH_FIELDS)
+
+
+def search_customers(queryset, term):
+    term = term.strip()
+    if not term:
+        return queryset
+    if _is_email_prefix(term):
+        return _email_prefix_filter(queryset, 'email', term)
+    return _substring_filter(queryset, term, CUSTOMER_SEARCH_FIELDS)
+
+
+def create_search_index(schema_editor, table, columns):
+    """Create the trigram index for ``columns`` of ``table`` on the current database"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in columns:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm '
+                f'ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+            )
+    elif vendor == 'sqlite':
+        fts_table = search_table_name(table)
+        column_list = ', '.join(columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+                f"{column_list}, content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+        except Exception:
+            # SQLite older than 3.34 has no trigram tokenizer; search falls back to icontains
+            return
+        schema_editor.execute(
+            f'CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} BEGIN '
+            f'INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} BEGIN '
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN '
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+            f'INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END'
+        )
+        schema_editor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def drop_search_index(schema_editor, table, columns):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for column in columns:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{column}_trgm')
+    elif vendor == 'sqlite':
+        fts_table = search_table_name(table)
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {fts_table}')
+
+
+def restore_search_index(schema_editor, table, columns):
+    """Recreate the SQLite search table and triggers after a migration rebuilt ``table``"""
+    if schema_editor.connection.vendor == 'sqlite':
+        drop_search_index(schema_editor, table, columns)
+        create_search_index(schema_editor, table, columns)
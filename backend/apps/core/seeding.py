@@ -0,0 +1,387 @@
+"""
+Bulk, deterministic data seeding for benchmarks and load tests.
+
+Everything is generated with NumPy from ``seed`` and written with
+bulk_create in large batches, one transaction per batch. The same seed and
+end date always produce the same rows: products and customers get
+explicit ids, and orders are generated in fixed-size partitions. Each
+partition has its own random stream derived from (seed, partition), so
+the result does not depend on how many worker processes inserted it.
+
+Distributions:
+- product popularity is Zipfian: the product of rank k is bought with
+  weight 1 / k ** ZIPF_EXPONENT, with ranks shuffled across the catalogue
+- customer activity is heavy-tailed (Pareto weights), so a minority of
+  customers place most orders
+- order dates follow a weekly cycle, a November/December peak and gentle
+  growth over the period, with an evening-heavy time of day
+- status depends on age: recent orders are still pending or in transit
+
+Bulk inserts skip model signals, so the daily sales rollup and customer
+lifetime metrics are rebuilt once at the end.
+"""
+import math
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from apps.customers.metrics import refresh_customer_metrics
+from apps.customers.models import Customer
+from apps.orders.ids import EPOCH_MS, NODE_BITS, SEQUENCE_BITS, encode
+from apps.orders.models import DailySalesSummary, Order, OrderItem, StockReservation
+from apps.orders.rollup import rebuild_daily_sales
+from apps.products.models import Product, ProductImage, ProductSpecification, ProductTag
+from .models import Category
+
+
+PARTITION_SIZE = 50000
+MAX_LINES = 6
+ZIPF_EXPONENT = 1.1
+FREE_SHIPPING_CENTS = 5000
+SHIPPING_CENTS = 499
+
+CATEGORIES = [
+    ('Electronics', 'Phones, laptops, audio and accessories'),
+    ('Computing', 'Components, storage and peripherals'),
+    ('Home & Kitchen', 'Cookware, appliances and storage'),
+    ('Garden', 'Tools, furniture and outdoor living'),
+    ('Apparel', 'Clothing for every season'),
+    ('Footwear', 'Trainers, boots and shoes'),
+    ('Sports & Outdoors', 'Fitness, cycling and camping gear'),
+    ('Toys & Games', 'Games, puzzles and toys'),
+    ('Books', 'Fiction, non-fiction and reference'),
+    ('Beauty & Health', 'Skincare, grooming and wellbeing'),
+]
+BRANDS = [
+    'Acme', 'Northwind', 'Contoso', 'Fabrikam', 'Globex', 'Initech', 'Umbrella',
+    'Stark', 'Wayne', 'Tyrell', 'Cyberdyne', 'Soylent', 'Hooli', 'Vandelay',
+]
+ADJECTIVES = ['Classic', 'Pro', 'Ultra', 'Compact', 'Deluxe', 'Essential', 'Smart', 'Eco', 'Premium', 'Lite']
+NOUNS = ['Speaker', 'Backpack', 'Kettle', 'Jacket', 'Monitor', 'Lamp', 'Trainer', 'Drill', 'Novel', 'Blender',
+         'Headphones', 'Tent', 'Keyboard', 'Watch', 'Mug', 'Puzzle', 'Serum', 'Chair', 'Router', 'Bottle']
+TAGS = ['new', 'bestseller', 'sale', 'eco', 'gift', 'limited', 'bundle', 'clearance']
+FIRST_NAMES = ['Olivia', 'Amelia', 'Isla', 'Ava', 'Mia', 'Noah', 'Oliver', 'George', 'Arthur', 'Leo',
+               'Priya', 'Mohammed', 'Chen', 'Sofia', 'Lucas', 'Grace', 'Jack', 'Freya', 'Harry', 'Zara']
+LAST_NAMES = ['Smith', 'Jones', 'Taylor', 'Brown', 'Williams', 'Wilson', 'Johnson', 'Davies', 'Patel', 'Wright',
+              'Green', 'Walker', 'Khan', 'Evans', 'Thomas', 'Roberts', 'Lewis', 'Hughes', 'Clarke', 'Wood']
+CITIES = [
+    ('Ipswich', 'Suffolk', 'GB', 'IP1'), ('London', 'Greater London', 'GB', 'EC1'),
+    ('Manchester', 'Greater Manchester', 'GB', 'M1'), ('Leeds', 'West Yorkshire', 'GB', 'LS1'),
+    ('Bristol', 'Bristol', 'GB', 'BS1'), ('Norwich', 'Norfolk', 'GB', 'NR1'),
+    ('Dublin', 'Leinster', 'IE', 'D01'), ('Paris', 'Ile-de-France', 'FR', '75001'),
+    ('Berlin', 'Berlin', 'DE', '10115'), ('New York', 'NY', 'US', '10001'),
+]
+STATUS_CANCELLED = 0.04
+
+
+class SeedConfig:
+    """Sizes, seed and date range for one seeding run"""
+
+    def __init__(self, products=1000, customers=10000, orders=100000, seed=1, end_date=None, days=730):
+        self.products = products
+        self.customers = customers
+        self.orders = orders
+        self.seed = seed
+        self.end_date = end_date or datetime.now(dt_timezone.utc).date()
+        self.days = days
+        self.start_date = self.end_date - timedelta(days=days - 1)
+
+    @property
+    def start_timestamp(self):
+        return datetime.combine(self.start_date, time.min, tzinfo=dt_timezone.utc).timestamp()
+
+    @property
+    def end_timestamp(self):
+        return datetime.combine(self.end_date + timedelta(days=1), time.min, tzinfo=dt_timezone.utc).timestamp()
+
+    def partitions(self):
+        return range(math.ceil(self.orders / PARTITION_SIZE))
+
+    def rng(self, *stream):
+        """Independent generator for ``stream``, e.g. (1, partition) for a partition's orders"""
+        return np.random.default_rng([self.seed, *stream])
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values it is given"""
+    fields = [
+        field for model in models for field in model._meta.fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _datetimes(timestamps):
+    return [datetime.fromtimestamp(int(ts), tz=dt_timezone.utc) for ts in timestamps]
+
+
+def _money(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def product_prices(config):
+    """Prices in cents, by product index"""
+    rng = config.rng(0, 1)
+    return np.maximum(np.round(rng.lognormal(mean=3.3, sigma=0.9, size=config.products) * 100), 199).astype(np.int64)
+
+
+def product_weights(config):
+    """Zipfian purchase probabilities, by product index"""
+    rng = config.rng(0, 2)
+    weights = 1.0 / np.arange(1, config.products + 1) ** ZIPF_EXPONENT
+    return rng.permutation(weights / weights.sum())
+
+
+def customer_weights(config):
+    rng = config.rng(0, 3)
+    weights = rng.pareto(1.5, config.customers) + 1
+    return weights / weights.sum()
+
+
+def day_weights(config):
+    """Probability of an order on each day of the period"""
+    days = np.arange(config.days)
+    dates = np.datetime64(config.start_date) + days
+    weekday = (dates.astype('datetime64[D]').astype(np.int64) + 3) % 7
+    months = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    weekly = np.where(weekday >= 5, 1.25, 1.0)
+    seasonal = np.select([months == 11, months == 12, months == 1], [1.6, 1.9, 0.8], 1.0)
+    growth = 1 + days / max(config.days, 1) * 0.5
+    weights = weekly * seasonal * growth
+    return weights / weights.sum()
+
+
+HOUR_WEIGHTS = np.array([1, 1, 1, 1, 1, 2, 3, 5, 6, 6, 6, 6, 7, 7, 6, 6, 6, 7, 8, 9, 10, 10, 8, 4], dtype=float)
+HOUR_WEIGHTS /= HOUR_WEIGHTS.sum()
+
+
+def customer_details(index):
+    """Deterministic name and address for customer ``index`` (0-based)"""
+    city, state, country, postcode = CITIES[(index * 7) % len(CITIES)]
+    return {
+        'email': f'customer{index + 1:07d}@example.com',
+        'first_name': FIRST_NAMES[index % len(FIRST_NAMES)],
+        'last_name': LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)],
+        'city': city,
+        'state': state,
+        'country': country,
+        'zip_code': f'{postcode} {index % 9 + 1}AA',
+        'address_line1': f'{index % 200 + 1} High Street',
+    }
+
+
+def order_number(created_ms, order_id):
+    # Snowflake layout (see apps.orders.ids) with the order id in the node
+    # and sequence bits, so seeded numbers are unique and time-sortable
+    value = ((created_ms - EPOCH_MS) << (NODE_BITS + SEQUENCE_BITS)) | (order_id & ((1 << (NODE_BITS + SEQUENCE_BITS)) - 1))
+    return f'ORD-{encode(value)}'
+
+
+def clear():
+    """Empty every table the seeder writes to"""
+    models = [
+        OrderItem, StockReservation, Order, DailySalesSummary, Customer,
+        ProductImage, ProductSpecification, Product.tags.through, ProductTag, Product, Category,
+    ]
+    tables = [model._meta.db_table for model in models]
+    statements = connection.ops.sql_flush(no_style(), tables, reset_sequences=True)
+    connection.ops.execute_sql_flush(statements)
+
+
+def _reset_sequences(*models):
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def seed_catalog(config, batch_size=5000):
+    rng = config.rng(0, 4)
+    prices = product_prices(config)
+    created_at = datetime.combine(config.start_date, time.min, tzinfo=dt_timezone.utc)
+
+    with transaction.atomic(), explicit_timestamps(Category, Product):
+        Category.objects.bulk_create([
+            Category(id=i + 1, name=name, slug=f'category-{i + 1}', description=description,
+                     created_at=created_at, updated_at=created_at)
+            for i, (name, description) in enumerate(CATEGORIES)
+        ])
+        ProductTag.objects.bulk_create([
+            ProductTag(id=i + 1, name=name, slug=name) for i, name in enumerate(TAGS)
+        ])
+
+        categories = rng.integers(len(CATEGORIES), size=config.products)
+        brands = rng.integers(len(BRANDS), size=config.products)
+        names = rng.integers(len(ADJECTIVES) * len(NOUNS), size=config.products)
+        discounted = rng.random(config.products) < 0.15
+        featured = rng.random(config.products) < 0.05
+        stock = rng.integers(0, 500, size=config.products)
+        ratings = np.round(np.clip(rng.normal(4.1, 0.5, size=config.products), 1, 5), 2)
+        reviews = rng.poisson(40, size=config.products)
+        products = [
+            Product(
+                id=i + 1,
+                name=f'{BRANDS[brands[i]]} {ADJECTIVES[names[i] % len(ADJECTIVES)]} {NOUNS[names[i] // len(ADJECTIVES)]} {i + 1}',
+                slug=f'product-{i + 1:07d}',
+                description='Generated product for benchmarks',
+                price=_money(prices[i]),
+                original_price=_money(prices[i] * 5 // 4) if discounted[i] else None,
+                category_id=int(categories[i]) + 1,
+                brand=BRANDS[brands[i]],
+                stock_count=int(stock[i]),
+                is_featured=bool(featured[i]),
+                rating=Decimal(str(ratings[i])),
+                review_count=int(reviews[i]),
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            for i in range(config.products)
+        ]
+        Product.objects.bulk_create(products, batch_size=batch_size)
+        ProductImage.objects.bulk_create([
+            ProductImage(product_id=i + 1, image=f'products/product-{i + 1:07d}-{n}.jpg', is_primary=n == 0, order=n)
+            for i in range(config.products) for n in range(1 + i % 2)
+        ], batch_size=batch_size)
+        ProductSpecification.objects.bulk_create([
+            ProductSpecification(product_id=i + 1, name='Brand', value=BRANDS[brands[i]])
+            for i in range(config.products)
+        ], batch_size=batch_size)
+        tags = rng.integers(len(TAGS), size=config.products)
+        Product.tags.through.objects.bulk_create([
+            Product.tags.through(product_id=i + 1, producttag_id=int(tags[i]) + 1)
+            for i in range(config.products)
+        ], batch_size=batch_size)
+    _reset_sequences(Category, ProductTag, Product, ProductImage, ProductSpecification)
+    return prices
+
+
+def seed_customers(config, batch_size=5000):
+    rng = config.rng(0, 5)
+    span = config.end_timestamp - config.start_timestamp
+    joined = np.sort(config.start_timestamp + rng.random(config.customers) * span)
+    statuses = rng.choice(['active', 'vip', 'inactive'], size=config.customers, p=[0.85, 0.05, 0.10])
+    consent = rng.random(config.customers) < 0.4
+
+    with transaction.atomic(), explicit_timestamps(Customer):
+        for start in range(0, config.customers, batch_size):
+            stop = min(start + batch_size, config.customers)
+            created = _datetimes(joined[start:stop])
+            Customer.objects.bulk_create([
+                Customer(
+                    id=i + 1,
+                    status=str(statuses[i]),
+                    marketing_consent=bool(consent[i]),
+                    is_verified=True,
+                    created_at=created[i - start],
+                    updated_at=created[i - start],
+                    **customer_details(i),
+                )
+                for i in range(start, stop)
+            ])
+    _reset_sequences(Customer)
+
+
+def seed_order_partition(config, partition, prices, batch_size=5000):
+    """Generate and insert one partition of orders; returns (orders, lines) written"""
+    rng = config.rng(1, partition)
+    first = partition * PARTITION_SIZE
+    count = min(PARTITION_SIZE, config.orders - first)
+    if count <= 0:
+        return 0, 0
+    order_ids = np.arange(first + 1, first + count + 1)
+
+    customers = rng.choice(config.customers, size=count, p=customer_weights(config))
+    days = rng.choice(config.days, size=count, p=day_weights(config))
+    hours = rng.choice(24, size=count, p=HOUR_WEIGHTS)
+    seconds = config.start_timestamp + days * 86400 + hours * 3600 + rng.integers(0, 3600, size=count)
+    seconds = np.minimum(seconds, config.end_timestamp - 1)
+
+    # Lines: draw products by popularity, then merge repeats into one line
+    lines_per_order = np.minimum(1 + rng.poisson(1.2, size=count), MAX_LINES)
+    line_order = np.repeat(np.arange(count), lines_per_order)
+    line_product = rng.choice(config.products, size=len(line_order), p=product_weights(config))
+    keys = np.unique(line_order.astype(np.int64) * config.products + line_product)
+    line_order, line_product = keys // config.products, keys % config.products
+    quantity = rng.geometric(0.65, size=len(line_order))
+    line_cents = prices[line_product] * quantity
+    items_count = np.bincount(line_order, minlength=count)
+    units_count = np.bincount(line_order, weights=quantity, minlength=count).astype(np.int64)
+    subtotal = np.bincount(line_order, weights=line_cents, minlength=count).astype(np.int64)
+    shipping = np.where(subtotal >= FREE_SHIPPING_CENTS, 0, SHIPPING_CENTS)
+
+    # Older orders have progressed further
+    age_days = (config.end_timestamp - seconds) / 86400
+    roll = rng.random(count)
+    status = np.select(
+        [roll < STATUS_CANCELLED, age_days < 1, age_days < 3, age_days < 7],
+        ['cancelled', 'pending', 'confirmed', 'shipped'],
+        'delivered',
+    )
+
+    created = _datetimes(seconds)
+    orders = []
+    for i in range(count):
+        order_id = int(order_ids[i])
+        details = customer_details(int(customers[i]))
+        orders.append(Order(
+            id=order_id,
+            order_number=order_number(int(seconds[i]) * 1000, order_id),
+            customer_id=int(customers[i]) + 1,
+            customer_email=details['email'],
+            customer_first_name=details['first_name'],
+            customer_last_name=details['last_name'],
+            shipping_address_line1=details['address_line1'],
+            shipping_city=details['city'],
+            shipping_state=details['state'],
+            shipping_zip_code=details['zip_code'],
+            shipping_country=details['country'],
+            subtotal=_money(subtotal[i]),
+            shipping_cost=_money(shipping[i]),
+            total_amount=_money(subtotal[i] + shipping[i]),
+            items_count=int(items_count[i]),
+            units_count=int(units_count[i]),
+            status=str(status[i]),
+            created_at=created[i],
+            updated_at=created[i],
+        ))
+
+    # Line ids are derived from the order id so reruns are identical
+    line_number = np.arange(len(line_order)) - np.repeat(np.cumsum(items_count) - items_count, items_count)
+    items = [
+        OrderItem(
+            id=int(order_ids[line_order[n]]) * MAX_LINES + int(line_number[n]),
+            order_id=int(order_ids[line_order[n]]),
+            product_id=int(line_product[n]) + 1,
+            quantity=int(quantity[n]),
+            unit_price=_money(prices[line_product[n]]),
+            total_price=_money(line_cents[n]),
+        )
+        for n in range(len(line_order))
+    ]
+
+    with transaction.atomic(), explicit_timestamps(Order):
+        Order.objects.bulk_create(orders, batch_size=batch_size)
+        OrderItem.objects.bulk_create(items, batch_size=batch_size)
+    return len(orders), len(items)
+
+
+def finish(config, batch_size=5000):
+    """Reset sequences and rebuild what signals would have maintained"""
+    _reset_sequences(Order, OrderItem)
+    # A day either side covers orders near midnight in the local time zone
+    rebuild_daily_sales(config.start_date - timedelta(days=1), config.end_date + timedelta(days=1))
+    for start in range(1, config.customers + 1, batch_size):
+        refresh_customer_metrics(Customer.objects.filter(pk__gte=start, pk__lt=start + batch_size))
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from .models import Category
+from .profiling import ProfiledSerializerMixin
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     product_count = serializers.ReadOnlyField()
 
     class Meta:
@@ -0,0 +1,12 @@
+"""
+Celery tasks for core
+"""
+from celery import shared_task
+
+from .metrics import refresh_business_metrics
+
+
+@shared_task
+def refresh_metrics_snapshot():
+    """Recount the business gauges exposed on /api/metrics/"""
+    return refresh_business_metrics()
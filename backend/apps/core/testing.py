@@ -0,0 +1,150 @@
+"""
+Test helpers: scaled fixtures and query budgets.
+
+seed_dataset(size) adds ``size`` products (each with images and tags),
+customers and orders (each with two lines) using bulk inserts, so a
+thousand of each takes about a second. Calling it again adds another
+batch, which lets a test compare the same endpoint at growing scales.
+
+QueryBudgetMixin.assertQueryBudget() fails when a block runs more queries
+than budgeted and lists the SQL fingerprints that ran, most frequent
+first, which points straight at an N+1.
+
+async_urlconf() builds the URLconf an ASGI deployment serves, with
+ASYNC_VIEWS, for use as ROOT_URLCONF.
+"""
+import functools
+import importlib
+import secrets
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from apps.customers.models import Customer
+from apps.orders.ids import generate_order_number
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product, ProductImage, ProductSpecification, ProductTag
+from .models import Category
+from .profiling import fingerprint
+
+
+def seed_dataset(size, categories=5):
+    """Bulk-create ``size`` products, customers and orders with their related rows"""
+    now = timezone.now()
+    prefix = secrets.token_hex(4)
+
+    category_rows = Category.objects.bulk_create(
+        Category(name=f'Category {prefix}-{i}', slug=f'category-{prefix}-{i}') for i in range(categories)
+    )
+    tags = ProductTag.objects.bulk_create(
+        ProductTag(name=f'Tag {prefix}-{i}', slug=f'tag-{prefix}-{i}') for i in range(3)
+    )
+
+    products = Product.objects.bulk_create(
+        Product(
+            name=f'Product {prefix}-{i}',
+            slug=f'product-{prefix}-{i}',
+            description='Seeded product',
+            price=Decimal(10 + i % 90),
+            original_price=Decimal(120) if i % 4 == 0 else None,
+            category=category_rows[i % categories],
+            brand=f'Brand {i % 7}',
+            stock_count=i % 50,
+            is_featured=i % 10 == 0,
+        )
+        for i in range(size)
+    )
+    ProductImage.objects.bulk_create(
+        ProductImage(product=product, image=f'products/{product.slug}-{n}.jpg', is_primary=n == 0, order=n)
+        for product in products for n in range(2)
+    )
+    ProductSpecification.objects.bulk_create(
+        ProductSpecification(product=product, name='Weight', value='1kg') for product in products
+    )
+    Product.tags.through.objects.bulk_create(
+        Product.tags.through(product_id=product.pk, producttag_id=tag.pk)
+        for product in products for tag in tags
+    )
+
+    customers = Customer.objects.bulk_create(
+        Customer(
+            email=f'customer-{prefix}-{i}@example.com',
+            first_name='Customer',
+            last_name=f'{prefix}-{i}',
+            total_orders=1,
+            total_spent=Decimal('30.00'),
+            last_order_date=now,
+        )
+        for i in range(size)
+    )
+    orders = Order.objects.bulk_create(
+        Order(
+            order_number=generate_order_number(),
+            customer=customer,
+            customer_email=customer.email,
+            customer_first_name=customer.first_name,
+            customer_last_name=customer.last_name,
+            shipping_address_line1='1 High Street',
+            shipping_city='Ipswich',
+            shipping_state='Suffolk',
+            shipping_zip_code='IP1 1AA',
+            subtotal=Decimal('30.00'),
+            total_amount=Decimal('30.00'),
+            items_count=2,
+            units_count=3,
+            status=Order.REVENUE_STATUSES[i % len(Order.REVENUE_STATUSES)],
+        )
+        for i, customer in enumerate(customers)
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(
+            order=order,
+            product=products[(i + n) % size],
+            quantity=n + 1,
+            unit_price=Decimal('10.00'),
+            total_price=Decimal(10 * (n + 1)),
+        )
+        for i, order in enumerate(orders) for n in range(2)
+    )
+    return {'categories': category_rows, 'products': products, 'customers': customers, 'orders': orders}
+
+
+def describe_queries(queries):
+    """Fingerprints of ``queries`` with counts, most frequent first"""
+    counts = Counter(fingerprint(query['sql']) for query in queries)
+    return '\n'.join(f'{count:4d} x {sql}' for sql, count in counts.most_common())
+
+
+class QueryBudgetMixin:
+    """Adds assertQueryBudget() to a TestCase"""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using='default', label=''):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        if len(context) > budget:
+            self.fail(
+                f'{label or "Block"} ran {len(context)} queries, budget is {budget}:\n'
+                f'{describe_queries(context.captured_queries)}'
+            )
+
+
+@functools.cache
+def async_urlconf(urlconf='ipswich_retail.urls'):
+    """``urlconf`` imported afresh with ASYNC_VIEWS, leaving the loaded modules alone"""
+    saved = {
+        name: module for name, module in sys.modules.items()
+        if name == urlconf or (name.startswith('apps.') and name.endswith('urls'))
+    }
+    for name in saved:
+        del sys.modules[name]
+    try:
+        with override_settings(ASYNC_VIEWS=True):
+            return importlib.import_module(urlconf)
+    finally:
+        sys.modules.update(saved)
@@ -1,13 +1,43 @@
 """
 Tests for core app
 """
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
-from rest_framework.test import APITestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
 from rest_framework import status
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db import connection
 
-from .models import Category
+from apps.customers.models import Customer
+from apps.orders.models import DailySalesSummary, Order, OrderItem
+from . import health, schema
+from .cache import aget_or_refresh, get_or_refresh
+from .management.commands.benchmark import compare, parse_mix, summarise
+from .management.commands.importtime import app_labels, by_app, packages, parse_importtime
+from .models import BootRecord, Category
+from .pagination import AdminPagination
+from .profiling import fingerprint
+from .search import search_customers, search_orders
+from .seeding import SeedConfig, product_weights
+from .tasks import refresh_metrics_snapshot
+from .testing import QueryBudgetMixin, async_urlconf, seed_dataset
+from .warmup import STEPS, warm_up
 
 
 class CategoryModelTest(TestCase):
@@ -115,8 +145,12 @@ class CategoryAPITest(APITestCase):
         self.assertEqual(response.data['results'][0]['name'], 'Electronics')
 
 
+@override_settings(HEALTH_CHECK_BACKGROUND=False)
 class HealthCheckAPITest(APITestCase):
-    """Test health check API endpoint"""
+    """Test health check API endpoints"""
+
+    def setUp(self):
+        health.monitor._result = None
     
     def test_health_check_endpoint(self):
         """Test health check endpoint returns healthy status"""
@@ -139,18 +173,46 @@ class HealthCheckAPITest(APITestCase):
         self.assertEqual(response.data['database'], 'connected')
         self.assertEqual(response.data['services']['database'], 'connected')
     
-    def test_health_check_system_info(self):
-        """Test health check includes system information"""
-        url = reverse('health-check')
-        response = self.client.get(url)
-        
+    def test_health_check_hides_configuration(self):
+        """Test health check no longer exposes settings or host details"""
+        response = self.client.get(reverse('health-check'))
+
+        self.assertNotIn('environment', response.data)
+        self.assertNotIn('system', response.data)
+
+    def test_liveness(self):
+        """Test the liveness probe does no database work"""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('health-live'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'status': 'alive'})
+
+    def test_readiness_is_cached(self):
+        """Test that repeated readiness probes reuse one round of checks"""
+        response = self.client.get(reverse('health-ready'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn('system', response.data)
-        self.assertIn('environment', response.data)
+        self.assertEqual(set(response.json()['checks']), {'database', 'cache', 'disk'})
+
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                self.client.get(reverse('health-ready'))
+
+    @override_settings(HEALTH_DISK_MIN_FREE_PERCENT=101)
+    def test_readiness_fails_below_threshold(self):
+        """Test that a failing check makes the instance unready"""
+        response = self.client.get(reverse('health-ready'))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(response.json()['checks']['disk']['ok'])
+        self.assertTrue(response.json()['checks']['database']['ok'])
 
 
 class MetricsAPITest(APITestCase):
     """Test metrics API endpoint"""
+
+    def setUp(self):
+        cache.clear()
     
     def test_metrics_endpoint(self):
         """Test metrics endpoint returns Prometheus format"""
@@ -158,14 +220,14 @@ class MetricsAPITest(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
         
         # Check that response contains metrics data
         metrics_text = response.content.decode('utf-8')
-        self.assertIn('application_info', metrics_text)
-        self.assertIn('products_total', metrics_text)
-        self.assertIn('orders_total', metrics_text)
-        self.assertIn('customers_total', metrics_text)
+        self.assertIn('ipswich_application_info{version="1.0.0"} 1.0', metrics_text)
+        self.assertIn('# TYPE ipswich_products gauge', metrics_text)
+        self.assertIn('# TYPE ipswich_orders gauge', metrics_text)
+        self.assertIn('# TYPE ipswich_customers gauge', metrics_text)
     
     def test_metrics_includes_product_counts(self):
         """Test metrics includes product-related counts"""
@@ -201,9 +263,718 @@ class MetricsAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         metrics_text = response.content.decode('utf-8')
         
-        self.assertIn('products_total 2', metrics_text)
-        self.assertIn('products_active 2', metrics_text)
-        self.assertIn('products_featured 1', metrics_text)
+        self.assertIn('ipswich_products{state="all"} 2.0', metrics_text)
+        self.assertIn('ipswich_products{state="active"} 2.0', metrics_text)
+        self.assertIn('ipswich_products{state="featured"} 1.0', metrics_text)
+
+    def test_business_gauges_are_not_counted_per_scrape(self):
+        """Test that scrapes read the cached snapshot until the task refreshes it"""
+        self.client.get(reverse('metrics'))
+        Category.objects.create(name='Unseen')
+        with self.assertNumQueries(0):
+            self.client.get(reverse('metrics'))
+
+        Customer.objects.create(email='new@example.com', first_name='New', last_name='Customer')
+        refresh_metrics_snapshot()
+        metrics_text = self.client.get(reverse('metrics')).content.decode('utf-8')
+        self.assertIn('ipswich_customers{status="active"} 1.0', metrics_text)
+
+    def test_request_metrics(self):
+        """Test that requests are recorded by route with their database queries"""
+        self.client.get(reverse('category-list'))
+        self.client.get('/api/no-such-page/')
+
+        metrics_text = self.client.get(reverse('metrics')).content.decode('utf-8')
+        self.assertIn(
+            'django_http_requests_total{method="GET",route="/api/categories/",status="200"}', metrics_text
+        )
+        self.assertIn('route="unmatched",status="404"', metrics_text)
+        self.assertIn('django_http_request_db_queries_count{route="/api/categories/"}', metrics_text)
+        self.assertIn('django_http_request_db_duration_seconds_bucket', metrics_text)
+        self.assertIn('ipswich_cache_lookups_total{cache="metrics",result="miss"}', metrics_text)
+
+
+class ProfilingMiddlewareTest(APITestCase):
+    """Test per-request profiling"""
+
+    def setUp(self):
+        cache.clear()
+        Category.objects.create(name='Electronics')
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+
+    @override_settings(PROFILING_SERVER_TIMING=False)
+    def test_server_timing_for_staff_only(self):
+        """Test that only staff users get the Server-Timing header by default"""
+        self.assertNotIn('Server-Timing', self.client.get(reverse('category-list')))
+
+        self.client.force_authenticate(user=self.staff)
+        header = self.client.get(reverse('category-list'))['Server-Timing']
+        names = [part.split(';')[0] for part in header.split(', ')]
+        self.assertEqual(names, ['db', 'cache', 'serialize', 'render', 'app', 'total'])
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="\d+ queries"')
+
+    @override_settings(PROFILING_SERVER_TIMING=True)
+    def test_serializer_time(self):
+        """Test that building serializer data is timed apart from the view"""
+        for index in range(20):
+            Category.objects.create(name=f'Category {index}')
+        header = self.client.get(reverse('category-list'))['Server-Timing']
+        timings = dict(re.findall(r'(\w+);dur=([\d.]+)', header))
+        self.assertGreater(float(timings['serialize']), 0)
+
+    @override_settings(PROFILING_SERVER_TIMING=True)
+    def test_server_timing_setting(self):
+        """Test that the setting sends Server-Timing to everyone"""
+        self.assertIn('Server-Timing', self.client.get(reverse('category-list')))
+
+    @override_settings(PROFILING_ENABLED=False, PROFILING_SERVER_TIMING=True)
+    def test_disabled(self):
+        """Test that disabling profiling removes the middleware"""
+        self.assertNotIn('Server-Timing', self.client.get(reverse('category-list')))
+
+    @override_settings(PROFILING_SLOW_REQUEST_MS=0)
+    def test_slow_request_log(self):
+        """Test that slow requests are logged with their top SQL fingerprints"""
+        with self.assertLogs('apps.profiling', 'WARNING') as logs:
+            self.client.get(reverse('category-list'))
+
+        entry = json.loads(logs.records[0].getMessage().split(' ', 2)[2])
+        self.assertEqual(entry['route'], '/api/categories/')
+        self.assertEqual(entry['queries'], sum(q['count'] for q in entry['topQueries']))
+        self.assertTrue(any('FROM "core_category"' in q['sql'] for q in entry['topQueries']))
+
+    def test_fingerprint(self):
+        """Test that literals and IN lists are collapsed"""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'x' AND b IN (1, 2, 3) AND c = %s"),
+            'SELECT * FROM t WHERE a = ? AND b IN (...) AND c = ?',
+        )
+
+
+@override_settings(HEALTH_CHECK_BACKGROUND=False)
+class AsyncViewsTest(TestCase):
+    """Test the async core views and async middleware"""
+
+    def setUp(self):
+        cache.clear()
+        health.monitor._result = None
+        for name in ('Garden', 'Kitchen', 'Lighting'):
+            Category.objects.create(name=name)
+
+    async def test_health_probes(self):
+        """Test liveness and readiness"""
+        with self.settings(ROOT_URLCONF=async_urlconf()):
+            live = await self.async_client.get(reverse('health-live'))
+            ready = await self.async_client.get(reverse('health-ready'))
+
+        self.assertEqual(live.json(), {'status': 'alive'})
+        self.assertEqual(ready.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(ready.json()['checks']), {'database', 'cache', 'disk'})
+
+    async def test_category_list(self):
+        """Test that categories match the DRF view, which still takes writes"""
+        expected = await sync_to_async(self.client.get)(reverse('category-list'), {'search': 'en'})
+        staff = await User.objects.acreate(username='staff', is_staff=True)
+        await sync_to_async(self.async_client.force_login)(staff)
+
+        with self.settings(ROOT_URLCONF=async_urlconf()):
+            response = await self.async_client.get(reverse('category-list'), {'search': 'en'})
+            created = await self.async_client.post(reverse('category-list'), {'name': 'Toys'})
+
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(PROFILING_SERVER_TIMING=True)
+    async def test_queries_profiled(self):
+        """Test that queries run by the async ORM reach the request profile"""
+        with self.settings(ROOT_URLCONF=async_urlconf()):
+            response = await self.async_client.get(reverse('category-list'))
+
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="2 queries"')
+
+
+class DashboardOverviewTest(TransactionTestCase):
+    """Test the dashboard overview"""
+
+    def setUp(self):
+        cache.clear()
+        seed_dataset(4)
+        self.admin_user = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+
+    def test_sync_and_async_agree(self):
+        """Test that the concurrent async overview matches the sync one"""
+        self.client.force_login(self.admin_user)
+        expected = self.client.get(reverse('admin-dashboard-overview'))
+        with self.settings(ROOT_URLCONF=async_urlconf()):
+            cache.clear()
+            response = self.client.get(reverse('admin-dashboard-overview'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(set(response.json()), {'orders', 'customers', 'catalogue'})
+        self.assertEqual(response.json()['catalogue']['totalProducts'], 4)
+
+    def test_admin_only(self):
+        """Test that the async overview refuses anonymous and non-staff users"""
+        user = User.objects.create_user(username='shopper', password='testpass123')
+        with self.settings(ROOT_URLCONF=async_urlconf()):
+            anonymous = self.client.get(reverse('admin-dashboard-overview'))
+            self.client.force_login(user)
+            shopper = self.client.get(reverse('admin-dashboard-overview'))
+
+        self.assertEqual(anonymous.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(anonymous.json(), {'detail': 'Authentication credentials were not provided.'})
+        self.assertEqual(shopper.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class QueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Test that every read endpoint stays within its query budget at any scale"""
+
+    # (url name, kwargs from the seeded rows, query params, budget, admin only)
+    ENDPOINTS = [
+        ('category-list', None, {}, 2, False),
+        ('category-detail', lambda d: {'pk': d['categories'][0].pk}, {}, 1, False),
+        ('product-list', None, {'page_size': '{n}'}, 5, False),
+        ('product-detail', lambda d: {'slug': d['products'][0].slug}, {}, 5, False),
+        ('order-list', None, {'page_size': '{n}'}, 2, False),
+        ('order-detail', lambda d: {'order_number': d['orders'][0].order_number}, {}, 6, False),
+        ('dashboard-stats', None, {}, 1, False),
+        ('customer-list', None, {'page_size': '{n}'}, 2, False),
+        ('customer-detail', lambda d: {'email': d['customers'][0].email}, {}, 1, False),
+        ('customer-stats', None, {}, 1, False),
+        ('admin-dashboard', None, {}, 1, True),
+        ('admin-dashboard-overview', None, {}, 3, True),
+        ('admin-analytics-timeseries', None, {'group_by': 'category'}, 1, True),
+        ('admin-product-list-create', None, {'pageSize': '{n}'}, 6, True),
+        ('admin-product-detail', lambda d: {'pk': d['products'][0].pk}, {}, 4, True),
+        ('admin-order-list', None, {'pageSize': '{n}'}, 3, True),
+        ('admin-order-detail', lambda d: {'order_number': d['orders'][0].order_number}, {}, 6, True),
+        ('admin-customer-list', None, {'pageSize': '{n}'}, 3, True),
+        ('admin-customer-detail', lambda d: {'email': d['customers'][0].email}, {}, 1, True),
+        ('admin-customer-stats', None, {}, 1, True),
+        ('metrics', None, {}, 3, False),
+        ('health-live', None, {}, 0, False),
+    ]
+
+    def setUp(self):
+        self.admin_user = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+
+    def request_queries(self, name, kwargs, params, budget, admin, page_size):
+        params = {key: value.format(n=page_size) for key, value in params.items()}
+        # Start cold so cached counts and stats do not hide queries
+        cache.clear()
+        self.client.force_authenticate(user=self.admin_user if admin else None)
+        with self.assertQueryBudget(budget, label=f'{name} (pageSize={page_size})') as context:
+            response = self.client.get(reverse(name, kwargs=kwargs), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, name)
+        return len(context)
+
+    def test_budgets_do_not_grow(self):
+        """Test budgets at 10, 100 and 1000 rows with small and full pages"""
+        counts = {}
+        for size in (10, 90, 900):
+            data = seed_dataset(size)
+            for name, kwargs, params, budget, admin in self.ENDPOINTS:
+                kwargs = kwargs(data) if kwargs else None
+                for page_size in (5, 100):
+                    with self.subTest(endpoint=name, rows=size, page_size=page_size):
+                        queries = self.request_queries(name, kwargs, params, budget, admin, page_size)
+                        counts.setdefault(name, set()).add(queries)
+
+        growing = {name: sorted(seen) for name, seen in counts.items() if len(seen) > 1}
+        self.assertEqual(growing, {}, 'Query counts changed with data size or page size')
+
+    def test_budget_failure_lists_fingerprints(self):
+        """Test that an exceeded budget names the repeated SQL"""
+        seed_dataset(3)
+        with self.assertRaises(AssertionError) as raised:
+            with self.assertQueryBudget(1):
+                for category in Category.objects.all():
+                    category.product_count
+
+        message = str(raised.exception)
+        self.assertIn('budget is 1', message)
+        self.assertIn('5 x SELECT COUNT(*) AS "__count" FROM "products_product" WHERE', message)
+
+
+class BenchmarkCommandTest(TestCase):
+    """Test benchmark result summaries and comparisons"""
+
+    def test_summary(self):
+        """Test percentiles, error counts and queries per request"""
+        samples = [('product_list', 0.010 * i, 200, 4, None) for i in range(1, 101)]
+        samples.append(('order_create', 0.2, 500, 10, None))
+
+        endpoints = summarise(samples, elapsed=2.0)
+        self.assertEqual(endpoints['product_list']['requests'], 100)
+        self.assertEqual(endpoints['product_list']['throughput'], 50.0)
+        self.assertAlmostEqual(endpoints['product_list']['p50_ms'], 505, places=0)
+        self.assertEqual(endpoints['product_list']['queries_per_request'], 4)
+        self.assertEqual(endpoints['order_create']['errors'], 1)
+
+    def test_compare_flags_regressions(self):
+        """Test that slower, lower-throughput or chattier endpoints are flagged"""
+        before = {'endpoints': {
+            'product_list': {'p95_ms': 100, 'throughput': 50, 'queries_per_request': 5},
+            'category_list': {'p95_ms': 10, 'throughput': 80, 'queries_per_request': 2},
+        }}
+        after = {'endpoints': {
+            'product_list': {'p95_ms': 130, 'throughput': 35, 'queries_per_request': 105},
+            'category_list': {'p95_ms': 11, 'throughput': 79, 'queries_per_request': 2},
+        }}
+
+        regressions = compare(after, before, threshold=20)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(message.startswith('product_list') for message in regressions))
+
+    def test_mix_validation(self):
+        """Test that the request mix can be reweighted but not misspelt"""
+        self.assertEqual(parse_mix('order_create=0')['order_create'], 0)
+        with self.assertRaises(CommandError):
+            parse_mix('checkout=5')
+
+
+class ImportTimeCommandTest(SimpleTestCase):
+    """Test the start-up import report"""
+
+    OUTPUT = '''import time: self [us] | cumulative | imported package
+import time:       900 |        900 |     numpy.core
+import time:       100 |       1000 |   numpy
+import time:        50 |       1050 | apps.orders.analytics
+import time:        20 |         20 | json
+'''
+
+    def test_imports_charged_to_closest_app(self):
+        """Test that a library is charged to the app that imported it"""
+        imports = parse_importtime(self.OUTPUT)
+
+        self.assertEqual(imports[0].importer, ('apps.orders.analytics', 'numpy'))
+        self.assertEqual(by_app(imports, app_labels()), {'orders': 1050, 'json': 20})
+        self.assertEqual(packages(imports), [
+            ('apps.orders.analytics', 1050, None), ('numpy', 1000, 'apps.orders.analytics'), ('json', 20, None),
+        ])
+
+    def test_budget(self):
+        """Test that a start-up over the budget fails the command"""
+        with self.assertRaisesMessage(CommandError, 'over the 1ms budget'):
+            call_command('importtime', repeat=1, budget=1, stdout=io.StringIO())
+
+
+class SeedDataCommandTest(TestCase):
+    """Test deterministic benchmark seeding"""
+
+    OPTIONS = {'products': 40, 'customers': 30, 'orders': 300, 'seed': 3, 'end_date': date(2026, 3, 31), 'days': 120}
+
+    def seed(self, **options):
+        call_command('seed_data', stdout=io.StringIO(), **{**self.OPTIONS, **options})
+        orders = list(Order.objects.order_by('pk').values_list(
+            'pk', 'order_number', 'customer_id', 'status', 'total_amount', 'items_count', 'created_at'
+        ))
+        items = list(OrderItem.objects.order_by('pk').values_list('pk', 'order_id', 'product_id', 'quantity', 'total_price'))
+        return orders, items
+
+    def test_same_seed_same_data(self):
+        """Test that reseeding with the same seed reproduces every row"""
+        first = self.seed()
+        self.assertEqual(first, self.seed(clear=True))
+        self.assertNotEqual(first, self.seed(clear=True, seed=4))
+
+    def test_orders_are_consistent(self):
+        """Test order totals, counters, rollup and customer metrics"""
+        orders, items = self.seed()
+        self.assertEqual(len(orders), 300)
+        order = Order.objects.with_items().get(pk=orders[0][0])
+        lines = list(order.items.all())
+        self.assertEqual(order.items_count, len(lines))
+        self.assertEqual(order.units_count, sum(line.quantity for line in lines))
+        self.assertEqual(order.subtotal, sum(line.total_price for line in lines))
+        self.assertEqual(order.total_amount, order.subtotal + order.shipping_cost)
+
+        self.assertEqual(sum(DailySalesSummary.objects.values_list('order_count', flat=True)), 300)
+        self.assertEqual(sum(Customer.objects.values_list('total_orders', flat=True)), 300)
+
+    def test_popularity_is_skewed(self):
+        """Test that a few products account for most of the purchase weight"""
+        weights = sorted(product_weights(SeedConfig(products=1000)), reverse=True)
+        self.assertGreater(sum(weights[:100]), 0.5)
+
+    def test_refuses_to_mix_with_existing_data(self):
+        """Test that seeding a non-empty database needs --clear"""
+        Category.objects.create(name='Existing')
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+@override_settings(OPENAPI_SCHEMA_LIVE=True)
+class BootCommandTest(TestCase):
+    """Test the boot management command"""
+
+    def boot(self, *args):
+        out = io.StringIO()
+        call_command('boot', *args, stdout=out)
+        return out.getvalue()
+
+    def test_first_boot_prepares_database(self):
+        """Test that a boot creates the admin user and sample data and records its fingerprint"""
+        output = self.boot()
+
+        self.assertIn('Booted in', output)
+        self.assertTrue(User.objects.filter(username='admin', is_superuser=True).exists())
+        self.assertTrue(Category.objects.exists())
+        self.assertEqual(BootRecord.objects.count(), 1)
+
+    def test_matching_fingerprint_skips_everything(self):
+        """Test that a repeat boot costs one query"""
+        self.boot()
+
+        with self.assertNumQueries(1):
+            output = self.boot()
+        self.assertIn('nothing to do', output)
+
+    def test_changed_fingerprint_boots_again(self):
+        """Test that a stale fingerprint, or --force, runs the steps again"""
+        self.boot()
+        BootRecord.objects.update(fingerprint='stale')
+
+        self.assertIn('Booted in', self.boot())
+        self.assertIn('Booted in', self.boot('--force'))
+
+    def test_without_sample_data(self):
+        """Test that --no-sample-data only creates the admin user"""
+        self.boot('--no-sample-data')
+
+        self.assertTrue(User.objects.filter(username='admin').exists())
+        self.assertFalse(Category.objects.exists())
+
+    def test_builds_missing_schema(self):
+        """Test that boot writes the OpenAPI schema file only when it is missing"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'openapi-schema.json'
+            with override_settings(OPENAPI_SCHEMA_FILE=str(path), OPENAPI_SCHEMA_LIVE=False):
+                self.boot('--no-sample-data')
+                self.assertIn('openapi', json.loads(path.read_bytes()))
+
+                path.write_text('{}')
+                self.boot('--no-sample-data')
+            self.assertEqual(path.read_text(), '{}')
+
+
+class GetOrRefreshTest(TestCase):
+    """Test single-flight cached values"""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_value_is_cached(self):
+        """Test that a fresh value is computed once"""
+        self.assertEqual(get_or_refresh('answer', self.compute, ttl=60), 1)
+        self.assertEqual(get_or_refresh('answer', self.compute, ttl=60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_served_during_refresh(self):
+        """Test that callers get the old value while another caller refreshes"""
+        get_or_refresh('answer', self.compute, ttl=0)
+        cache.add('answer:refresh', True)
+
+        self.assertEqual(get_or_refresh('answer', self.compute, ttl=0), 1)
+        self.assertEqual(self.calls, 1)
+
+        cache.delete('answer:refresh')
+        self.assertEqual(get_or_refresh('answer', self.compute, ttl=0), 2)
+
+    def test_async_shares_entries(self):
+        """Test that aget_or_refresh() reads and refreshes the same entries"""
+        get_or_refresh('answer', self.compute, ttl=60)
+        acompute = sync_to_async(self.compute)
+
+        self.assertEqual(async_to_sync(aget_or_refresh)('answer', acompute, ttl=60), 1)
+        cache.delete('answer')
+        self.assertEqual(async_to_sync(aget_or_refresh)('answer', acompute, ttl=60), 2)
+        self.assertEqual(get_or_refresh('answer', self.compute, ttl=60), 2)
+
+
+class WarmUpTest(TransactionTestCase):
+    """Test process warm-up"""
+
+    def test_runs_every_step_without_queries(self):
+        """Test that warm_up() times every step and never touches the database"""
+        with self.assertNumQueries(0):
+            timings = warm_up()
+
+        self.assertEqual(list(timings), [name for name, _ in STEPS])
+
+
+class GunicornConfigTest(SimpleTestCase):
+    """Test gunicorn.conf.py"""
+
+    SCRAPE = '''
+import runpy
+config = runpy.run_path('gunicorn.conf.py')
+config['on_starting'](None)
+
+import django
+django.setup()
+from django.test import Client
+from prometheus_client import CollectorRegistry, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+Client().get('/api/health/live/', HTTP_HOST='localhost')
+registry = CollectorRegistry()
+MultiProcessCollector(registry)
+print(generate_latest(registry).decode())
+'''
+
+    def test_requests_reach_the_multiprocess_scrape(self):
+        """Test that workers record into PROMETHEUS_MULTIPROC_DIR as the config sets it"""
+        with tempfile.TemporaryDirectory() as directory:
+            env = {key: value for key, value in os.environ.items() if key != 'PROMETHEUS_MULTIPROC_DIR'}
+            env.update(TMPDIR=directory, DJANGO_SETTINGS_MODULE='ipswich_retail.settings')
+            result = subprocess.run(
+                [sys.executable, '-c', self.SCRAPE], cwd=Path(__file__).resolve().parents[2],
+                env=env, capture_output=True, text=True,
+            )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('django_http_requests_total{', result.stdout)
+
+
+class AdminPaginationTest(APITestCase):
+    """Test the shared admin paginator"""
+
+    def setUp(self):
+        cache.clear()
+        for i in range(25):
+            Category.objects.create(name=f'Category {i}')
+        self.factory = APIRequestFactory()
+
+    def paginate(self, queryset=None, **params):
+        paginator = AdminPagination(results_key='categories')
+        request = Request(self.factory.get('/', params))
+        if queryset is None:
+            queryset = Category.objects.order_by('name')
+        page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response([c.name for c in page]).data
+
+    def test_meta(self):
+        """Test the meta block for a middle page"""
+        data = self.paginate(page=2, pageSize=10)
+        self.assertEqual(len(data['categories']), 10)
+        self.assertEqual(data['meta'], {
+            'page': 2, 'pageSize': 10, 'totalItems': 25, 'totalPages': 3,
+            'hasNext': True, 'hasPrevious': True,
+        })
+
+    def test_bad_values_are_clamped(self):
+        """Test that invalid or huge page parameters fall back to safe values"""
+        self.assertEqual(self.paginate(page='x', pageSize='-5')['meta']['pageSize'], 20)
+        self.assertEqual(self.paginate(pageSize=10 ** 9)['meta']['pageSize'], 100)
+        self.assertEqual(self.paginate(page=0)['meta']['page'], 1)
+
+    def test_count_is_cached(self):
+        """Test that the total is counted once per filter signature"""
+        self.paginate()
+        with self.assertNumQueries(1):
+            data = self.paginate(page=2, pageSize=5)
+        self.assertEqual(data['meta']['totalItems'], 25)
+
+    def test_empty_result_set(self):
+        """Test that a filter that can never match counts 0 without querying"""
+        with self.assertNumQueries(0):
+            data = self.paginate(Category.objects.filter(pk__in=[]))
+        self.assertEqual(data['categories'], [])
+        self.assertEqual(data['meta']['totalItems'], 0)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=10)
+    def test_estimated_count_for_large_tables(self):
+        """Test that unfiltered lists of large tables use the row estimate"""
+        meta = self.paginate()['meta']
+        self.assertTrue(meta['totalIsEstimate'])
+        self.assertGreaterEqual(meta['totalItems'], 25)
+
+
+class SearchTest(TestCase):
+    """Test indexed order and customer search"""
+
+    def setUp(self):
+        from apps.customers.models import Customer
+        from apps.orders.models import Order
+
+        self.Order = Order
+        names = [('Alice', 'Smith'), ('Bob', 'Jones'), ('Carol', 'Smithers'), ('Dan', 'Brown')]
+        self.orders = []
+        for first, last in names:
+            self.orders.append(Order.objects.create(
+                customer_email=f'{first.lower()}@example.com', customer_first_name=first,
+                customer_last_name=last, shipping_address_line1='1 High Street', shipping_city='Ipswich',
+                shipping_state='Suffolk', shipping_zip_code='IP1 1AA', subtotal=10, total_amount=10
+            ))
+            Customer.objects.create(
+                email=f'{first.lower()}@example.com', first_name=first, last_name=last, phone='01473 000000'
+            )
+        self.Customer = Customer
+
+    def names(self, queryset):
+        return sorted(queryset.values_list('customer_first_name', flat=True))
+
+    def test_substring_search_matches_icontains(self):
+        """Test that indexed substring search finds what icontains finds"""
+        for term in ['smith', 'MITH', 'example', 'ol', 'nobody']:
+            expected = self.Order.objects.filter(customer_last_name__icontains=term) | \
+                self.Order.objects.filter(customer_email__icontains=term) | \
+                self.Order.objects.filter(customer_first_name__icontains=term)
+            self.assertEqual(self.names(search_orders(self.Order.objects.all(), term)), self.names(expected), term)
+
+    def test_substring_search_uses_index_on_sqlite(self):
+        """Test that SQLite searches go through the FTS5 trigram table"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        sql = str(search_orders(self.Order.objects.all(), 'smith').query)
+        self.assertIn('orders_order_search', sql)
+
+    def test_order_number_prefix(self):
+        """Test the order number fast path"""
+        order = self.orders[0]
+        results = search_orders(self.Order.objects.all(), order.order_number[:10].lower())
+        self.assertIn(order, results)
+        self.assertEqual(list(search_orders(self.Order.objects.all(), order.order_number)), [order])
+
+    def test_email_prefix(self):
+        """Test the e-mail fast path"""
+        self.assertEqual(self.names(search_orders(self.Order.objects.all(), 'bob@ex')), ['Bob'])
+        customers = search_customers(self.Customer.objects.all(), 'carol@')
+        self.assertEqual(list(customers.values_list('first_name', flat=True)), ['Carol'])
+
+    def test_email_search_ignores_case(self):
+        """Test that e-mail prefixes match whatever the case of the term"""
+        self.assertEqual(self.names(search_orders(self.Order.objects.all(), 'Bob@Example.COM')), ['Bob'])
+        customers = search_customers(self.Customer.objects.all(), 'CAROL@ex')
+        self.assertEqual(list(customers.values_list('first_name', flat=True)), ['Carol'])
+
+    def test_email_domain_search(self):
+        """Test that domain-only terms match anywhere in the address"""
+        self.orders[1].customer_email = 'bob@gmail.com'
+        self.orders[1].save()
+        for term in ['@gmail.com', '@GMAIL', 'gmail.com']:
+            self.assertEqual(self.names(search_orders(self.Order.objects.all(), term)), ['Bob'], term)
+        customers = search_customers(self.Customer.objects.all(), '@example.com')
+        self.assertEqual(customers.count(), 4)
+
+    def test_email_prefix_uses_index_on_sqlite(self):
+        """Test that SQLite answers e-mail prefixes from the LOWER(email) index"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        queryset = search_orders(self.Order.objects.all(), 'Bob@ex')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('orders_order_email_lower_idx', plan)
+
+    def test_index_follows_updates(self):
+        """Test that renamed and deleted rows are reflected in search"""
+        order = self.orders[3]
+        order.customer_last_name = 'Greenwood'
+        order.save()
+        self.orders[1].delete()
+
+        self.assertEqual(self.names(search_orders(self.Order.objects.all(), 'green')), ['Dan'])
+        self.assertEqual(self.names(search_orders(self.Order.objects.all(), 'brown')), [])
+        self.assertEqual(self.names(search_orders(self.Order.objects.all(), 'jones')), [])
+
+    def test_customer_search(self):
+        """Test customer substring search"""
+        customers = search_customers(self.Customer.objects.all(), 'SMITH')
+        self.assertEqual(sorted(customers.values_list('first_name', flat=True)), ['Alice', 'Carol'])
+
+
+class SchemaViewTest(APITestCase):
+    """Test the prebuilt OpenAPI schema"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.directory.name) / 'openapi-schema.json'
+        call_command('build_schema', output=cls.path, stdout=io.StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        schema.load.cache_clear()
+        schema.render.cache_clear()
+        self.addCleanup(schema.load.cache_clear)
+        self.addCleanup(schema.render.cache_clear)
+        settings = override_settings(OPENAPI_SCHEMA_FILE=str(self.path), OPENAPI_SCHEMA_LIVE=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_serves_built_schema_with_etag(self):
+        """Test that the built file is served with an ETag, and a matching ETag gets a 304"""
+        response = self.client.get(reverse('schema'), {'format': 'json'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), json.loads(self.path.read_bytes()))
+
+        response = self.client.get(reverse('schema'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response['ETag']
+        response = self.client.get(reverse('schema'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_gzip(self):
+        """Test that clients accepting gzip get the same schema compressed"""
+        plain = self.client.get(reverse('schema'))
+        compressed = self.client.get(reverse('schema'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+
+    def test_gzip_refused(self):
+        """Test that gzip;q=0 and other encodings get the plain body"""
+        for accept_encoding in ['gzip;q=0, deflate', 'GZIP; q=0.0', 'br', '*;q=0', 'identity']:
+            response = self.client.get(reverse('schema'), HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertNotIn('Content-Encoding', response, accept_encoding)
+        response = self.client.get(reverse('schema'), HTTP_ACCEPT_ENCODING='br;q=1.0, *;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_build_if_missing(self):
+        """Test that --if-missing leaves an existing file alone"""
+        path = Path(self.directory.name) / 'if-missing.json'
+        call_command('build_schema', output=path, if_missing=True, stdout=io.StringIO())
+        self.assertEqual(json.loads(path.read_bytes()), json.loads(self.path.read_bytes()))
+
+        path.write_text('{}')
+        call_command('build_schema', output=path, if_missing=True, stdout=io.StringIO())
+        self.assertEqual(path.read_text(), '{}')
+
+    def test_generated_once_without_file(self):
+        """Test that without the file the schema is generated on first use only"""
+        with override_settings(OPENAPI_SCHEMA_FILE=str(self.path.with_name('missing.json'))):
+            with self.assertLogs('apps.core.schema', 'WARNING'):
+                first = self.client.get(reverse('schema'))
+            second = self.client.get(reverse('schema'))
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    @override_settings(OPENAPI_SCHEMA_LIVE=True)
+    def test_live_schema(self):
+        """Test that OPENAPI_SCHEMA_LIVE generates the schema per request"""
+        response = self.client.get(reverse('schema'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
 
 
 class APIRootTest(APITestCase):
@@ -1,10 +1,20 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_VIEWS:
+    from . import async_views
+
+    liveness, readiness, category_list = async_views.liveness, async_views.readiness, async_views.category_list
+else:
+    liveness, readiness, category_list = views.liveness, views.readiness, views.CategoryListCreateView.as_view()
+
 urlpatterns = [
     path('', views.api_root, name='api-root'),
     path('health/', views.health_check, name='health-check'),
+    path('health/live/', liveness, name='health-live'),
+    path('health/ready/', readiness, name='health-ready'),
     path('metrics/', views.metrics, name='metrics'),
-    path('categories/', views.CategoryListCreateView.as_view(), name='category-list'),
+    path('categories/', category_list, name='category-list'),
     path('categories/<int:pk>/', views.CategoryDetailView.as_view(), name='category-detail'),
 ]
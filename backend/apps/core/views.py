@@ -1,12 +1,11 @@
 from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.http import JsonResponse
-from django.db import connection
-from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 import datetime
-import psutil
-import os
+from prometheus_client import CONTENT_TYPE_LATEST
+from . import health
+from .metrics import render_metrics
 from .models import Category
 from .serializers import CategorySerializer
 
@@ -30,40 +29,35 @@ def api_root(request):
     })
 
 
+def liveness(request):
+    """
+    Liveness probe: answers as long as the process can serve requests.
+    Does no I/O.
+    """
+    return JsonResponse({'status': 'alive'})
+
+
+def readiness(request):
+    """
+    Readiness probe: the latest background database, cache and disk checks
+    (see apps.core.health). 503 when any check fails.
+    """
+    result = health.monitor.get()
+    return JsonResponse(result, status=200 if result['ready'] else 503)
+
+
 @api_view(['GET'])
 def health_check(request):
     """
-    Comprehensive health check endpoint for monitoring and deployment.
+    Health summary for monitoring and deployment, read from the cached
+    readiness checks.
     """
-    try:
-        # Test database connection
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            db_status = "connected"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-    
-    # Get system information
-    try:
-        memory_info = psutil.virtual_memory()
-        disk_info = psutil.disk_usage('/')
-        system_info = {
-            'memory': {
-                'total': memory_info.total,
-                'available': memory_info.available,
-                'percent': memory_info.percent
-            },
-            'disk': {
-                'total': disk_info.total,
-                'free': disk_info.free,
-                'percent': (disk_info.used / disk_info.total) * 100
-            }
-        }
-    except Exception:
-        system_info = None
-    
+    result = health.monitor.get()
+    database = result['checks'].get('database', {})
+    db_status = 'connected' if database.get('ok') else 'error'
+
     return Response({
-        'status': 'healthy',
+        'status': 'healthy' if result['ready'] else 'unhealthy',
         'version': '1.0.0',
         'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
         'database': db_status,
@@ -71,61 +65,19 @@ def health_check(request):
             'django': 'running',
             'database': db_status,
         },
-        'system': system_info,
-        'environment': {
-            'debug': settings.DEBUG,
-            'allowed_hosts': settings.ALLOWED_HOSTS,
-        }
-    })
+        'checks': result['checks'],
+    }, status=status.HTTP_200_OK if result['ready'] else status.HTTP_503_SERVICE_UNAVAILABLE)
 
 
-@api_view(['GET'])
 def metrics(request):
     """
-    Prometheus-style metrics endpoint for monitoring.
+    Prometheus metrics endpoint for monitoring (see apps.core.metrics).
     """
-    try:
-        # Basic application metrics
-        from apps.products.models import Product
-        from apps.orders.models import Order
-        from apps.customers.models import Customer
-        
-        metrics_data = {
-            'application_info{version="1.0.0"}': 1,
-            'products_total': Product.objects.count(),
-            'products_active': Product.objects.filter(is_active=True).count(),
-            'products_featured': Product.objects.filter(is_featured=True).count(),
-            'orders_total': Order.objects.count(),
-            'customers_total': Customer.objects.count(),
-        }
-        
-        # Add system metrics if available
-        try:
-            memory_info = psutil.virtual_memory()
-            metrics_data.update({
-                'system_memory_usage_bytes': memory_info.used,
-                'system_memory_total_bytes': memory_info.total,
-                'system_memory_usage_percent': memory_info.percent,
-            })
-        except Exception:
-            pass
-        
-        # Format as Prometheus metrics
-        metrics_text = ""
-        for metric, value in metrics_data.items():
-            metrics_text += f"{metric} {value}\n"
-        
-        return Response(metrics_text, content_type='text/plain')
-        
-    except Exception as e:
-        return Response({
-            'error': 'Failed to collect metrics',
-            'message': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
 
 
 class CategoryListCreateView(generics.ListCreateAPIView):
-    queryset = Category.objects.filter(is_active=True)
+    queryset = Category.objects.with_product_count().filter(is_active=True)
     serializer_class = CategorySerializer
     filterset_fields = ['name', 'is_active']
     search_fields = ['name', 'description']
@@ -134,6 +86,6 @@ class CategoryListCreateView(generics.ListCreateAPIView):
 
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Category.objects.all()
+    queryset = Category.objects.with_product_count()
     serializer_class = CategorySerializer
     lookup_field = 'pk'
@@ -0,0 +1,107 @@
+"""
+Process warm-up.
+
+warm_up() does the one-off setup that Django and DRF otherwise leave to the
+first requests a process serves:
+- it imports every app's views, serializers, tasks and receivers, and the
+  libraries they import on first use
+- it builds the URL resolver, compiling every pattern
+- it fills the model metadata caches
+- it loads the DRF classes named in settings
+- it loads the session, authentication, message and SQL compiler backends
+- it loads the translation catalogue
+- it renders the OpenAPI schema (apps.core.schema), unless it is generated
+  per request
+
+gunicorn.conf.py calls it in the master before forking when the app is
+preloaded, so every worker inherits the result, and in each worker
+otherwise.
+
+It reads nothing from the database or the cache and closes any database
+connection it opened, so workers inherit no sockets.
+"""
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_backends
+from django.db import connections
+from django.urls import get_resolver
+from django.utils import translation
+from django.utils.module_loading import autodiscover_modules, import_string
+from rest_framework.settings import api_settings
+
+
+MODULES = ('views', 'admin_views', 'async_views', 'serializers', 'tasks', 'receivers')
+
+# Imported lazily to keep start-up fast (see manage.py importtime); loaded
+# here so that preloaded workers share them instead of each importing them
+LAZY_MODULES = ('numpy', 'drf_spectacular.views', 'apps.core.schema')
+
+
+def import_modules():
+    autodiscover_modules(*MODULES)
+    for name in LAZY_MODULES:
+        import_module(name)
+
+
+def build_url_resolver():
+    resolver = get_resolver()
+    # Populating the reverse lookups compiles every pattern on the way
+    resolver.reverse_dict
+
+
+def fill_model_caches():
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+
+def load_api_settings():
+    for name in api_settings.defaults:
+        getattr(api_settings, name)
+
+
+def load_backends():
+    import_module(settings.SESSION_ENGINE)
+    import_string(settings.MESSAGE_STORAGE)
+    get_backends()
+    for connection in connections.all():
+        # Imports the compiler module; does not connect
+        connection.ops.compiler('SQLCompiler')
+
+
+def load_translations():
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('')
+
+
+def render_schema():
+    if not settings.OPENAPI_SCHEMA_LIVE:
+        from .schema import preload
+
+        preload()
+
+
+STEPS = (
+    ('modules', import_modules),
+    ('urls', build_url_resolver),
+    ('models', fill_model_caches),
+    ('rest_framework', load_api_settings),
+    ('backends', load_backends),
+    ('translations', load_translations),
+    ('schema', render_schema),
+)
+
+
+def warm_up():
+    """Run every step; returns the seconds each took"""
+    timings = {}
+    try:
+        for name, step in STEPS:
+            start = time.perf_counter()
+            step()
+            timings[name] = time.perf_counter() - start
+    finally:
+        connections.close_all()
+    return timings
@@ -6,11 +6,14 @@ from .models import Customer
 class CustomerAdmin(admin.ModelAdmin):
     list_display = [
         'email', 'first_name', 'last_name', 'status', 'total_orders',
-        'total_spent', 'is_verified', 'created_at'
+        'total_spent', 'segment', 'is_verified', 'created_at'
     ]
-    list_filter = ['status', 'is_verified', 'marketing_consent', 'created_at']
+    list_filter = ['status', 'segment', 'is_verified', 'marketing_consent', 'created_at']
     search_fields = ['email', 'first_name', 'last_name', 'phone']
-    readonly_fields = ['created_at', 'updated_at', 'total_orders', 'total_spent', 'last_order_date']
+    readonly_fields = [
+        'created_at', 'updated_at', 'total_orders', 'total_spent', 'last_order_date',
+        'segment', 'recency_score', 'frequency_score', 'monetary_score', 'segmented_at'
+    ]
     
     fieldsets = (
         ('Basic Information', {
@@ -25,7 +28,10 @@ class CustomerAdmin(admin.ModelAdmin):
             'fields': ('status', 'is_verified', 'marketing_consent')
         }),
         ('Statistics', {
-            'fields': ('total_orders', 'total_spent', 'last_order_date'),
+            'fields': (
+                'total_orders', 'total_spent', 'last_order_date',
+                'segment', 'recency_score', 'frequency_score', 'monetary_score', 'segmented_at'
+            ),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -4,6 +4,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db.models import Q, Count, Avg
 from apps.authentication.permissions import IsAdminUser
+from apps.core.pagination import AdminPagination
+from apps.core.search import search_customers
+from .metrics import get_customer_stats
 from .models import Customer
 from .serializers import CustomerSerializer, CustomerListSerializer
 
@@ -19,38 +22,22 @@ def admin_customer_list(request):
     # Search functionality
     search = request.GET.get('search')
     if search:
-        queryset = queryset.filter(
-            Q(email__icontains=search) |
-            Q(first_name__icontains=search) |
-            Q(last_name__icontains=search) |
-            Q(phone__icontains=search)
-        )
+        queryset = search_customers(queryset, search)
     
     # Status filter
     status = request.GET.get('status')
     if status:
         queryset = queryset.filter(status=status)
+
+    # RFM segment filter
+    segment = request.GET.get('segment')
+    if segment:
+        queryset = queryset.filter(segment=segment)
     
-    # Pagination
-    page = int(request.GET.get('page', 1))
-    page_size = int(request.GET.get('pageSize', 20))
-    start = (page - 1) * page_size
-    end = start + page_size
-    
-    paginated_queryset = queryset[start:end]
-    serializer = CustomerListSerializer(paginated_queryset, many=True)
-    
-    return Response({
-        'customers': serializer.data,
-        'meta': {
-            'page': page,
-            'pageSize': page_size,
-            'totalItems': queryset.count(),
-            'totalPages': (queryset.count() + page_size - 1) // page_size,
-            'hasNext': end < queryset.count(),
-            'hasPrevious': page > 1,
-        }
-    })
+    paginator = AdminPagination(results_key='customers')
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = CustomerListSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 class AdminCustomerDetailView(generics.RetrieveAPIView):
@@ -66,18 +53,4 @@ def customer_stats(request):
     """
     Get customer statistics for admin panel
     """
-    total_customers = Customer.objects.count()
-    active_customers = Customer.objects.filter(status='active').count()
-    vip_customers = Customer.objects.filter(status='vip').count()
-    
-    # Calculate average order value per customer
-    customers = Customer.objects.all()
-    total_spent = sum(customer.total_spent for customer in customers)
-    avg_order_value = total_spent / total_customers if total_customers > 0 else 0
-
-    return Response({
-        'totalCustomers': total_customers,
-        'activeCustomers': active_customers,
-        'vipCustomers': vip_customers,
-        'avgOrderValue': float(avg_order_value)
-    })
+    return Response(get_customer_stats())
@@ -0,0 +1,36 @@
+"""
+Management command to recalculate customer lifetime metrics from orders.
+
+Customers are updated in primary key batches, one UPDATE per batch, so the
+command can run against a live database.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.customers.metrics import refresh_customer_metrics
+from apps.customers.models import Customer
+
+
+class Command(BaseCommand):
+    help = 'Recalculate total_orders, total_spent and last_order_date for every customer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Customers updated per statement')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        last_pk = Customer.objects.order_by('-pk').values_list('pk', flat=True).first()
+        if last_pk is None:
+            self.stdout.write('No customers to update')
+            return
+
+        updated = 0
+        for start in range(0, last_pk + 1, batch_size):
+            updated += refresh_customer_metrics(
+                Customer.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+            )
+            self.stdout.write(f'Updated {updated} customers (up to id {min(start + batch_size - 1, last_pk)})')
+
+        self.stdout.write(self.style.SUCCESS(f'Recalculated metrics for {updated} customers'))
@@ -0,0 +1,58 @@
+"""
+Lifetime order metrics stored on Customer.
+
+total_orders counts every order linked to the customer (Order.customer),
+total_spent sums the orders in Order.REVENUE_STATUSES and last_order_date
+is the newest order's creation time. refresh_customer_metrics()
+recalculates them from the orders table; the order pipeline
+(apps.orders.tasks.refresh_customer) calls it shortly after each of a
+customer's orders changes.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Avg, Count, DecimalField, Max, OuterRef, Q, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce
+
+from apps.orders.models import Order
+from .models import Customer
+
+
+def link_guest_orders(customer):
+    """Attach orders placed with the customer's e-mail before the customer existed"""
+    return Order.objects.filter(customer_email=customer.email, customer__isnull=True).update(customer=customer)
+
+
+def refresh_customer_metrics(customers=None):
+    """Recalculate metrics for ``customers`` (a queryset, default all) in one UPDATE"""
+    customers = Customer.objects.all() if customers is None else customers
+    orders = Order.objects.filter(customer=OuterRef('pk')).order_by().values('customer')
+    return customers.update(
+        total_orders=Coalesce(Subquery(orders.annotate(n=Count('id')).values('n')), 0),
+        total_spent=Coalesce(
+            Subquery(
+                orders.filter(status__in=Order.REVENUE_STATUSES)
+                .annotate(total=Sum('total_amount')).values('total')
+            ),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+        last_order_date=Subquery(orders.annotate(last=Max('created_at')).values('last')),
+    )
+
+
+def get_customer_stats():
+    """Customer counts and average lifetime spend, in one query"""
+    stats = Customer.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        vip=Count('id', filter=Q(status='vip')),
+        avg_spent=Avg('total_spent'),
+    )
+    return {
+        'totalCustomers': stats['total'],
+        'activeCustomers': stats['active'],
+        'vipCustomers': stats['vip'],
+        'avgOrderValue': float(stats['avg_spent'] or 0),
+    }
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:46
+
+from django.db import migrations
+
+from apps.core.search import create_search_index, drop_search_index
+
+
+SEARCH_COLUMNS = ['email', 'first_name', 'last_name', 'phone']
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor, 'customers_customer', SEARCH_COLUMNS)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor, 'customers_customer', SEARCH_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
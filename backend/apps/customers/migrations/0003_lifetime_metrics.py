@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:27
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+from apps.core.search import restore_search_index
+
+
+SEARCH_COLUMNS = ['email', 'first_name', 'last_name', 'phone']
+
+
+def restore_index(apps, schema_editor):
+    # Adding columns rebuilds the table on SQLite, which drops the search triggers
+    restore_search_index(schema_editor, 'customers_customer', SEARCH_COLUMNS)
+
+
+def backfill_lifetime_metrics(apps, schema_editor):
+    Customer = apps.get_model('customers', 'Customer')
+    Order = apps.get_model('orders', 'Order')
+    orders = Order.objects.filter(customer_email=models.OuterRef('email')).order_by().values('customer_email')
+    Customer.objects.update(
+        total_orders=Coalesce(models.Subquery(orders.annotate(n=models.Count('id')).values('n')), 0),
+        total_spent=Coalesce(
+            models.Subquery(
+                orders.filter(status__in=['confirmed', 'shipped', 'delivered'])
+                .annotate(total=models.Sum('total_amount')).values('total')
+            ),
+            models.Value(Decimal('0')),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+        last_order_date=models.Subquery(orders.annotate(last=models.Max('created_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_search_index'),
+        ('orders', '0006_dailysalessummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_index),
+        migrations.AddField(
+            model_name='customer',
+            name='last_order_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='total_orders',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='total_spent',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_lifetime_metrics, migrations.RunPython.noop),
+        migrations.RunPython(restore_index, migrations.RunPython.noop),
+    ]
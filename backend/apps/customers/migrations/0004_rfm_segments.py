@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:34
+
+from django.db import migrations, models
+
+from apps.core.search import restore_search_index
+
+
+SEARCH_COLUMNS = ['email', 'first_name', 'last_name', 'phone']
+
+
+def restore_index(apps, schema_editor):
+    # Adding columns rebuilds the table on SQLite, which drops the search triggers
+    restore_search_index(schema_editor, 'customers_customer', SEARCH_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_lifetime_metrics'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_index),
+        migrations.AddField(
+            model_name='customer',
+            name='frequency_score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='monetary_score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='recency_score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='segment',
+            field=models.CharField(blank=True, choices=[('champions', 'Champions'), ('loyal', 'Loyal'), ('big_spenders', 'Big Spenders'), ('new', 'New Customers'), ('promising', 'Promising'), ('needs_attention', 'Needs Attention'), ('at_risk', 'At Risk'), ('hibernating', 'Hibernating'), ('prospect', 'Prospect')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='segmented_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['segment', '-created_at'], name='customers_segment_idx'),
+        ),
+        migrations.RunPython(restore_index, migrations.RunPython.noop),
+    ]
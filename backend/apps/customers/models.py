@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 
 
@@ -8,6 +9,17 @@ class Customer(models.Model):
         ('inactive', 'Inactive'),
         ('vip', 'VIP'),
     ]
+    SEGMENT_CHOICES = [
+        ('champions', 'Champions'),
+        ('loyal', 'Loyal'),
+        ('big_spenders', 'Big Spenders'),
+        ('new', 'New Customers'),
+        ('promising', 'Promising'),
+        ('needs_attention', 'Needs Attention'),
+        ('at_risk', 'At Risk'),
+        ('hibernating', 'Hibernating'),
+        ('prospect', 'Prospect'),
+    ]
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
     email = models.EmailField(unique=True)
@@ -27,6 +39,18 @@ class Customer(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     is_verified = models.BooleanField(default=False)
     marketing_consent = models.BooleanField(default=False)
+
+    # Lifetime order metrics, kept current by apps.customers.metrics
+    total_orders = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_order_date = models.DateTimeField(null=True, blank=True)
+
+    # RFM segmentation, written by apps.customers.segmentation (1-5, higher is better)
+    recency_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    frequency_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    monetary_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    segment = models.CharField(max_length=20, choices=SEGMENT_CHOICES, blank=True)
+    segmented_at = models.DateTimeField(null=True, blank=True)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -34,6 +58,10 @@ class Customer(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['segment', '-created_at'], name='customers_segment_idx'),
+            models.Index(Lower('email'), name='customers_email_lower_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
@@ -41,24 +69,3 @@ class Customer(models.Model):
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
-
-    @property
-    def total_orders(self):
-        from apps.orders.models import Order
-        return Order.objects.filter(customer_email=self.email).count()
-
-    @property
-    def total_spent(self):
-        from apps.orders.models import Order
-        from django.db.models import Sum
-        total = Order.objects.filter(
-            customer_email=self.email,
-            status__in=['confirmed', 'shipped', 'delivered']
-        ).aggregate(total=Sum('total_amount'))['total']
-        return total or 0
-
-    @property
-    def last_order_date(self):
-        from apps.orders.models import Order
-        last_order = Order.objects.filter(customer_email=self.email).order_by('-created_at').first()
-        return last_order.created_at if last_order else None
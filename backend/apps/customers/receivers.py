@@ -0,0 +1,19 @@
+"""
+Keep customer lifetime metrics in step with their orders.
+
+Order changes are picked up by the order pipeline (apps.orders.tasks).
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .metrics import link_guest_orders, refresh_customer_metrics
+from .models import Customer
+
+
+@receiver(post_save, sender=Customer)
+def load_existing_orders(sender, instance, created, raw=False, **kwargs):
+    # Customers can be created after they have already ordered as a guest
+    if created and not raw:
+        link_guest_orders(instance)
+        refresh_customer_metrics(Customer.objects.filter(pk=instance.pk))
+        instance.refresh_from_db(fields=['total_orders', 'total_spent', 'last_order_date'])
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from apps.core.profiling import ProfiledSerializerMixin
 from .models import Customer
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     total_orders = serializers.ReadOnlyField()
     total_spent = serializers.ReadOnlyField()
     last_order_date = serializers.ReadOnlyField()
@@ -14,12 +15,15 @@ class CustomerSerializer(serializers.ModelSerializer):
             'id', 'email', 'first_name', 'last_name', 'full_name', 'phone',
             'address_line1', 'address_line2', 'city', 'state', 'zip_code', 'country',
             'status', 'is_verified', 'marketing_consent', 'total_orders', 'total_spent',
-            'last_order_date', 'created_at', 'updated_at'
+            'last_order_date', 'segment', 'recency_score', 'frequency_score', 'monetary_score',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'segment', 'recency_score', 'frequency_score', 'monetary_score', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
 
 
-class CustomerListSerializer(serializers.ModelSerializer):
+class CustomerListSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     total_orders = serializers.ReadOnlyField()
     total_spent = serializers.ReadOnlyField()
     full_name = serializers.ReadOnlyField()
@@ -28,5 +32,5 @@ class CustomerListSerializer(serializers.ModelSerializer):
         model = Customer
         fields = [
             'id', 'email', 'first_name', 'last_name', 'full_name', 'phone',
-            'status', 'total_orders', 'total_spent', 'created_at'
+            'status', 'segment', 'total_orders', 'total_spent', 'created_at'
         ]
@@ -0,0 +1,14 @@
+"""
+Celery tasks for customers
+"""
+from celery import shared_task
+
+
+@shared_task
+def refresh_customer_segments():
+    """Nightly RFM segmentation of the whole customer base"""
+    # Imported here so that web workers, which load every tasks module,
+    # do not load NumPy at start-up
+    from .segmentation import segment_customers
+
+    return segment_customers()
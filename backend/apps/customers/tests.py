@@ -0,0 +1,189 @@
+"""
+Tests for customers app
+"""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.orders.models import Order
+from .models import Customer
+from .segmentation import quantile_scores, segment_customers
+
+
+def create_order(email='jane@example.com', **overrides):
+    fields = {
+        'customer_email': email,
+        'customer_first_name': 'Jane',
+        'customer_last_name': 'Doe',
+        'shipping_address_line1': '1 High Street',
+        'shipping_city': 'Ipswich',
+        'shipping_state': 'Suffolk',
+        'shipping_zip_code': 'IP1 1AA',
+        'subtotal': Decimal('10.00'),
+        'total_amount': Decimal('10.00'),
+    }
+    fields.update(overrides)
+    return Order.objects.create(**fields)
+
+
+class CustomerMetricsTest(TestCase):
+    """Test stored customer lifetime metrics"""
+
+    def setUp(self):
+        self.customer = Customer.objects.create(email='jane@example.com', first_name='Jane', last_name='Doe')
+
+    def test_metrics_follow_orders(self):
+        """Test that new orders, status changes and deletions update the metrics once committed"""
+        with self.captureOnCommitCallbacks(execute=True):
+            first = create_order(total_amount=Decimal('25.00'))
+            second = create_order(total_amount=Decimal('40.00'), status='confirmed')
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_orders, 2)
+        self.assertEqual(self.customer.total_spent, Decimal('40.00'))
+        self.assertEqual(self.customer.last_order_date, second.created_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.status = 'shipped'
+            first.save()
+            second.status = 'cancelled'
+            second.save()
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_spent, Decimal('25.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_orders, 1)
+        self.assertEqual(self.customer.total_spent, Decimal('0.00'))
+
+    def test_guest_orders_counted_on_signup(self):
+        """Test that orders placed before the customer record existed are included"""
+        create_order(email='guest@example.com', status='delivered')
+        customer = Customer.objects.create(email='guest@example.com', first_name='Guest', last_name='User')
+
+        self.assertEqual(customer.total_orders, 1)
+        self.assertEqual(customer.total_spent, Decimal('10.00'))
+
+    def test_recompute_command(self):
+        """Test that the recompute command repairs drifted metrics"""
+        create_order(status='delivered')
+        Customer.objects.update(total_orders=99, total_spent=0, last_order_date=None)
+
+        call_command('recompute_customer_metrics', batch_size=1, stdout=StringIO())
+
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_orders, 1)
+        self.assertEqual(self.customer.total_spent, Decimal('10.00'))
+        self.assertIsNotNone(self.customer.last_order_date)
+
+
+class CustomerAPIQueryTest(APITestCase):
+    """Test that customer lists and stats do not query per customer"""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(20):
+                email = f'customer{i}@example.com'
+                Customer.objects.create(email=email, first_name='Customer', last_name=str(i), status='vip' if i < 5 else 'active')
+                create_order(email=email, status='delivered', total_amount=Decimal(i))
+        self.admin_user = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+
+    def test_admin_customer_list_query_count(self):
+        """Test that a page of customers takes one query once the total is cached"""
+        self.client.force_authenticate(user=self.admin_user)
+        self.client.get(reverse('admin-customer-list'), {'page': 2})
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('admin-customer-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['customers']), 20)
+        self.assertEqual(response.data['customers'][0]['total_orders'], 1)
+
+    def test_customer_stats(self):
+        """Test that both stats endpoints are reachable and aggregate in one query"""
+        self.client.force_authenticate(user=self.admin_user)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('admin-customer-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'totalCustomers': 20,
+            'activeCustomers': 15,
+            'vipCustomers': 5,
+            'avgOrderValue': 9.5,
+        })
+        self.assertEqual(self.client.get(reverse('customer-stats')).data, response.data)
+
+
+class SegmentationTest(APITestCase):
+    """Test RFM customer segmentation"""
+
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        # (orders, spend per order, days since last order)
+        profiles = {
+            'champion': (6, 200, 1),
+            'lapsed': (1, 10, 400),
+            'regular': (3, 50, 30),
+            'fresh': (1, 20, 2),
+            'sleepy': (2, 15, 200),
+        }
+        for name, (orders, spend, days_ago) in profiles.items():
+            email = f'{name}@example.com'
+            Customer.objects.create(email=email, first_name=name, last_name='Test')
+            for i in range(orders):
+                order = create_order(email=email, status='delivered', total_amount=Decimal(spend))
+                Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=days_ago + i))
+        Customer.objects.create(email='browser@example.com', first_name='browser', last_name='Test')
+        create_order(email='browser@example.com', status='cancelled')
+        self.admin_user = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+
+    def segments(self):
+        return dict(Customer.objects.values_list('first_name', 'segment'))
+
+    def test_quantile_scores(self):
+        """Test quintile scoring keeps ties together and can be reversed"""
+        self.assertEqual(quantile_scores(np.array([1, 1, 1, 1])).tolist(), [1, 1, 1, 1])
+        self.assertEqual(quantile_scores(np.arange(10)).tolist(), [1, 1, 2, 2, 3, 3, 4, 4, 5, 5])
+        self.assertEqual(quantile_scores(np.arange(5), higher_is_better=False).tolist(), [5, 4, 3, 2, 1])
+
+    def test_segments(self):
+        """Test that customers land in sensible segments"""
+        summary = segment_customers(chunk_size=2)
+
+        segments = self.segments()
+        self.assertEqual(segments['champion'], 'champions')
+        self.assertEqual(segments['lapsed'], 'hibernating')
+        self.assertEqual(segments['fresh'], 'new')
+        self.assertEqual(segments['browser'], 'prospect')
+        self.assertEqual(sum(summary.values()), 6)
+
+        champion = Customer.objects.get(first_name='champion')
+        self.assertEqual(
+            (champion.recency_score, champion.frequency_score, champion.monetary_score), (5, 5, 5)
+        )
+        self.assertIsNone(Customer.objects.get(first_name='browser').recency_score)
+
+    def test_command_and_segment_filter(self):
+        """Test the command and the indexed ?segment= filter"""
+        call_command('segment_customers', stdout=StringIO())
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(reverse('admin-customer-list'), {'segment': 'champions'})
+        self.assertEqual([c['email'] for c in response.data['customers']], ['champion@example.com'])
+        self.assertEqual(response.data['customers'][0]['segment'], 'champions')
+
+        plan = Customer.objects.filter(segment='champions').explain()
+        self.assertIn('customers_segment_idx', plan)
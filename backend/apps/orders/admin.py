@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import DailySalesSummary, Order, OrderItem, StockReservation
 
 
 class OrderItemInline(admin.TabularInline):
@@ -16,7 +16,8 @@ class OrderAdmin(admin.ModelAdmin):
     ]
     list_filter = ['status', 'created_at', 'shipping_country']
     search_fields = ['order_number', 'customer_email', 'customer_first_name', 'customer_last_name']
-    readonly_fields = ['order_number', 'created_at', 'updated_at']
+    readonly_fields = ['order_number', 'items_count', 'units_count', 'created_at', 'updated_at']
+    raw_id_fields = ['customer']
     inlines = [OrderItemInline]
     
     fieldsets = (
@@ -25,7 +26,7 @@ class OrderAdmin(admin.ModelAdmin):
         }),
         ('Customer Information', {
             'fields': (
-                'customer_email', 'customer_first_name', 'customer_last_name', 'customer_phone'
+                'customer', 'customer_email', 'customer_first_name', 'customer_last_name', 'customer_phone'
             )
         }),
         ('Shipping Address', {
@@ -35,7 +36,7 @@ class OrderAdmin(admin.ModelAdmin):
             )
         }),
         ('Order Totals', {
-            'fields': ('subtotal', 'shipping_cost', 'tax_amount', 'total_amount')
+            'fields': ('subtotal', 'shipping_cost', 'tax_amount', 'total_amount', 'items_count', 'units_count')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -49,3 +50,19 @@ class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'product', 'quantity', 'unit_price', 'total_price']
     list_filter = ['order__status', 'product__category']
     search_fields = ['order__order_number', 'product__name']
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['order', 'product', 'quantity', 'status', 'expires_at', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['order__order_number', 'product__name']
+    readonly_fields = ['created_at', 'released_at']
+
+
+@admin.register(DailySalesSummary)
+class DailySalesSummaryAdmin(admin.ModelAdmin):
+    list_display = ['date', 'status', 'order_count', 'revenue', 'updated_at']
+    list_filter = ['status']
+    date_hierarchy = 'date'
+    readonly_fields = ['date', 'status', 'order_count', 'revenue', 'updated_at']
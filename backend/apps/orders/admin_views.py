@@ -5,14 +5,21 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
 from apps.authentication.permissions import IsAdminUser
+from apps.core.pagination import AdminPagination
+from apps.core.search import search_orders
 from .models import Order
 from .serializers import OrderSerializer, OrderListSerializer
 
 
+class AdminOrderPagination(AdminPagination):
+    results_key = 'orders'
+
+
 class AdminOrderListView(generics.ListAPIView):
     permission_classes = [IsAdminUser]
-    queryset = Order.objects.all().prefetch_related('items__product')
+    queryset = Order.objects.all()
     serializer_class = OrderListSerializer
+    pagination_class = AdminOrderPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'customer_email']
 
@@ -22,12 +29,7 @@ class AdminOrderListView(generics.ListAPIView):
         # Search functionality
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(order_number__icontains=search) |
-                Q(customer_email__icontains=search) |
-                Q(customer_first_name__icontains=search) |
-                Q(customer_last_name__icontains=search)
-            )
+            queryset = search_orders(queryset, search)
         
         # Sort functionality
         sort_by = self.request.query_params.get('sortBy', 'createdAt')
@@ -47,33 +49,9 @@ class AdminOrderListView(generics.ListAPIView):
         
         return queryset
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        
-        # Pagination
-        page_size = int(request.query_params.get('pageSize', 20))
-        page = int(request.query_params.get('page', 1))
-        
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated_queryset = queryset[start:end]
-        
-        serializer = self.get_serializer(paginated_queryset, many=True)
-        
-        return Response({
-            'orders': serializer.data,
-            'meta': {
-                'page': page,
-                'pageSize': page_size,
-                'totalItems': queryset.count(),
-                'totalPages': (queryset.count() + page_size - 1) // page_size
-            }
-        })
-
-
 class AdminOrderDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAdminUser]
-    queryset = Order.objects.all().prefetch_related('items__product')
+    queryset = Order.objects.with_items()
     serializer_class = OrderSerializer
     lookup_field = 'order_number'
 
@@ -0,0 +1,223 @@
+"""
+Sales time series for the admin analytics API.
+
+The database does the heavy lifting in one query: orders (or order lines,
+for category and brand breakdowns) are reduced to one row per day and
+dimension value. Those daily rows are then re-bucketed with NumPy into
+whatever interval was asked for, so day, week, month and N-day series all
+come from the same compact result.
+
+Without a breakdown the series is read from the daily sales rollup
+(DailySalesSummary) and never touches the orders table.
+"""
+import hashlib
+import re
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Count, FloatField, Sum
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+
+from apps.core.cache import get_or_refresh
+from .models import DailySalesSummary, Order, OrderItem
+
+
+INTERVALS = ('day', 'week', 'month')
+GROUPS = ('category', 'brand', 'country')
+MAX_DAYS = 5 * 366
+MAX_BUCKETS = 1000
+DAYS_INTERVAL = re.compile(r'^(\d{1,3})d$')
+
+
+class AnalyticsQueryError(ValueError):
+    pass
+
+
+class TimeseriesQuery:
+    """Validated analytics parameters"""
+
+    def __init__(self, start=None, end=None, interval='day', group_by=None, statuses=None):
+        self.end = self._date(end, 'end') or timezone.localdate()
+        self.start = self._date(start, 'start') or self.end - timedelta(days=29)
+        if self.start > self.end:
+            raise AnalyticsQueryError('start must not be after end')
+        if (self.end - self.start).days >= MAX_DAYS:
+            raise AnalyticsQueryError(f'The range may cover at most {MAX_DAYS} days')
+
+        self.interval = interval or 'day'
+        match = DAYS_INTERVAL.match(self.interval)
+        if match:
+            self.bucket_days = int(match.group(1))
+            if self.bucket_days < 1:
+                raise AnalyticsQueryError('interval must be at least 1d')
+        elif self.interval in INTERVALS:
+            self.bucket_days = None
+        else:
+            raise AnalyticsQueryError("interval must be 'day', 'week', 'month' or a number of days such as '3d'")
+
+        if group_by and group_by not in GROUPS:
+            raise AnalyticsQueryError(f"group_by must be one of: {', '.join(GROUPS)}")
+        self.group_by = group_by or None
+
+        valid_statuses = {choice for choice, _ in Order.STATUS_CHOICES}
+        self.statuses = tuple(sorted(statuses)) if statuses else tuple(sorted(Order.REVENUE_STATUSES))
+        unknown = set(self.statuses) - valid_statuses
+        if unknown:
+            raise AnalyticsQueryError(f"Unknown status: {', '.join(sorted(unknown))}")
+
+    @classmethod
+    def from_params(cls, params):
+        statuses = params.get('status')
+        return cls(
+            start=params.get('start'),
+            end=params.get('end'),
+            interval=params.get('interval'),
+            group_by=params.get('group_by'),
+            statuses=[s for s in statuses.split(',') if s] if statuses else None,
+        )
+
+    @staticmethod
+    def _date(value, name):
+        if value is None or isinstance(value, date):
+            return value
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise AnalyticsQueryError(f'{name} must be a date in YYYY-MM-DD format')
+
+    def cache_key(self):
+        parts = [self.start, self.end, self.interval, self.group_by, ','.join(self.statuses)]
+        digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+        return f'analytics-timeseries:{digest}'
+
+
+def _daily_rows(query):
+    """One row per day and dimension value: (day, key, label, revenue, orders)"""
+    if query.group_by is None:
+        rows = (
+            DailySalesSummary.objects
+            .filter(date__gte=query.start, date__lte=query.end, status__in=query.statuses)
+            .order_by()
+            .values('date')
+            .annotate(revenue=Cast(Sum('revenue'), FloatField()), orders=Sum('order_count'))
+            .values_list('date', 'revenue', 'orders')
+        )
+        return [(day, None, 'All', revenue, orders) for day, revenue, orders in rows]
+
+    range_start = timezone.make_aware(datetime.combine(query.start, time.min))
+    range_end = timezone.make_aware(datetime.combine(query.end + timedelta(days=1), time.min))
+
+    if query.group_by == 'country':
+        rows = (
+            Order.objects
+            .filter(created_at__gte=range_start, created_at__lt=range_end, status__in=query.statuses)
+            .order_by()
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'shipping_country')
+            .annotate(revenue=Cast(Sum('total_amount'), FloatField()), orders=Count('id'))
+            .values_list('day', 'shipping_country', 'revenue', 'orders')
+        )
+        return [(day, country, country, revenue, orders) for day, country, revenue, orders in rows]
+
+    # Category and brand revenue is the sum of the matching order lines
+    key, label = {
+        'category': ('product__category_id', 'product__category__name'),
+        'brand': ('product__brand', 'product__brand'),
+    }[query.group_by]
+    rows = (
+        OrderItem.objects
+        .filter(
+            order__created_at__gte=range_start,
+            order__created_at__lt=range_end,
+            order__status__in=query.statuses,
+        )
+        .order_by()
+        .annotate(day=TruncDate('order__created_at'))
+        .values('day', key, label)
+        .annotate(revenue=Cast(Sum('total_price'), FloatField()), orders=Count('order', distinct=True))
+        .values_list('day', key, label, 'revenue', 'orders')
+    )
+    return [(day, k, l or 'Unknown', revenue, orders) for day, k, l, revenue, orders in rows]
+
+
+def _bucket_starts(query):
+    """First day of every bucket covering the range, as datetime64[D]"""
+    import numpy as np
+
+    start = np.datetime64(query.start, 'D')
+    end = np.datetime64(query.end, 'D')
+    if query.interval == 'month':
+        months = np.arange(start.astype('datetime64[M]'), end.astype('datetime64[M]') + 1)
+        return months.astype('datetime64[D]')
+    if query.interval == 'week':
+        # Weeks start on Monday; 1970-01-01 was a Thursday
+        start = start - ((start.astype('int64') + 3) % 7)
+        step = 7
+    else:
+        step = query.bucket_days or 1
+    return np.arange(start, end + 1, step)
+
+
+def compute_timeseries(query):
+    # NumPy is imported on first use: it is the slowest import at start-up,
+    # and only analytics requests need it
+    import numpy as np
+
+    rows = _daily_rows(query)
+    buckets = _bucket_starts(query)
+    if len(buckets) > MAX_BUCKETS:
+        raise AnalyticsQueryError(f'The range and interval give more than {MAX_BUCKETS} buckets')
+
+    series_keys = []
+    labels = {}
+    if rows:
+        days = np.array([row[0] for row in rows], dtype='datetime64[D]')
+        revenue = np.array([row[3] or 0 for row in rows], dtype=np.float64)
+        orders = np.array([row[4] for row in rows], dtype=np.int64)
+        keys = [row[1] for row in rows]
+        for row in rows:
+            labels.setdefault(row[1], row[2])
+
+        series_keys = sorted(labels, key=lambda k: (k is None, str(labels[k]).lower(), str(k)))
+        key_index = {key: i for i, key in enumerate(series_keys)}
+        codes = np.fromiter((key_index[k] for k in keys), dtype=np.int64, count=len(keys))
+
+        # Index of the bucket each day falls into, then a flat (series, bucket) cell
+        bucket_of_day = np.searchsorted(buckets, days, side='right') - 1
+        cells = codes * len(buckets) + bucket_of_day
+        size = len(series_keys) * len(buckets)
+        revenue_grid = np.bincount(cells, weights=revenue, minlength=size).reshape(len(series_keys), len(buckets))
+        orders_grid = np.bincount(cells, weights=orders, minlength=size).reshape(len(series_keys), len(buckets))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            aov_grid = np.where(orders_grid > 0, revenue_grid / orders_grid, 0.0)
+
+    series = []
+    for i, key in enumerate(series_keys):
+        series.append({
+            'key': key,
+            'label': labels[key],
+            'revenue': np.round(revenue_grid[i], 2).tolist(),
+            'orders': orders_grid[i].astype(np.int64).tolist(),
+            'aov': np.round(aov_grid[i], 2).tolist(),
+            'totalRevenue': round(float(revenue_grid[i].sum()), 2),
+            'totalOrders': int(orders_grid[i].sum()),
+        })
+
+    return {
+        'start': query.start.isoformat(),
+        'end': query.end.isoformat(),
+        'interval': query.interval,
+        'groupBy': query.group_by,
+        'statuses': list(query.statuses),
+        'buckets': [str(bucket) for bucket in buckets],
+        'series': series,
+    }
+
+
+def get_timeseries(query):
+    return get_or_refresh(
+        query.cache_key(),
+        lambda: compute_timeseries(query),
+        ttl=getattr(settings, 'ANALYTICS_CACHE_TTL', 300),
+    )
@@ -0,0 +1,136 @@
+"""
+Order number generation.
+
+The default generator packs a millisecond timestamp, a node id and a
+per-millisecond sequence into 63 bits (the Snowflake layout) and writes it
+as 13 Crockford base32 characters. Later numbers sort after earlier ones as
+plain strings, so inserts into the unique order_number index are mostly
+appends. Numbers are made in-process without a database round trip.
+
+Numbers are unique as long as every process that creates orders has its
+own node id. Gunicorn gives each worker a slot, the lowest one no other
+live worker holds (see gunicorn.conf.py), and the node id is
+ORDER_NUMBER_NODE_ID plus the slot. Give each host a base at least its
+worker count apart from the others. Without ORDER_NUMBER_NODE_ID the base
+is derived from the host name, and processes outside gunicorn derive the
+node id from the host name and process id. Order.save() draws a new
+number if one is ever taken anyway.
+
+ORDER_NUMBER_GENERATOR names the generator class to use. Instances are
+called with no arguments and return an order number string.
+"""
+import os
+import socket
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+ENCODED_LENGTH = 13
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+def encode(value):
+    """Fixed-width Crockford base32, so string order matches numeric order"""
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        value, remainder = divmod(value, 32)
+        chars.append(ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+def decode(text):
+    value = 0
+    for char in text:
+        value = value * 32 + ALPHABET.index(char)
+    return value
+
+
+_worker_slot = None
+
+
+def set_worker_slot(slot):
+    """Make ``slot`` part of this process's node id (called in each gunicorn worker)"""
+    global _worker_slot
+    _worker_slot = slot
+    if _generator is not None and hasattr(_generator, 'reset'):
+        _generator.reset()
+
+
+def default_node_id():
+    configured = getattr(settings, 'ORDER_NUMBER_NODE_ID', None)
+    if _worker_slot is not None:
+        base = int(configured) if configured is not None else zlib.crc32(socket.gethostname().encode())
+        return (base + _worker_slot) & MAX_NODE_ID
+    if configured is not None:
+        return int(configured) & MAX_NODE_ID
+    return zlib.crc32(f'{socket.gethostname()}:{os.getpid()}'.encode()) & MAX_NODE_ID
+
+
+class SnowflakeOrderNumberGenerator:
+    prefix = 'ORD-'
+
+    def __init__(self, node_id=None):
+        self._fixed_node_id = node_id
+        self.reset()
+
+    def reset(self):
+        """Re-derive the node id and clear the sequence (called in forked children)"""
+        self._lock = threading.Lock()
+        self.node_id = self._fixed_node_id if self._fixed_node_id is not None else default_node_id()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self):
+        with self._lock:
+            now_ms = int(time.time() * 1000) - EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # Same millisecond, or the clock went backwards: keep counting
+                # on the last timestamp and borrow the next millisecond when
+                # the sequence runs out, so ids never repeat or go backwards
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return (self._last_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+    def __call__(self):
+        return f'{self.prefix}{encode(self.next_id())}'
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_order_number_generator():
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                path = getattr(settings, 'ORDER_NUMBER_GENERATOR', 'apps.orders.ids.SnowflakeOrderNumberGenerator')
+                _generator = import_string(path)()
+    return _generator
+
+
+def generate_order_number():
+    return get_order_number_generator()()
+
+
+def _reset_after_fork():
+    if _generator is not None and hasattr(_generator, 'reset'):
+        _generator.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
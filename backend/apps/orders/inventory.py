@@ -0,0 +1,150 @@
+"""
+Stock reservation for checkout.
+
+Stock for every line of an order is taken with one conditional UPDATE
+(``stock_count = stock_count - q WHERE stock_count >= q``), so concurrent
+checkouts of the same product never hold a row lock across the request and
+can never drive a product below zero. If any line is short the whole
+reservation is rolled back.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from apps.products.models import Product
+from .models import Order, StockReservation
+
+
+LIVE_STATUSES = [StockReservation.STATUS_ACTIVE, StockReservation.STATUS_COMMITTED]
+
+
+class InsufficientStock(Exception):
+    """Raised when one or more products cannot cover the requested quantity"""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Insufficient stock for products: {self.product_ids}")
+
+
+def _quantity_case(quantities):
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def reservation_ttl():
+    """Seconds before an unconfirmed reservation expires (0 disables expiry)"""
+    return getattr(settings, 'INVENTORY_RESERVATION_TTL', 0)
+
+
+def reserve_stock(order, quantities):
+    """
+    Take stock for ``order``.
+
+    ``quantities`` maps product id to quantity. Either every line is
+    reserved or none is; InsufficientStock lists the products that were short.
+    """
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+    if not quantities:
+        return []
+
+    ttl = reservation_ttl()
+    expires_at = timezone.now() + timedelta(seconds=ttl) if ttl else None
+    quantity = _quantity_case(quantities)
+
+    try:
+        with transaction.atomic():
+            updated = Product.objects.filter(
+                pk__in=quantities.keys(),
+                stock_count__gte=quantity,
+            ).update(stock_count=F('stock_count') - quantity)
+            if updated != len(quantities):
+                raise InsufficientStock([])
+
+            return StockReservation.objects.bulk_create([
+                StockReservation(
+                    order=order,
+                    product_id=product_id,
+                    quantity=line_quantity,
+                    expires_at=expires_at,
+                )
+                for product_id, line_quantity in quantities.items()
+            ])
+    except InsufficientStock:
+        # The decrement has been rolled back; work out which lines were short
+        available = dict(
+            Product.objects.filter(pk__in=quantities.keys()).values_list('pk', 'stock_count')
+        )
+        raise InsufficientStock([
+            product_id for product_id, line_quantity in quantities.items()
+            if available.get(product_id, 0) < line_quantity
+        ])
+
+
+def _release(reservations, status):
+    restore = {}
+    for reservation in reservations:
+        restore[reservation.product_id] = restore.get(reservation.product_id, 0) + reservation.quantity
+
+    Product.objects.filter(pk__in=restore.keys()).update(
+        stock_count=F('stock_count') + _quantity_case(restore)
+    )
+    StockReservation.objects.filter(pk__in=[r.pk for r in reservations]).update(
+        status=status,
+        released_at=timezone.now(),
+    )
+
+
+def release_reservations(order, status=StockReservation.STATUS_RELEASED):
+    """Return the stock held for ``order``. Returns the number of reservations released."""
+    with transaction.atomic():
+        reservations = list(
+            StockReservation.objects.select_for_update().filter(order=order, status__in=LIVE_STATUSES)
+        )
+        if reservations:
+            _release(reservations, status)
+    return len(reservations)
+
+
+def reserve_order_stock(order):
+    """Take stock again for every line of ``order`` (when it is reopened after cancelling)"""
+    return reserve_stock(order, dict(order.items.values_list('product_id', 'quantity')))
+
+
+def commit_reservations(order):
+    """Keep the stock held for ``order`` permanently (it no longer expires)"""
+    return StockReservation.objects.filter(
+        order=order,
+        status=StockReservation.STATUS_ACTIVE,
+    ).update(status=StockReservation.STATUS_COMMITTED, expires_at=None)
+
+
+def release_expired_reservations(now=None):
+    """
+    Release reservations that have passed their expiry.
+
+    Pending orders holding them get their stock back and are cancelled.
+    Reservations only expire when INVENTORY_RESERVATION_TTL is set. Returns
+    the number of orders cancelled.
+    """
+    now = now or timezone.now()
+    order_ids = set(
+        StockReservation.objects.filter(
+            status=StockReservation.STATUS_ACTIVE,
+            expires_at__lte=now,
+        ).values_list('order_id', flat=True)
+    )
+
+    cancelled = 0
+    for order in Order.objects.filter(pk__in=order_ids, status='pending'):
+        with transaction.atomic():
+            release_reservations(order, status=StockReservation.STATUS_EXPIRED)
+            order.status = 'cancelled'
+            order.notes = (order.notes + '\n' if order.notes else '') + 'Stock reservation expired'
+            order.save(update_fields=['status', 'notes', 'updated_at'])
+        cancelled += 1
+    return cancelled
@@ -0,0 +1,44 @@
+"""
+Management command to build the daily sales rollup from order history.
+
+Works through the history a chunk of days at a time, so each chunk is one
+short transaction and the command can be stopped and rerun safely.
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.orders.rollup import order_date_range, rebuild_daily_sales
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DailySalesSummary rows from orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD), default first order')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD), default last order')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1')
+
+        bounds = order_date_range()
+        if bounds is None and not (options['start'] and options['end']):
+            self.stdout.write('No orders to summarise')
+            return
+        start = options['start'] or bounds[0]
+        end = options['end'] or bounds[1]
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        rows = 0
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), end)
+            written = rebuild_daily_sales(chunk_start, chunk_end)
+            rows += written
+            self.stdout.write(f'{chunk_start} to {chunk_end}: {written} rows')
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {start} to {end}: {rows} rows'))
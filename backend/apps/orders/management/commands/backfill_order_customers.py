@@ -0,0 +1,54 @@
+"""
+Management command to link existing orders to customers by e-mail.
+
+Orders without a customer are walked in primary key order and each batch
+is linked with one short UPDATE, so no lock is held for long. Running the
+command again picks up where it stopped, because linked orders are
+skipped; --after resumes from a given order id.
+
+Run recompute_customer_metrics afterwards so lifetime metrics include the
+newly linked orders.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef, Subquery
+
+from apps.customers.models import Customer
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Set Order.customer for existing orders by matching customer_email'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Orders updated per statement')
+        parser.add_argument('--after', type=int, default=0, help='Only process orders with a larger id')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        customer = Customer.objects.filter(email=OuterRef('customer_email'))
+        last_pk = options['after']
+        linked = scanned = 0
+        while True:
+            batch = list(
+                Order.objects.filter(pk__gt=last_pk, customer__isnull=True)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            linked += Order.objects.filter(pk__in=batch).filter(Exists(customer)).update(
+                customer_id=Subquery(customer.values('pk')[:1])
+            )
+            scanned += len(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f'Processed orders up to id {last_pk}: {linked} linked, {scanned} scanned')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Linked {linked} of {scanned} orders to customers'))
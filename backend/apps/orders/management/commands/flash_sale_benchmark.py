@@ -0,0 +1,124 @@
+"""
+Management command to simulate a flash sale on a single product.
+
+Runs concurrent checkouts through OrderSerializer against one SKU and
+reports throughput, latency and whether any stock was oversold. Everything
+the run creates is deleted afterwards.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.core.models import Category
+from apps.orders.models import Order, StockReservation
+from apps.orders.serializers import OrderSerializer
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent checkouts of a single product and check for oversell'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=500, help='Units on sale')
+        parser.add_argument('--checkouts', type=int, default=1000, help='Total checkout attempts')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent buyers')
+        parser.add_argument('--quantity', type=int, default=1, help='Units per checkout')
+
+    def handle(self, *args, **options):
+        stamp = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        category = Category.objects.create(name=f'Flash Sale {stamp}')
+        product = Product.objects.create(
+            name=f'Flash Sale Item {stamp}',
+            description='Flash sale benchmark product',
+            price=Decimal('9.99'),
+            category=category,
+            stock_count=options['stock'],
+        )
+
+        results = {'sold': 0, 'rejected': 0, 'errors': 0}
+        latencies = []
+        order_numbers = []
+        lock = threading.Lock()
+
+        def buyer(attempts):
+            try:
+                for _ in range(attempts):
+                    started = time.perf_counter()
+                    outcome = self.checkout(product, options['quantity'], order_numbers, lock)
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        results[outcome] += 1
+                        latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        per_thread, remainder = divmod(options['checkouts'], options['threads'])
+        threads = [
+            threading.Thread(target=buyer, args=(per_thread + (1 if i < remainder else 0),))
+            for i in range(options['threads'])
+        ]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        product.refresh_from_db()
+        reserved = sum(
+            StockReservation.objects.filter(product=product).values_list('quantity', flat=True)
+        )
+        sold_units = results['sold'] * options['quantity']
+        oversold = product.stock_count + reserved != options['stock'] or reserved != sold_units
+
+        latencies.sort()
+
+        def percentile(p):
+            if not latencies:
+                return 0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(f"Database:           {connection.vendor}")
+        self.stdout.write(f"Checkouts:          {options['checkouts']} across {options['threads']} threads")
+        self.stdout.write(f"Sold / rejected:    {results['sold']} / {results['rejected']} (errors: {results['errors']})")
+        self.stdout.write(f"Stock remaining:    {product.stock_count} of {options['stock']}")
+        self.stdout.write(f"Elapsed:            {elapsed:.2f}s")
+        self.stdout.write(f"Throughput:         {options['checkouts'] / elapsed:.1f} checkouts/s")
+        self.stdout.write(f"Latency p50/p95/p99: {percentile(0.5):.1f} / {percentile(0.95):.1f} / {percentile(0.99):.1f} ms")
+
+        Order.objects.filter(order_number__in=order_numbers).delete()
+        product.delete()
+        category.delete()
+
+        if oversold:
+            self.stdout.write(self.style.ERROR('Stock accounting mismatch: oversell detected'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No oversell'))
+
+    def checkout(self, product, quantity, order_numbers, lock):
+        serializer = OrderSerializer(data={
+            'customer_email': 'flash.sale@example.com',
+            'customer_first_name': 'Flash',
+            'customer_last_name': 'Sale',
+            'shipping_address_line1': '1 Benchmark Street',
+            'shipping_city': 'Ipswich',
+            'shipping_state': 'Suffolk',
+            'shipping_zip_code': 'IP1 1AA',
+            'order_items': [{'product_id': product.pk, 'quantity': quantity}],
+        })
+        try:
+            serializer.is_valid(raise_exception=True)
+            order = serializer.save()
+        except ValidationError:
+            return 'rejected'
+        except OperationalError:
+            return 'errors'
+        with lock:
+            order_numbers.append(order.order_number)
+        return 'sold'
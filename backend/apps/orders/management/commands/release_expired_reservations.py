@@ -0,0 +1,14 @@
+"""
+Management command to return stock held by expired reservations
+"""
+from django.core.management.base import BaseCommand
+
+from apps.orders.inventory import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = 'Release expired stock reservations and cancel their pending orders'
+
+    def handle(self, *args, **options):
+        cancelled = release_expired_reservations()
+        self.stdout.write(self.style.SUCCESS(f'Released reservations for {cancelled} pending order(s)'))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:45
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_item_counts(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    items = OrderItem.objects.filter(order=models.OuterRef('pk')).values('order')
+    Order.objects.update(
+        items_count=Coalesce(models.Subquery(items.annotate(n=models.Count('id')).values('n')), 0),
+        units_count=Coalesce(models.Subquery(items.annotate(n=models.Sum('quantity')).values('n')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_stockreservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='units_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_item_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:46
+
+from django.db import migrations, models
+
+from apps.core.search import create_search_index, drop_search_index
+
+
+SEARCH_COLUMNS = ['order_number', 'customer_email', 'customer_first_name', 'customer_last_name']
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor, 'orders_order', SEARCH_COLUMNS)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor, 'orders_order', SEARCH_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_item_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer_email'], name='orders_order_email_idx'),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
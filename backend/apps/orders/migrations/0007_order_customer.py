@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from apps.core.search import restore_search_index
+
+
+SEARCH_COLUMNS = ['order_number', 'customer_email', 'customer_first_name', 'customer_last_name']
+
+
+def restore_index(apps, schema_editor):
+    # Adding a column rebuilds the table on SQLite, which drops the search triggers
+    restore_search_index(schema_editor, 'orders_order', SEARCH_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_lifetime_metrics'),
+        ('orders', '0006_dailysalessummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_index),
+        migrations.AddField(
+            model_name='order',
+            name='customer',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='customers.customer'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-created_at'], name='orders_order_customer_idx'),
+        ),
+        migrations.RunPython(restore_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:40
+
+from django.db import migrations, models
+
+from apps.core.search import restore_search_index
+
+
+SEARCH_COLUMNS = ['order_number', 'customer_email', 'customer_first_name', 'customer_last_name']
+
+
+def restore_index(apps, schema_editor):
+    # Adding a column rebuilds the table on SQLite, which drops the search triggers
+    restore_search_index(schema_editor, 'orders_order', SEARCH_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_customer'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_index),
+        migrations.AddField(
+            model_name='order',
+            name='confirmation_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(restore_index, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,24 @@
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.functions import Coalesce, Lower
 from django.core.validators import MinValueValidator
+from apps.customers.models import Customer
 from apps.products.models import Product
+from .ids import generate_order_number
+from .signals import order_status_changed
+
+
+# Inserts tried with freshly generated order numbers before giving up
+ORDER_NUMBER_ATTEMPTS = 5
+
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        """Prefetch lines and everything their product serializer reads, in a fixed number of queries"""
+        return self.prefetch_related(models.Prefetch(
+            'items',
+            queryset=OrderItem.objects.prefetch_related(
+                models.Prefetch('product', queryset=Product.objects.for_listing())
+            ),
+        ))
 
 
 class Order(models.Model):
@@ -11,11 +29,17 @@ class Order(models.Model):
         ('delivered', 'Delivered'),
         ('cancelled', 'Cancelled'),
     ]
+    # Statuses that count towards revenue
+    REVENUE_STATUSES = ('confirmed', 'shipped', 'delivered')
 
     # Order identification
     order_number = models.CharField(max_length=20, unique=True)
     
-    # Customer information
+    # Customer information; customer is matched by e-mail when the order is created
+    customer = models.ForeignKey(
+        Customer, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='orders', db_index=False
+    )
     customer_email = models.EmailField()
     customer_first_name = models.CharField(max_length=100)
     customer_last_name = models.CharField(max_length=100)
@@ -34,6 +58,10 @@ class Order(models.Model):
     shipping_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0, validators=[MinValueValidator(0)])
     tax_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0, validators=[MinValueValidator(0)])
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
+
+    # Denormalised from OrderItem so order lists need no per-row queries
+    items_count = models.PositiveIntegerField(default=0)
+    units_count = models.PositiveIntegerField(default=0)
     
     # Order status and tracking
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -43,19 +71,71 @@ class Order(models.Model):
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set by tasks.send_order_confirmation, so the e-mail goes out once
+    confirmation_sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OrderQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['customer_email'], name='orders_order_email_idx'),
+            models.Index(Lower('customer_email'), name='orders_order_email_lower_idx'),
+            models.Index(fields=['created_at'], name='orders_order_created_idx'),
+            models.Index(fields=['customer', '-created_at'], name='orders_order_customer_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_number}"
 
+    @classmethod
+    def refresh_item_counts(cls, order_id):
+        """Recalculate items_count and units_count from the order's items in one UPDATE"""
+        items = OrderItem.objects.filter(order=models.OuterRef('pk')).values('order')
+        cls.objects.filter(pk=order_id).update(
+            items_count=Coalesce(models.Subquery(items.annotate(n=models.Count('id')).values('n')), 0),
+            units_count=Coalesce(models.Subquery(items.annotate(n=models.Sum('quantity')).values('n')), 0),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can detect transitions
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
-        if not self.order_number:
-            # Generate order number
-            import uuid
-            self.order_number = f"ORD-{uuid.uuid4().hex[:8].upper()}"
-        super().save(*args, **kwargs)
+        generated = not self.order_number
+        if generated:
+            self.order_number = generate_order_number()
+        if self._state.adding and self.customer_id is None:
+            self.customer_id = Customer.objects.filter(email=self.customer_email).values_list('pk', flat=True).first()
+        previous_status = getattr(self, '_loaded_status', None)
+        if generated:
+            self._insert_with_fresh_number(*args, **kwargs)
+        elif previous_status is not None and previous_status != self.status:
+            # Receivers can refuse the change (InsufficientStock when a cancelled
+            # order is reopened), which rolls the save back with them
+            with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Order, instance=self)):
+                super().save(*args, **kwargs)
+                order_status_changed.send(sender=Order, order=self, previous_status=previous_status)
+        else:
+            super().save(*args, **kwargs)
+        self._loaded_status = self.status
+
+    def _insert_with_fresh_number(self, *args, **kwargs):
+        """Insert, drawing a new order number if another process already used this one"""
+        using = kwargs.get('using') or router.db_for_write(Order, instance=self)
+        for attempt in range(ORDER_NUMBER_ATTEMPTS):
+            try:
+                # A savepoint, so that a failed insert leaves the caller's transaction usable
+                with transaction.atomic(using=using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                taken = Order.objects.using(using).filter(order_number=self.order_number).exists()
+                if not taken or attempt == ORDER_NUMBER_ATTEMPTS - 1:
+                    raise
+                self.order_number = generate_order_number()
 
 
 class OrderItem(models.Model):
@@ -74,3 +154,65 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
+
+
+class StockReservation(models.Model):
+    """
+    Stock taken from a product for an order line.
+
+    Active reservations belong to pending orders and expire after
+    INVENTORY_RESERVATION_TTL seconds; committed ones belong to orders that
+    went ahead. Released and expired reservations have returned their stock.
+    """
+    STATUS_ACTIVE = 'active'
+    STATUS_COMMITTED = 'committed'
+    STATUS_RELEASED = 'released'
+    STATUS_EXPIRED = 'expired'
+    STATUS_CHOICES = [
+        (STATUS_ACTIVE, 'Active'),
+        (STATUS_COMMITTED, 'Committed'),
+        (STATUS_RELEASED, 'Released'),
+        (STATUS_EXPIRED, 'Expired'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x {self.quantity} for order {self.order_id} ({self.status})"
+
+
+class DailySalesSummary(models.Model):
+    """
+    Orders and revenue per day and order status.
+
+    Kept current as orders are created, change status or are deleted, and
+    rebuilt from the orders table by apps.orders.rollup for reconciliation
+    and backfills. Dashboards read this instead of scanning orders.
+    """
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date', 'status']
+        verbose_name_plural = 'daily sales summaries'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'status'], name='orders_daily_sales_date_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status}: {self.order_count} orders, {self.revenue}"
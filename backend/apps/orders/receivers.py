@@ -0,0 +1,55 @@
+"""
+Reactions to order lifecycle signals
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Order, OrderItem
+from .signals import order_status_changed
+from .tasks import order_changed
+
+
+@receiver(order_status_changed)
+def update_stock_reservations(sender, order, previous_status, **kwargs):
+    from .inventory import commit_reservations, release_reservations, reserve_order_stock
+
+    if order.status == 'cancelled':
+        release_reservations(order)
+        return
+    if previous_status == 'cancelled':
+        # Its stock went back when it was cancelled; InsufficientStock refuses the change
+        reserve_order_stock(order)
+    if order.status in ('confirmed', 'shipped', 'delivered'):
+        commit_reservations(order)
+
+
+@receiver(pre_delete, sender=Order)
+def release_deleted_order_stock(sender, instance, **kwargs):
+    # The reservations are deleted with the order, so give their stock back
+    # first, unless the goods have already left
+    from .inventory import release_reservations
+
+    if instance.status not in ('shipped', 'delivered'):
+        release_reservations(instance)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def schedule_order_rollups(sender, instance, raw=False, **kwargs):
+    # The daily sales rollup, customer metrics and cached figures are
+    # recomputed in the background once the change is committed
+    if not raw:
+        day = timezone.localdate(instance.created_at)
+        transaction.on_commit(partial(order_changed, day, instance.customer_id), robust=True)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_item_counts(sender, instance, **kwargs):
+    # Items edited one at a time (e.g. in the Django admin); checkout sets the
+    # counts directly because bulk_create sends no signals
+    Order.refresh_item_counts(instance.order_id)
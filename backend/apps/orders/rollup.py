@@ -0,0 +1,59 @@
+"""
+Daily sales rollup.
+
+DailySalesSummary holds one row per day and order status. When an order
+is created, saved or deleted the order pipeline rebuilds its day from the
+orders table (tasks.rebuild_sales_day). Changes that bypass model
+signals, such as queryset updates, are corrected by rebuilding recent
+days on a schedule (tasks.reconcile_daily_sales).
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySalesSummary, Order
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild_daily_sales(start, end):
+    """
+    Recompute the rows for ``start`` to ``end`` (inclusive) from orders.
+
+    Returns the number of rows written.
+    """
+    totals = (
+        Order.objects
+        .order_by()
+        .filter(created_at__gte=_day_start(start), created_at__lt=_day_start(end + timedelta(days=1)))
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'status')
+        .annotate(order_count=Count('id'), revenue=Sum('total_amount'))
+    )
+    rows = [
+        DailySalesSummary(
+            date=total['day'],
+            status=total['status'],
+            order_count=total['order_count'],
+            revenue=total['revenue'] or 0,
+        )
+        for total in totals
+    ]
+    with transaction.atomic():
+        DailySalesSummary.objects.filter(date__gte=start, date__lte=end).delete()
+        DailySalesSummary.objects.bulk_create(rows)
+    return len(rows)
+
+
+def order_date_range():
+    """First and last local order dates, or None when there are no orders"""
+    first = Order.objects.order_by('created_at').values_list('created_at', flat=True).first()
+    if first is None:
+        return None
+    last = Order.objects.order_by('-created_at').values_list('created_at', flat=True).first()
+    return timezone.localdate(first), timezone.localdate(last)
@@ -1,5 +1,14 @@
+from decimal import Decimal
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
+from .inventory import InsufficientStock, reserve_stock
 from .models import Order, OrderItem
+from .tasks import order_placed
+from apps.core.profiling import ProfiledSerializerMixin
+from apps.products.models import Product
 from apps.products.serializers import ProductListSerializer
 
 
@@ -12,13 +21,15 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'product_id', 'quantity', 'unit_price', 'total_price']
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderLineSerializer(serializers.Serializer):
+    """A line of a new order. Prices are always taken from the product."""
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class OrderSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
-    order_items = serializers.ListField(
-        child=serializers.DictField(),
-        write_only=True,
-        required=False
-    )
+    order_items = OrderLineSerializer(many=True, write_only=True, required=False)
 
     class Meta:
         model = Order
@@ -26,35 +37,83 @@ class OrderSerializer(serializers.ModelSerializer):
             'id', 'order_number', 'customer_email', 'customer_first_name', 'customer_last_name',
             'customer_phone', 'shipping_address_line1', 'shipping_address_line2',
             'shipping_city', 'shipping_state', 'shipping_zip_code', 'shipping_country',
-            'subtotal', 'shipping_cost', 'tax_amount', 'total_amount', 'status',
-            'tracking_number', 'notes', 'items', 'order_items', 'created_at', 'updated_at'
+            'subtotal', 'shipping_cost', 'tax_amount', 'total_amount', 'items_count', 'units_count',
+            'status', 'tracking_number', 'notes', 'items', 'order_items', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'order_number', 'subtotal', 'total_amount', 'items_count', 'units_count', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['order_number', 'created_at', 'updated_at']
+
+    def validate_order_items(self, value):
+        # Merge repeated products into one line per product
+        quantities = {}
+        for line in value:
+            quantities[line['product_id']] = quantities.get(line['product_id'], 0) + line['quantity']
+
+        # One query for every product on the order
+        products = Product.objects.filter(pk__in=quantities.keys(), is_active=True).in_bulk()
+        missing = sorted(set(quantities) - set(products))
+        if missing:
+            raise serializers.ValidationError(
+                [f'Product {product_id} does not exist or is not available' for product_id in missing]
+            )
+        return [(products[product_id], quantity) for product_id, quantity in quantities.items()]
 
     def create(self, validated_data):
-        order_items_data = validated_data.pop('order_items', [])
-        order = Order.objects.create(**validated_data)
-        
-        for item_data in order_items_data:
-            OrderItem.objects.create(
-                order=order,
-                product_id=item_data['product_id'],
-                quantity=item_data['quantity'],
-                unit_price=item_data['unit_price']
+        lines = validated_data.pop('order_items', [])
+        items = [
+            OrderItem(
+                product=product,
+                quantity=quantity,
+                unit_price=product.price,
+                total_price=product.price * quantity,
             )
-        
+            for product, quantity in lines
+        ]
+        subtotal = sum((item.total_price for item in items), Decimal('0'))
+        validated_data['subtotal'] = subtotal
+        validated_data['total_amount'] = (
+            subtotal + validated_data.get('shipping_cost', 0) + validated_data.get('tax_amount', 0)
+        )
+        validated_data['items_count'] = len(items)
+        validated_data['units_count'] = sum(item.quantity for item in items)
+
+        with transaction.atomic():
+            order = Order.objects.create(**validated_data)
+            for item in items:
+                item.order = order
+            OrderItem.objects.bulk_create(items)
+
+            try:
+                reserve_stock(order, {product.pk: quantity for product, quantity in lines})
+            except InsufficientStock as exc:
+                raise serializers.ValidationError({
+                    'order_items': [f'Insufficient stock for product {product_id}' for product_id in exc.product_ids]
+                })
+            transaction.on_commit(
+                partial(order_placed, order.pk, [product.pk for product, _ in lines]), robust=True
+            )
+
+        prefetch_related_objects([order], Prefetch(
+            'items',
+            queryset=OrderItem.objects.prefetch_related(Prefetch('product', queryset=Product.objects.for_listing()))
+        ))
         return order
 
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except InsufficientStock as exc:
+            # A cancelled order reopened without the stock to cover it
+            raise serializers.ValidationError({
+                'status': [f'Insufficient stock for product {product_id}' for product_id in exc.product_ids]
+            })
 
-class OrderListSerializer(serializers.ModelSerializer):
-    items_count = serializers.SerializerMethodField()
 
+class OrderListSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = [
             'id', 'order_number', 'customer_email', 'customer_first_name', 'customer_last_name',
-            'total_amount', 'status', 'items_count', 'created_at'
+            'total_amount', 'status', 'items_count', 'units_count', 'created_at'
         ]
-
-    def get_items_count(self, obj):
-        return obj.items.count()
@@ -0,0 +1,8 @@
+"""
+Signals sent during the order lifecycle
+"""
+from django.dispatch import Signal
+
+# Sent by Order.save() when a stored order changes status.
+# Arguments: order, previous_status
+order_status_changed = Signal()
@@ -0,0 +1,90 @@
+"""
+Dashboard statistics.
+
+All dashboard figures come from one query over the daily sales rollup
+(DailySalesSummary), so the cost does not grow with the number of orders.
+Days in the last week are grouped individually and everything older falls
+into a single bucket, with conditional aggregates for revenue and
+cancellations in each group. Totals are the sum of the buckets.
+
+Results are cached for DASHBOARD_STATS_TTL seconds and refreshed by one
+request at a time. aget_dashboard_stats() is the same for async views.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, F, Q, Sum, When
+from django.utils import timezone
+
+from apps.core.aio import in_own_connection
+from apps.core.cache import aget_or_refresh, get_or_refresh
+from .models import DailySalesSummary, Order
+
+
+SERIES_DAYS = 7
+
+
+def compute_dashboard_stats(today=None):
+    today = today or timezone.localdate()
+    first_day = today - timedelta(days=SERIES_DAYS - 1)
+    revenue = Q(status__in=Order.REVENUE_STATUSES)
+
+    buckets = (
+        DailySalesSummary.objects
+        .order_by()
+        .annotate(day=Case(When(date__gte=first_day, then=F('date'))))
+        .values('day')
+        .annotate(
+            orders=Sum('order_count'),
+            cancelled=Sum('order_count', filter=Q(status='cancelled')),
+            revenue_orders=Sum('order_count', filter=revenue),
+            revenue=Sum('revenue', filter=revenue),
+        )
+    )
+
+    by_day = {}
+    total_orders = cancelled = revenue_orders = 0
+    total_revenue = Decimal('0')
+    for bucket in buckets:
+        total_orders += bucket['orders'] or 0
+        cancelled += bucket['cancelled'] or 0
+        revenue_orders += bucket['revenue_orders'] or 0
+        total_revenue += bucket['revenue'] or 0
+        if bucket['day'] is not None:
+            by_day[bucket['day']] = bucket
+
+    today_bucket = by_day.get(today, {})
+    avg_order_value = total_revenue / revenue_orders if revenue_orders else Decimal('0')
+    error_rate = cancelled / total_orders * 100 if total_orders else 0
+
+    return {
+        'ordersToday': today_bucket.get('orders', 0),
+        'revenueToday': float(today_bucket.get('revenue') or 0),
+        'avgOrderValue': round(float(avg_order_value), 2),
+        'errorRate': round(error_rate, 1),
+        'ordersLast7Days': [
+            {'date': day.isoformat(), 'orders': by_day.get(day, {}).get('orders', 0)}
+            for day in (first_day + timedelta(days=i) for i in range(SERIES_DAYS))
+        ],
+    }
+
+
+def dashboard_stats_key(today):
+    return f'dashboard-stats:{today.isoformat()}'
+
+
+def _ttl():
+    return getattr(settings, 'DASHBOARD_STATS_TTL', 30)
+
+
+def get_dashboard_stats():
+    today = timezone.localdate()
+    return get_or_refresh(dashboard_stats_key(today), lambda: compute_dashboard_stats(today), ttl=_ttl())
+
+
+async def aget_dashboard_stats():
+    today = timezone.localdate()
+    return await aget_or_refresh(
+        dashboard_stats_key(today), lambda: in_own_connection(compute_dashboard_stats, today), ttl=_ttl()
+    )
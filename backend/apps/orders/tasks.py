@@ -0,0 +1,197 @@
+"""
+Celery tasks for orders.
+
+Work that follows an order runs after its transaction commits, so checkout
+only pays for writing the order itself. order_placed() and order_changed()
+are registered with transaction.on_commit() by the serializer and the
+signal receivers and enqueue:
+
+- send_order_confirmation: e-mails the customer, once per order
+- check_low_stock: alerts once a day per product that falls to
+  LOW_STOCK_THRESHOLD
+- rebuild_sales_day, refresh_customer and expire_order_caches: keep the
+  daily sales rollup, customer lifetime metrics and dashboard figures in
+  step with the orders table
+
+The last three are coalesced. The first change in a window of
+ORDER_PIPELINE_BATCH_SECONDS schedules one run at the end of the window
+and later changes in the same window ride along with it. They recompute
+from the orders table, so a run that is repeated or late still gives the
+right answer; reconcile_daily_sales repairs anything a lost task missed.
+
+release_expired_reservations runs on beat when INVENTORY_RESERVATION_TTL
+is set and cancels pending orders whose stock reservation has expired.
+
+Every task retries with exponential backoff on database and mail errors.
+With CELERY_TASK_ALWAYS_EAGER the tasks run in-process as soon as they are
+enqueued.
+"""
+import logging
+from datetime import date, timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import mail_admins, send_mail
+from django.db import DatabaseError
+from django.utils import timezone
+
+from apps.core.cache import expire
+from apps.core.metrics import BUSINESS_METRICS_KEY
+from apps.customers.metrics import refresh_customer_metrics
+from apps.customers.models import Customer
+from apps.products.models import Product
+from . import inventory
+from .models import Order
+from .rollup import rebuild_daily_sales
+from .stats import dashboard_stats_key
+
+
+logger = logging.getLogger(__name__)
+
+# smtplib errors are OSErrors
+RETRY_OPTIONS = {
+    'autoretry_for': (DatabaseError, OSError),
+    'retry_backoff': 2,
+    'retry_backoff_max': 300,
+    'retry_jitter': True,
+    'max_retries': 6,
+    'acks_late': True,
+}
+
+
+def batch_seconds():
+    return getattr(settings, 'ORDER_PIPELINE_BATCH_SECONDS', 5)
+
+
+def _pending_key(name, *args):
+    return ':'.join(['order-pipeline', name, *map(str, args)])
+
+
+def _enqueue_once(task, *args):
+    """Run ``task`` at the end of the current window unless a run is already pending"""
+    window = batch_seconds()
+    # The marker outlives the window so a busy queue cannot schedule duplicates
+    if cache.add(_pending_key(task.name, *args), True, window + 300):
+        task.apply_async(args, countdown=window)
+
+
+def _claim(task_name, *args):
+    # Clear the marker before working, so changes that arrive during the run
+    # schedule another one instead of being missed
+    cache.delete(_pending_key(task_name, *args))
+
+
+def order_placed(order_id, product_ids):
+    """on_commit hook for a new order from checkout"""
+    send_order_confirmation.delay(order_id)
+    if product_ids:
+        check_low_stock.delay(sorted(product_ids))
+
+
+def order_changed(day, customer_id):
+    """on_commit hook for an order created, changed or deleted on ``day``"""
+    _enqueue_once(rebuild_sales_day, day.isoformat())
+    if customer_id is not None:
+        _enqueue_once(refresh_customer, customer_id)
+    _enqueue_once(expire_order_caches)
+
+
+@shared_task(**RETRY_OPTIONS)
+def send_order_confirmation(order_id):
+    """E-mail the order confirmation; returns False if it was already sent"""
+    # Claim the order first, so a concurrent duplicate finds nothing to claim.
+    # The claim commits on its own: the order row is not locked while the
+    # mail server is slow.
+    claimed_at = timezone.now()
+    claimed = Order.objects.filter(pk=order_id, confirmation_sent_at__isnull=True).update(
+        confirmation_sent_at=claimed_at
+    )
+    if not claimed:
+        return False
+    try:
+        order = Order.objects.with_items().get(pk=order_id)
+        lines = '\n'.join(
+            f'{item.quantity} x {item.product.name}  {item.total_price}' for item in order.items.all()
+        )
+        send_mail(
+            f'Your Ipswich Retail order {order.order_number}',
+            f'Hi {order.customer_first_name},\n\n'
+            f'Thank you for your order {order.order_number}.\n\n'
+            f'{lines}\n\n'
+            f'Subtotal: {order.subtotal}\n'
+            f'Shipping: {order.shipping_cost}\n'
+            f'Tax: {order.tax_amount}\n'
+            f'Total: {order.total_amount}\n',
+            settings.DEFAULT_FROM_EMAIL,
+            [order.customer_email],
+        )
+    except Exception:
+        # Give the claim back so the retry sends the e-mail
+        Order.objects.filter(pk=order_id, confirmation_sent_at=claimed_at).update(confirmation_sent_at=None)
+        raise
+    return True
+
+
+@shared_task(**RETRY_OPTIONS)
+def check_low_stock(product_ids):
+    """Alert about products at or below LOW_STOCK_THRESHOLD; returns the ids alerted"""
+    threshold = getattr(settings, 'LOW_STOCK_THRESHOLD', 5)
+    products = Product.objects.filter(pk__in=product_ids, stock_count__lte=threshold).values_list(
+        'pk', 'name', 'stock_count'
+    )
+    today = timezone.localdate().isoformat()
+    alerted = []
+    for product_id, name, stock_count in products:
+        # One alert per product per day, however many orders cross the line
+        if cache.add(f'low-stock:{product_id}:{today}', True, 24 * 60 * 60):
+            logger.warning('Low stock: product %s (%s) has %s left', product_id, name, stock_count)
+            alerted.append((product_id, name, stock_count))
+    if alerted:
+        try:
+            mail_admins(
+                f'{len(alerted)} product(s) low on stock',
+                '\n'.join(f'{name} (id {product_id}): {stock_count} left' for product_id, name, stock_count in alerted),
+            )
+        except Exception:
+            # Give the claims back so the retry sends the alert
+            cache.delete_many([f'low-stock:{product_id}:{today}' for product_id, _, _ in alerted])
+            raise
+    return [product_id for product_id, _, _ in alerted]
+
+
+@shared_task(**RETRY_OPTIONS)
+def rebuild_sales_day(day):
+    """Recompute the daily sales rollup for ``day`` (YYYY-MM-DD)"""
+    _claim(rebuild_sales_day.name, day)
+    day = date.fromisoformat(day)
+    return rebuild_daily_sales(day, day)
+
+
+@shared_task(**RETRY_OPTIONS)
+def refresh_customer(customer_id):
+    """Recompute one customer's lifetime metrics"""
+    _claim(refresh_customer.name, customer_id)
+    return refresh_customer_metrics(Customer.objects.filter(pk=customer_id))
+
+
+@shared_task(**RETRY_OPTIONS)
+def expire_order_caches():
+    """Mark cached figures that depend on orders as stale"""
+    _claim(expire_order_caches.name)
+    for key in (dashboard_stats_key(timezone.localdate()), BUSINESS_METRICS_KEY):
+        expire(key)
+
+
+@shared_task
+def reconcile_daily_sales(days=None):
+    """Rebuild the last ``days`` days of the daily sales rollup from orders"""
+    days = days or getattr(settings, 'DAILY_SALES_RECONCILE_DAYS', 2)
+    today = timezone.localdate()
+    return rebuild_daily_sales(today - timedelta(days=days - 1), today)
+
+
+@shared_task
+def release_expired_reservations():
+    """Cancel pending orders whose stock reservation has expired"""
+    return inventory.release_expired_reservations()
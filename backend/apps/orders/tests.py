@@ -0,0 +1,920 @@
+"""
+Tests for orders app
+"""
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from celery.contrib.testing.worker import start_worker
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase
+
+from apps.core.models import Category
+from apps.customers.models import Customer
+from apps.products.models import Product
+from ipswich_retail.celery import app as celery_app
+from . import ids
+from .ids import SnowflakeOrderNumberGenerator, decode
+from .inventory import InsufficientStock, release_expired_reservations, reserve_stock
+from .models import DailySalesSummary, Order, OrderItem, StockReservation
+from .serializers import OrderSerializer
+from .rollup import rebuild_daily_sales
+from .stats import compute_dashboard_stats
+from .tasks import (
+    check_low_stock, expire_order_caches, order_changed, rebuild_sales_day, reconcile_daily_sales,
+    refresh_customer, send_order_confirmation,
+)
+
+
+def order_payload(items, **overrides):
+    payload = {
+        'customer_email': 'jane@example.com',
+        'customer_first_name': 'Jane',
+        'customer_last_name': 'Doe',
+        'shipping_address_line1': '1 High Street',
+        'shipping_city': 'Ipswich',
+        'shipping_state': 'Suffolk',
+        'shipping_zip_code': 'IP1 1AA',
+        'order_items': items,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def create_order(**overrides):
+    fields = {
+        'customer_email': 'jane@example.com',
+        'customer_first_name': 'Jane',
+        'customer_last_name': 'Doe',
+        'shipping_address_line1': '1 High Street',
+        'shipping_city': 'Ipswich',
+        'shipping_state': 'Suffolk',
+        'shipping_zip_code': 'IP1 1AA',
+        'subtotal': Decimal('10.00'),
+        'total_amount': Decimal('10.00'),
+    }
+    fields.update(overrides)
+    return Order.objects.create(**fields)
+
+
+class OrderNumberGeneratorTest(TestCase):
+    """Test time-sortable order number generation"""
+
+    def test_numbers_are_unique_and_sorted(self):
+        """Test that numbers increase as strings across threads"""
+        generator = SnowflakeOrderNumberGenerator(node_id=7)
+        numbers = []
+        lock = threading.Lock()
+
+        def worker():
+            batch = [generator() for _ in range(2000)]
+            self.assertEqual(batch, sorted(batch))
+            with lock:
+                numbers.extend(batch)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(numbers)), 8000)
+        self.assertTrue(all(len(number) <= 20 for number in numbers))
+
+    def test_node_id_is_encoded(self):
+        """Test that the node id can be recovered from a number"""
+        number = SnowflakeOrderNumberGenerator(node_id=42)()
+        self.assertEqual((decode(number[len('ORD-'):]) >> 12) & 1023, 42)
+
+    @override_settings(ORDER_NUMBER_NODE_ID='100')
+    def test_worker_slots_get_their_own_node_ids(self):
+        """Test that each gunicorn worker slot adds to the configured node id"""
+        node_ids = []
+        try:
+            for slot in range(3):
+                ids.set_worker_slot(slot)
+                node_ids.append(SnowflakeOrderNumberGenerator().node_id)
+        finally:
+            ids.set_worker_slot(None)
+        self.assertEqual(node_ids, [100, 101, 102])
+
+    def test_taken_number_is_replaced(self):
+        """Test that an order whose generated number is already used gets a new one"""
+        existing = create_order()
+        fresh = SnowflakeOrderNumberGenerator(node_id=1)()
+        with mock.patch('apps.orders.models.generate_order_number', side_effect=[existing.order_number, fresh]):
+            order = create_order()
+        self.assertEqual(order.order_number, fresh)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_orders_get_sortable_numbers(self):
+        """Test that later orders sort after earlier ones by number"""
+        first = create_order()
+        second = create_order()
+        self.assertTrue(first.order_number.startswith('ORD-'))
+        self.assertLess(first.order_number, second.order_number)
+
+    def test_cursor_pagination(self):
+        """Test keyset pagination, newest first"""
+        orders = [create_order() for _ in range(5)]
+        url = reverse('order-list')
+
+        first_page = self.client.get(url, {'cursor': '', 'page_size': 3})
+        second_page = self.client.get(first_page.data['next'])
+
+        numbers = [o['order_number'] for o in first_page.data['results'] + second_page.data['results']]
+        self.assertEqual(numbers, sorted((o.order_number for o in orders), reverse=True))
+        self.assertIsNone(second_page.data['next'])
+
+    def test_cursor_pagination_with_legacy_numbers(self):
+        """Test that legacy random numbers do not sort above newer orders"""
+        start = timezone.now() - timedelta(days=1)
+        orders = [
+            create_order(order_number='ORD-A1B2C3D4'),
+            create_order(),
+            create_order(order_number='ORD-00FF00FF'),
+            create_order(),
+        ]
+        for hours, order in enumerate(orders):
+            Order.objects.filter(pk=order.pk).update(created_at=start + timedelta(hours=hours))
+        url = reverse('order-list')
+
+        first_page = self.client.get(url, {'cursor': '', 'page_size': 3})
+        second_page = self.client.get(first_page.data['next'])
+
+        numbers = [o['order_number'] for o in first_page.data['results'] + second_page.data['results']]
+        self.assertEqual(numbers, [o.order_number for o in reversed(orders)])
+
+
+class InventoryReservationTest(TestCase):
+    """Test stock reservation at checkout"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Electronics')
+        self.phone = Product.objects.create(
+            name='Phone', description='Phone', price=Decimal('100.00'),
+            category=self.category, stock_count=5
+        )
+        self.case = Product.objects.create(
+            name='Case', description='Case', price=Decimal('10.00'),
+            category=self.category, stock_count=1
+        )
+
+    def place_order(self, quantities):
+        order = create_order()
+        for product, quantity in quantities.items():
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=product.price)
+        reserve_stock(order, {product.pk: quantity for product, quantity in quantities.items()})
+        return Order.objects.get(pk=order.pk)
+
+    def test_reserve_decrements_stock(self):
+        """Test that reserving stock decrements every line"""
+        order = create_order()
+        reservations = reserve_stock(order, {self.phone.pk: 2, self.case.pk: 1})
+
+        self.phone.refresh_from_db()
+        self.case.refresh_from_db()
+        self.assertEqual(len(reservations), 2)
+        self.assertEqual(self.phone.stock_count, 3)
+        self.assertEqual(self.case.stock_count, 0)
+
+    def test_insufficient_stock_reserves_nothing(self):
+        """Test that one short line rolls back the whole reservation"""
+        order = create_order()
+        with self.assertRaises(InsufficientStock) as ctx:
+            reserve_stock(order, {self.phone.pk: 2, self.case.pk: 2})
+
+        self.assertEqual(ctx.exception.product_ids, [self.case.pk])
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_count, 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_cancelling_order_releases_stock(self):
+        """Test that cancelling an order returns its stock"""
+        order = create_order()
+        reserve_stock(order, {self.phone.pk: 2})
+
+        order.status = 'cancelled'
+        order.save()
+
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_count, 5)
+        self.assertEqual(order.reservations.get().status, StockReservation.STATUS_RELEASED)
+
+    def test_deleting_order_releases_stock(self):
+        """Test that deleting a pending order returns its stock before the reservations go"""
+        order = self.place_order({self.phone: 3})
+        self.client.force_login(User.objects.create_user(username='jane', password='testpass123'))
+
+        response = self.client.delete(reverse('order-detail', args=[order.order_number]))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_count, 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_reopening_cancelled_order_reserves_stock(self):
+        """Test that a cancelled order moved back to confirmed takes its stock again"""
+        order = self.place_order({self.phone: 2, self.case: 1})
+        order.status = 'cancelled'
+        order.save()
+
+        order.status = 'confirmed'
+        order.save()
+
+        self.phone.refresh_from_db()
+        self.case.refresh_from_db()
+        self.assertEqual((self.phone.stock_count, self.case.stock_count), (3, 0))
+        self.assertEqual(order.reservations.filter(status=StockReservation.STATUS_COMMITTED).count(), 2)
+
+    def test_reopening_without_stock_is_refused(self):
+        """Test that a cancelled order cannot be reopened once its stock has been sold"""
+        order = self.place_order({self.phone: 2, self.case: 1})
+        order.status = 'cancelled'
+        order.save()
+        Product.objects.filter(pk=self.case.pk).update(stock_count=0)
+        self.client.force_login(User.objects.create_user(username='jane', password='testpass123'))
+
+        response = self.client.patch(
+            reverse('order-detail', args=[order.order_number]),
+            json.dumps({'status': 'confirmed'}), content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.json())
+        order.refresh_from_db()
+        self.phone.refresh_from_db()
+        self.assertEqual(order.status, 'cancelled')
+        self.assertEqual(self.phone.stock_count, 5)
+        self.assertFalse(order.reservations.filter(status__in=[
+            StockReservation.STATUS_ACTIVE, StockReservation.STATUS_COMMITTED,
+        ]).exists())
+
+    @override_settings(INVENTORY_RESERVATION_TTL=30 * 60)
+    def test_confirming_order_commits_reservation(self):
+        """Test that confirmed orders keep their stock and stop expiring"""
+        order = create_order()
+        reserve_stock(order, {self.phone.pk: 2})
+
+        order = Order.objects.get(pk=order.pk)
+        order.status = 'confirmed'
+        order.save()
+
+        reservation = order.reservations.get()
+        self.assertEqual(reservation.status, StockReservation.STATUS_COMMITTED)
+        self.assertIsNone(reservation.expires_at)
+        self.assertEqual(release_expired_reservations(timezone.now() + timedelta(days=1)), 0)
+
+    def test_reservations_do_not_expire_by_default(self):
+        """Test that pending orders are not cancelled unless a TTL is set"""
+        order = create_order()
+        reserve_stock(order, {self.phone.pk: 2})
+
+        self.assertEqual(release_expired_reservations(timezone.now() + timedelta(days=1)), 0)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'pending')
+        self.assertIsNone(order.reservations.get().expires_at)
+
+    @override_settings(INVENTORY_RESERVATION_TTL=30 * 60)
+    def test_expired_reservations_are_released(self):
+        """Test that orders left pending past the TTL give their stock back"""
+        order = create_order()
+        reserve_stock(order, {self.phone.pk: 2})
+
+        cancelled = release_expired_reservations(timezone.now() + timedelta(days=1))
+
+        self.assertEqual(cancelled, 1)
+        order.refresh_from_db()
+        self.phone.refresh_from_db()
+        self.assertEqual(order.status, 'cancelled')
+        self.assertEqual(self.phone.stock_count, 5)
+        self.assertEqual(order.reservations.get().status, StockReservation.STATUS_EXPIRED)
+
+
+class OrderCreateAPITest(APITestCase):
+    """Test order creation API"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Electronics')
+        self.product = Product.objects.create(
+            name='Phone', description='Phone', price=Decimal('100.00'),
+            category=self.category, stock_count=1
+        )
+        self.user = User.objects.create_user(username='jane', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_create_order_reserves_stock(self):
+        """Test that placing an order takes stock"""
+        items = [{'product_id': self.product.pk, 'quantity': 1}]
+        response = self.client.post(reverse('order-list'), order_payload(items), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_count, 0)
+
+    def test_create_order_out_of_stock(self):
+        """Test that an order for more than the available stock is rejected"""
+        items = [{'product_id': self.product.pk, 'quantity': 2}]
+        response = self.client.post(reverse('order-list'), order_payload(items), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('order_items', response.data)
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_order_prices_server_side(self):
+        """Test that client-supplied prices and totals are ignored"""
+        self.product.stock_count = 5
+        self.product.save()
+        items = [
+            {'product_id': self.product.pk, 'quantity': 1, 'unit_price': '0.01'},
+            {'product_id': self.product.pk, 'quantity': 2, 'unit_price': '0.01'},
+        ]
+        payload = order_payload(items, subtotal='0.01', total_amount='0.01', shipping_cost='4.99')
+        response = self.client.post(reverse('order-list'), payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['items']), 1)
+        self.assertEqual(response.data['items'][0]['quantity'], 3)
+        self.assertEqual(response.data['items'][0]['unit_price'], '100.00')
+        self.assertEqual(response.data['items'][0]['total_price'], '300.00')
+        self.assertEqual(response.data['subtotal'], '300.00')
+        self.assertEqual(response.data['total_amount'], '304.99')
+
+    def test_create_order_unknown_product(self):
+        """Test that unknown or inactive products are rejected up front"""
+        items = [{'product_id': self.product.pk + 100, 'quantity': 1}]
+        response = self.client.post(reverse('order-list'), order_payload(items), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('order_items', response.data)
+        self.assertFalse(Order.objects.exists())
+
+
+class IdempotentOrderCreateTest(APITestCase):
+    """Test Idempotency-Key handling on order submission"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Electronics')
+        self.product = Product.objects.create(
+            name='Phone', description='Phone', price=Decimal('100.00'),
+            category=self.category, stock_count=10
+        )
+        self.user = User.objects.create_user(username='jane', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('order-list')
+        self.payload = order_payload([{'product_id': self.product.pk, 'quantity': 1}])
+
+    def test_retry_replays_first_response(self):
+        """Test that a retried submission does not create a second order"""
+        first = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+        with CaptureQueriesContext(connection) as ctx:
+            retry = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['order_number'], first.data['order_number'])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse([q for q in ctx.captured_queries if 'orders_' in q['sql']])
+
+    def test_key_reused_with_different_payload(self):
+        """Test that a key cannot be reused for a different order"""
+        self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+        other = order_payload([{'product_id': self.product.pk, 'quantity': 2}])
+        response = self.client.post(self.url, other, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_duplicate_waits_for_in_flight_request(self):
+        """Test that a duplicate arriving mid-flight gets the first request's result"""
+        from apps.core import idempotency
+
+        first = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+        cache_key = idempotency.cache_key_for(self.user.pk, self.url, 'abc-123')
+        finished = cache.get(cache_key)
+
+        # Pretend the first request is still running, then let it finish shortly
+        cache.set(cache_key, {'state': idempotency.IN_FLIGHT, 'fingerprint': finished['fingerprint']})
+        timer = threading.Timer(0.1, cache.set, args=(cache_key, finished))
+        timer.start()
+        response = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+        timer.join()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['order_number'], first.data['order_number'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_request_can_be_retried(self):
+        """Test that rejected submissions do not pin the key"""
+        self.product.stock_count = 0
+        self.product.save()
+        failed = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.product.stock_count = 1
+        self.product.save()
+        retry = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+
+        self.assertEqual(failed.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+
+
+class OrderListQueryTest(APITestCase):
+    """Test that order lists read denormalised item counts"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Electronics')
+        product = Product.objects.create(
+            name='Phone', description='Phone', price=Decimal('100.00'),
+            category=category, stock_count=10
+        )
+        for _ in range(30):
+            order = create_order()
+            OrderItem.objects.create(order=order, product=product, quantity=3, unit_price=product.price)
+        self.admin_user = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+
+    def test_item_counts_follow_items(self):
+        """Test that editing items one at a time keeps the counts current"""
+        order = Order.objects.first()
+        self.assertEqual((order.items_count, order.units_count), (1, 3))
+
+        order.items.get().delete()
+        order.refresh_from_db()
+        self.assertEqual((order.items_count, order.units_count), (0, 0))
+
+    def test_admin_order_list_query_count(self):
+        """Test that a page of 100 admin orders takes one query once the total is cached"""
+        self.client.force_authenticate(user=self.admin_user)
+        self.client.get(reverse('admin-order-list'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('admin-order-list'), {'pageSize': 100})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['orders']), 30)
+        self.assertEqual(response.data['orders'][0]['items_count'], 1)
+        self.assertEqual(response.data['orders'][0]['units_count'], 3)
+
+    def test_public_order_list_query_count(self):
+        """Test that the order list does not query per order"""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('order-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['items_count'], 1)
+
+
+class OrderCreateQueryCountTest(TestCase):
+    """Test that order creation does not issue queries per line"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Electronics')
+        self.products = [
+            Product.objects.create(
+                name=f'Product {i}', description='Product', price=Decimal('1.50'),
+                category=self.category, stock_count=10
+            )
+            for i in range(50)
+        ]
+
+    def place_order(self, products):
+        serializer = OrderSerializer(data=order_payload(
+            [{'product_id': product.pk, 'quantity': 1} for product in products]
+        ))
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as ctx:
+            serializer.save()
+            data = serializer.data
+        return len(ctx.captured_queries), data
+
+    def test_query_count_independent_of_lines(self):
+        """Test that a 50-line order costs the same queries as a 2-line order"""
+        small_queries, _ = self.place_order(self.products[:2])
+        large_queries, data = self.place_order(self.products)
+
+        self.assertEqual(len(data['items']), 50)
+        self.assertEqual(data['subtotal'], '75.00')
+        self.assertEqual(small_queries, large_queries)
+
+
+class OrderCustomerLinkTest(TestCase):
+    """Test the link from orders to customers"""
+
+    def test_order_linked_on_creation(self):
+        """Test that a new order is matched to the customer by e-mail"""
+        customer = Customer.objects.create(email='jane@example.com', first_name='Jane', last_name='Doe')
+        self.assertEqual(create_order().customer, customer)
+        self.assertIsNone(create_order(customer_email='guest@example.com').customer)
+
+    def test_backfill_command(self):
+        """Test that the backfill links old orders in batches and can be rerun"""
+        customer = Customer.objects.create(email='jane@example.com', first_name='Jane', last_name='Doe')
+        orders = [create_order() for _ in range(5)]
+        guest = create_order(customer_email='guest@example.com')
+        Order.objects.update(customer=None)
+
+        out = StringIO()
+        call_command('backfill_order_customers', batch_size=2, stdout=out)
+        self.assertIn('Linked 5 of 6 orders', out.getvalue())
+        self.assertEqual(customer.orders.count(), len(orders))
+        self.assertIsNone(Order.objects.get(pk=guest.pk).customer)
+
+        out = StringIO()
+        call_command('backfill_order_customers', stdout=out)
+        self.assertIn('Linked 0 of 1 orders', out.getvalue())
+
+
+class DailySalesRollupTest(TestCase):
+    """Test the daily sales rollup"""
+
+    def rollup(self):
+        return {
+            row.status: (row.order_count, row.revenue)
+            for row in DailySalesSummary.objects.filter(date=timezone.localdate())
+        }
+
+    def test_follows_order_lifecycle(self):
+        """Test that creating, confirming and deleting orders moves them between rows once committed"""
+        with self.captureOnCommitCallbacks(execute=True):
+            first = create_order(total_amount=Decimal('10.00'))
+            create_order(total_amount=Decimal('5.50'))
+        self.assertEqual(self.rollup(), {'pending': (2, Decimal('15.50'))})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.status = 'confirmed'
+            first.save()
+        self.assertEqual(self.rollup(), {
+            'pending': (1, Decimal('5.50')),
+            'confirmed': (1, Decimal('10.00')),
+        })
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertNotIn('confirmed', self.rollup())
+
+    def test_reconcile_repairs_drift(self):
+        """Test that the reconcile task corrects changes made behind the signals' back"""
+        order = create_order(total_amount=Decimal('10.00'))
+        Order.objects.filter(pk=order.pk).update(status='shipped', total_amount=Decimal('12.00'))
+
+        self.assertEqual(reconcile_daily_sales.delay().get(), 1)
+        self.assertEqual(self.rollup(), {'shipped': (1, Decimal('12.00'))})
+
+    def test_backfill_command(self):
+        """Test that the backfill builds rows for old orders in chunks"""
+        order = create_order()
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=40))
+        DailySalesSummary.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_daily_sales', chunk_days=7, stdout=out)
+
+        self.assertIn('1 rows', out.getvalue())
+        summary = DailySalesSummary.objects.get()
+        self.assertEqual(summary.date, timezone.localdate(timezone.now() - timedelta(days=40)))
+        self.assertEqual(summary.order_count, 1)
+
+
+class DashboardStatsTest(APITestCase):
+    """Test the shared dashboard statistics"""
+
+    def setUp(self):
+        cache.clear()
+        create_order(status='confirmed', total_amount=Decimal('30.00'))
+        create_order(status='delivered', total_amount=Decimal('10.00'))
+        create_order(status='cancelled', total_amount=Decimal('99.00'))
+        create_order(status='pending', total_amount=Decimal('50.00'))
+        old = create_order(status='shipped', total_amount=Decimal('20.00'))
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        rebuild_daily_sales(timezone.localdate() - timedelta(days=30), timezone.localdate())
+        self.admin_user = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+
+    def test_figures(self):
+        """Test revenue, averages and the daily series"""
+        with self.assertNumQueries(1):
+            stats = compute_dashboard_stats()
+
+        self.assertEqual(stats['ordersToday'], 4)
+        self.assertEqual(stats['revenueToday'], 40.0)
+        self.assertEqual(stats['avgOrderValue'], 20.0)
+        self.assertEqual(stats['errorRate'], 20.0)
+        self.assertEqual(len(stats['ordersLast7Days']), 7)
+        self.assertEqual(stats['ordersLast7Days'][-1], {
+            'date': timezone.localdate().isoformat(), 'orders': 4
+        })
+        self.assertEqual(sum(day['orders'] for day in stats['ordersLast7Days']), 4)
+
+    def test_endpoints_agree(self):
+        """Test that all dashboard endpoints serve the same cached figures"""
+        self.client.force_authenticate(user=self.admin_user)
+        first = self.client.get(reverse('admin-dashboard'))
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('admin-dashboard-stats'))
+            third = self.client.get(reverse('dashboard-stats'))
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.data, third.data)
+
+
+class AnalyticsTimeseriesTest(APITestCase):
+    """Test the admin sales time series"""
+
+    def setUp(self):
+        cache.clear()
+        phones = Category.objects.create(name='Phones')
+        laptops = Category.objects.create(name='Laptops')
+        self.phone = Product.objects.create(
+            name='Phone', description='Phone', price=Decimal('100.00'),
+            category=phones, brand='Acme', stock_count=10
+        )
+        self.laptop = Product.objects.create(
+            name='Laptop', description='Laptop', price=Decimal('500.00'),
+            category=laptops, brand='Globex', stock_count=10
+        )
+        # 2025-03-03 is a Monday
+        self.place(date(2025, 3, 3), [(self.phone, 1)], status='confirmed')
+        self.place(date(2025, 3, 4), [(self.phone, 2), (self.laptop, 1)], status='delivered', country='GB')
+        self.place(date(2025, 3, 12), [(self.laptop, 1)], status='shipped', country='GB')
+        self.place(date(2025, 3, 12), [(self.phone, 1)], status='cancelled')
+        rebuild_daily_sales(date(2025, 3, 1), date(2025, 3, 31))
+
+        self.admin_user = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.client.force_authenticate(user=self.admin_user)
+
+    def place(self, day, lines, status, country='US'):
+        subtotal = sum(product.price * quantity for product, quantity in lines)
+        order = create_order(status=status, shipping_country=country, subtotal=subtotal, total_amount=subtotal)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity,
+                      unit_price=product.price, total_price=product.price * quantity)
+            for product, quantity in lines
+        ])
+        created_at = timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=12))
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+
+    def get(self, **params):
+        params.setdefault('start', '2025-03-01')
+        params.setdefault('end', '2025-03-14')
+        return self.client.get(reverse('admin-analytics-timeseries'), params)
+
+    def test_weekly_totals(self):
+        """Test weekly revenue, orders and average order value"""
+        response = self.get(interval='week')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['buckets'], ['2025-02-24', '2025-03-03', '2025-03-10'])
+        series = response.data['series']
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]['revenue'], [0.0, 800.0, 500.0])
+        self.assertEqual(series[0]['orders'], [0, 2, 1])
+        self.assertEqual(series[0]['aov'], [0.0, 400.0, 500.0])
+
+    def test_breakdown_by_category(self):
+        """Test that category revenue is the sum of that category's lines"""
+        response = self.get(interval='month', group_by='category')
+
+        series = {s['label']: s for s in response.data['series']}
+        self.assertEqual(response.data['buckets'], ['2025-03-01'])
+        self.assertEqual(series['Phones']['revenue'], [300.0])
+        self.assertEqual(series['Phones']['orders'], [2])
+        self.assertEqual(series['Laptops']['revenue'], [1000.0])
+        self.assertEqual(series['Laptops']['orders'], [2])
+
+    def test_breakdown_by_brand_and_country(self):
+        """Test brand and shipping country breakdowns"""
+        brands = {s['key']: s['totalRevenue'] for s in self.get(group_by='brand').data['series']}
+        countries = {s['key']: s['totalOrders'] for s in self.get(group_by='country').data['series']}
+
+        self.assertEqual(brands, {'Acme': 300.0, 'Globex': 1000.0})
+        self.assertEqual(countries, {'GB': 2, 'US': 1})
+
+    def test_custom_interval_and_statuses(self):
+        """Test N-day buckets and an explicit status filter"""
+        response = self.get(interval='7d', status='cancelled')
+
+        self.assertEqual(response.data['buckets'], ['2025-03-01', '2025-03-08'])
+        self.assertEqual(response.data['series'][0]['orders'], [0, 1])
+
+    def test_invalid_parameters(self):
+        """Test that bad parameters are rejected"""
+        self.assertEqual(self.get(interval='fortnight').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get(group_by='colour').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get(start='2025-04-01').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_admin(self):
+        """Test that non-staff users cannot read analytics"""
+        self.client.force_authenticate(user=User.objects.create_user(username='shopper', password='testpass123'))
+        self.assertEqual(self.get().status_code, status.HTTP_403_FORBIDDEN)
+
+
+class OrderPipelineTest(APITestCase):
+    """Test the work deferred until an order is committed"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Electronics')
+        self.product = Product.objects.create(
+            name='Phone', description='Phone', price=Decimal('100.00'),
+            category=self.category, stock_count=7
+        )
+        self.client.force_authenticate(user=User.objects.create_user(username='jane', password='testpass123'))
+
+    def place_order(self, quantity=1):
+        items = [{'product_id': self.product.pk, 'quantity': quantity}]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post(reverse('order-list'), order_payload(items), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Order.objects.get(order_number=response.data['order_number']), callbacks
+
+    def test_nothing_runs_before_commit(self):
+        """Test that checkout only registers the work for after the commit"""
+        items = [{'product_id': self.product.pk, 'quantity': 1}]
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('order-list'), order_payload(items), format='json')
+
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(DailySalesSummary.objects.exists())
+
+    def test_confirmation_sent_once(self):
+        """Test that the confirmation e-mail is idempotent"""
+        order, _ = self.place_order()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(order.order_number, mail.outbox[0].subject)
+        self.assertEqual(mail.outbox[0].to, ['jane@example.com'])
+        self.assertIsNotNone(Order.objects.get(pk=order.pk).confirmation_sent_at)
+        self.assertFalse(send_order_confirmation.delay(order.pk).get())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_confirmation_retried_after_mail_error(self):
+        """Test that a failed send is retried and not marked as sent"""
+        order, _ = self.place_order()
+        Order.objects.filter(pk=order.pk).update(confirmation_sent_at=None)
+        mail.outbox.clear()
+
+        with mock.patch('apps.orders.tasks.send_mail', side_effect=[ConnectionRefusedError, 1]) as send:
+            send_order_confirmation.apply(args=(order.pk,))
+        self.assertEqual(send.call_count, 2)
+        self.assertIsNotNone(Order.objects.get(pk=order.pk).confirmation_sent_at)
+
+    def test_confirmation_sent_outside_transaction(self):
+        """Test that the order row is not held in a transaction while the mail is sent"""
+        order, _ = self.place_order()
+        Order.objects.filter(pk=order.pk).update(confirmation_sent_at=None)
+        depth = len(connection.savepoint_ids)
+
+        def send(*args, **kwargs):
+            self.assertEqual(len(connection.savepoint_ids), depth)
+            self.assertIsNotNone(Order.objects.get(pk=order.pk).confirmation_sent_at)
+            return 1
+
+        with mock.patch('apps.orders.tasks.send_mail', side_effect=send) as send_mail:
+            self.assertTrue(send_order_confirmation(order.pk))
+        self.assertEqual(send_mail.call_count, 1)
+
+    @override_settings(LOW_STOCK_THRESHOLD=5, ADMINS=[('Stock', 'stock@example.com')])
+    def test_low_stock_alerts_once_a_day(self):
+        """Test that crossing the threshold alerts the admins once"""
+        self.place_order(quantity=1)
+        self.assertEqual(len(mail.outbox), 1)
+
+        self.place_order(quantity=1)
+        self.place_order(quantity=1)
+        alerts = [message for message in mail.outbox if 'low on stock' in message.subject]
+        self.assertEqual(len(alerts), 1)
+        self.assertIn('Phone (id', alerts[0].body)
+
+    @override_settings(LOW_STOCK_THRESHOLD=5, ADMINS=[('Stock', 'stock@example.com')])
+    def test_low_stock_alert_retried_after_mail_error(self):
+        """Test that a failed alert is sent by the retry"""
+        Product.objects.filter(pk=self.product.pk).update(stock_count=2)
+
+        with mock.patch('apps.orders.tasks.mail_admins', side_effect=[ConnectionRefusedError, None]) as send:
+            result = check_low_stock.apply(args=([self.product.pk],))
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(result.get(), [self.product.pk])
+
+    def test_rollup_refreshes_are_coalesced(self):
+        """Test that changes within one window schedule a single rebuild per day"""
+        today = timezone.localdate()
+        with mock.patch.object(rebuild_sales_day, 'apply_async') as rebuild, \
+                mock.patch.object(refresh_customer, 'apply_async'), \
+                mock.patch.object(expire_order_caches, 'apply_async') as expire:
+            for _ in range(3):
+                order_changed(today, None)
+            self.assertEqual(rebuild.call_count, 1)
+            self.assertEqual(expire.call_count, 1)
+
+            # Once the run starts, later changes schedule the next run
+            rebuild_sales_day(today.isoformat())
+            order_changed(today, None)
+            self.assertEqual(rebuild.call_count, 2)
+
+    def test_dashboard_cache_expired(self):
+        """Test that a new order marks the cached dashboard figures as stale"""
+        staff = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.client.force_authenticate(user=staff)
+        self.assertEqual(self.client.get(reverse('admin-dashboard-stats')).data['ordersToday'], 0)
+
+        self.place_order()
+        self.assertEqual(self.client.get(reverse('admin-dashboard-stats')).data['ordersToday'], 1)
+
+
+class OrderWorkerTest(TransactionTestCase):
+    """Test the order pipeline through a real worker on the in-memory broker"""
+
+    @override_settings(ORDER_PIPELINE_BATCH_SECONDS=0)
+    def test_worker_processes_committed_order(self):
+        """Test that a queued order is confirmed and rolled up by the worker"""
+        if not celery_app.conf.broker_url.startswith('memory://'):
+            self.skipTest('needs the in-memory broker')
+        cache.clear()
+        category = Category.objects.create(name='Electronics')
+        product = Product.objects.create(
+            name='Phone', description='Phone', price=Decimal('100.00'), category=category, stock_count=5
+        )
+        # Settings are namespaced, so the override uses the Django name
+        eager = celery_app.conf.CELERY_TASK_ALWAYS_EAGER
+        celery_app.conf.CELERY_TASK_ALWAYS_EAGER = False
+        try:
+            with start_worker(celery_app, pool='solo', perform_ping_check=False):
+                serializer = OrderSerializer(data=order_payload([{'product_id': product.pk, 'quantity': 2}]))
+                serializer.is_valid(raise_exception=True)
+                order = serializer.save()
+
+                deadline = time.monotonic() + 10
+                while time.monotonic() < deadline and not DailySalesSummary.objects.exists():
+                    time.sleep(0.05)
+        finally:
+            celery_app.conf.CELERY_TASK_ALWAYS_EAGER = eager
+
+        self.assertIsNotNone(Order.objects.get(pk=order.pk).confirmation_sent_at)
+        self.assertEqual(len(mail.outbox), 1)
+        summary = DailySalesSummary.objects.get()
+        self.assertEqual((summary.status, summary.order_count), ('pending', 1))
+
+
+class CheckoutStressTest(TransactionTestCase):
+    """Test that concurrent checkouts never oversell"""
+
+    def test_concurrent_checkouts_do_not_oversell(self):
+        """Test many buyers racing for a few units"""
+        category = Category.objects.create(name='Flash Sale')
+        product = Product.objects.create(
+            name='Hot Item', description='Hot item', price=Decimal('5.00'),
+            category=category, stock_count=10
+        )
+        sold = []
+        lock = threading.Lock()
+
+        def buyer():
+            try:
+                for _ in range(5):
+                    serializer = OrderSerializer(data=order_payload([{'product_id': product.pk, 'quantity': 1}]))
+                    try:
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save()
+                    except (ValidationError, OperationalError):
+                        # Sold out, or SQLite lock contention on the shared test database
+                        continue
+                    with lock:
+                        sold.append(1)
+            finally:
+                # Django ignores close() on in-memory SQLite, and a lingering
+                # connection can hold table locks that break the test flush
+                if connection.vendor == 'sqlite' and connection.connection is not None:
+                    connection.connection.close()
+                    connection.connection = None
+                else:
+                    connection.close()
+
+        threads = [threading.Thread(target=buyer) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        reserved = sum(StockReservation.objects.filter(product=product).values_list('quantity', flat=True))
+        self.assertGreater(len(sold), 0)
+        self.assertLessEqual(len(sold), reserved)
+        self.assertEqual(product.stock_count + reserved, 10)
+        # Every order that was committed holds stock; none exists without it
+        self.assertEqual(Order.objects.count(), StockReservation.objects.count())
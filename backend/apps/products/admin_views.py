@@ -2,13 +2,13 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from apps.core.pagination import AdminPagination
 from django.shortcuts import get_object_or_404
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.conf import settings
 import json
 import os
-from PIL import Image
 from .models import Product, ProductImage
 from .serializers import ProductDetailSerializer, ProductListSerializer, AdminProductSerializer
 
@@ -17,7 +17,7 @@ class AdminProductListView(generics.ListCreateAPIView):
     """
     List all products or create a new product for admin panel
     """
-    queryset = Product.objects.all().select_related('category').prefetch_related('images', 'tags')
+    queryset = Product.objects.for_listing()
     serializer_class = AdminProductSerializer
     permission_classes = [IsAdminUser]
 
@@ -26,7 +26,7 @@ class AdminProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a product for admin panel
     """
-    queryset = Product.objects.all().select_related('category').prefetch_related('images', 'tags')
+    queryset = Product.objects.for_listing()
     serializer_class = AdminProductSerializer
     permission_classes = [IsAdminUser]
 
@@ -48,17 +48,14 @@ def admin_product_list_create(request):
     """
     if request.method == 'GET':
         # List products
-        products = Product.objects.all().select_related('category').prefetch_related('images', 'tags')
-        serializer = AdminProductSerializer(products, many=True, context={'request': request})
-        return Response({
-            'products': serializer.data,
-            'meta': {
-                'total': products.count(),
-                'page': 1,
-                'pageSize': 20,
-                'totalPages': 1
-            }
-        })
+        products = Product.objects.for_listing()
+        paginator = AdminPagination(results_key='products')
+        page = paginator.paginate_queryset(products, request)
+        serializer = AdminProductSerializer(page, many=True, context={'request': request})
+        response = paginator.get_paginated_response(serializer.data)
+        # 'total' predates the shared meta block; kept for existing clients
+        response.data['meta']['total'] = paginator.total
+        return response
     
     elif request.method == 'POST':
         # Create product using DRF serializer
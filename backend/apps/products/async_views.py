@@ -0,0 +1,23 @@
+"""
+Async product views, served instead of the ones in views.py with
+ASYNC_VIEWS (see apps.core.aio)
+"""
+from apps.core.aio import async_api_view, list_response, render_json, retrieve_response
+from . import views
+
+
+@async_api_view(views.ProductListView.as_view())
+async def product_list(request):
+    return await list_response(views.ProductListView, request)
+
+
+@async_api_view(views.ProductDetailView.as_view())
+async def product_detail(request, slug):
+    return await retrieve_response(views.ProductDetailView, request, slug=slug)
+
+
+@async_api_view(views.product_batch)
+async def product_batch(request):
+    ids = views.batch_ids(request.query_params)
+    products = [product async for product in views.batch_queryset(ids)]
+    return render_json(views.batch_data(ids, products, {'request': request}))
@@ -4,6 +4,16 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.core.models import Category
 
 
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Load everything ProductListSerializer reads in a fixed number of queries"""
+        return self.prefetch_related(
+            models.Prefetch('category', queryset=Category.objects.with_product_count()),
+            'images',
+            'tags',
+        )
+
+
 class Product(models.Model):
     name = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
@@ -20,6 +30,8 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
 
@@ -31,6 +43,15 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def primary_image(self):
+        """The image flagged primary, else the first image. Uses prefetched images when present."""
+        images = list(self.images.all())
+        for image in images:
+            if image.is_primary:
+                return image
+        return images[0] if images else None
+
     @property
     def in_stock(self):
         return self.stock_count > 0
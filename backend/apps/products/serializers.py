@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.conf import settings
 from .models import Product, ProductImage, ProductSpecification, ProductTag
+from apps.core.profiling import ProfiledSerializerMixin
 from apps.core.serializers import CategorySerializer
 
 
@@ -32,7 +33,7 @@ class ProductTagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug']
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     primary_image = serializers.SerializerMethodField()
     in_stock = serializers.ReadOnlyField()
@@ -54,13 +55,9 @@ class ProductListSerializer(serializers.ModelSerializer):
         ]
 
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_image = obj.primary_image
         if primary_image:
             return ProductImageSerializer(primary_image).data
-        # Fallback to first image if no primary image
-        first_image = obj.images.first()
-        if first_image:
-            return ProductImageSerializer(first_image).data
         return None
 
 
@@ -72,7 +69,7 @@ class ProductDetailSerializer(ProductListSerializer):
         fields = ProductListSerializer.Meta.fields + ['images', 'specifications']
 
 
-class AdminProductSerializer(serializers.ModelSerializer):
+class AdminProductSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     """Admin serializer for creating and updating products"""
     category = CategorySerializer(read_only=True)
     category_id = serializers.IntegerField(write_only=True)
@@ -91,13 +88,9 @@ class AdminProductSerializer(serializers.ModelSerializer):
         ]
 
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_image = obj.primary_image
         if primary_image:
             return ProductImageSerializer(primary_image, context=self.context).data
-        # Fallback to first image if no primary image
-        first_image = obj.images.first()
-        if first_image:
-            return ProductImageSerializer(first_image, context=self.context).data
         return None
 
     def create(self, validated_data):
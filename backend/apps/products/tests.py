@@ -1,6 +1,7 @@
 """
 Tests for products app
 """
+from asgiref.sync import sync_to_async
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
@@ -9,7 +10,9 @@ from django.contrib.auth.models import User
 from decimal import Decimal
 
 from .models import Product, ProductImage, ProductSpecification, ProductTag
+from .views import MAX_BATCH_IDS
 from apps.core.models import Category
+from apps.core.testing import async_urlconf, seed_dataset
 
 
 class ProductModelTest(TestCase):
@@ -232,6 +235,78 @@ class ProductAPITest(APITestCase):
         self.assertEqual(response.data['price'], '89.99')
 
 
+class ProductBatchTest(APITestCase):
+    """Test looking up products by id"""
+
+    def setUp(self):
+        self.products = seed_dataset(3)['products']
+
+    def test_results_in_requested_order(self):
+        """Test that products come back in the order asked for, with unknown ids listed"""
+        self.products[1].is_active = False
+        self.products[1].save()
+        ids = [self.products[2].pk, self.products[1].pk, 999999, self.products[0].pk, self.products[2].pk]
+
+        response = self.client.get(reverse('product-batch'), {'ids': ','.join(map(str, ids))})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [product['slug'] for product in response.data['results']],
+            [self.products[2].slug, self.products[0].slug],
+        )
+        self.assertEqual(response.data['missing'], [self.products[1].pk, 999999])
+
+    def test_invalid_ids(self):
+        """Test that missing, malformed and too many ids are rejected"""
+        too_many = ','.join(str(i) for i in range(MAX_BATCH_IDS + 1))
+        for ids in ('', 'a,b', too_many):
+            with self.subTest(ids=ids[:10]):
+                response = self.client.get(reverse('product-batch'), {'ids': ids})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('ids', response.data)
+
+
+class AsyncProductViewsTest(TestCase):
+    """Test that the async product views answer as the DRF views do"""
+
+    def setUp(self):
+        self.products = seed_dataset(6)['products']
+
+    async def assertSameResponse(self, path, params=None, method='get'):
+        expected = await sync_to_async(getattr(self.client, method))(path, params)
+        with self.settings(ROOT_URLCONF=async_urlconf()):
+            response = await getattr(self.async_client, method)(path, params)
+        self.assertEqual(response.status_code, expected.status_code, path)
+        self.assertEqual(response.json(), expected.json(), path)
+
+    async def test_list(self):
+        """Test filtering, ordering, search and pagination"""
+        for params in (
+            {},
+            {'page_size': 2, 'page': 2},
+            {'ordering': '-price', 'featured': 'true'},
+            {'search': self.products[0].name},
+            {'page': 99},
+        ):
+            with self.subTest(params=params):
+                await self.assertSameResponse(reverse('product-list'), params)
+
+    async def test_detail(self):
+        """Test a product and an unknown slug"""
+        await self.assertSameResponse(reverse('product-detail', kwargs={'slug': self.products[0].slug}))
+        await self.assertSameResponse(reverse('product-detail', kwargs={'slug': 'no-such-product'}))
+
+    async def test_batch(self):
+        """Test a batch lookup and a rejected one"""
+        ids = f'{self.products[3].pk},{self.products[1].pk},999999'
+        await self.assertSameResponse(reverse('product-batch'), {'ids': ids})
+        await self.assertSameResponse(reverse('product-batch'), {'ids': 'x'})
+
+    async def test_other_methods_use_drf_view(self):
+        """Test that writes are answered by the DRF view"""
+        await self.assertSameResponse(reverse('product-list'), {}, method='post')
+
+
 class ProductSpecificationTest(TestCase):
     """Test ProductSpecification model"""
     
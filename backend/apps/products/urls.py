@@ -1,9 +1,20 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_VIEWS:
+    from . import async_views
+
+    list_view, batch_view, detail_view = async_views.product_list, async_views.product_batch, async_views.product_detail
+else:
+    list_view, batch_view, detail_view = (
+        views.ProductListView.as_view(), views.product_batch, views.ProductDetailView.as_view()
+    )
+
 urlpatterns = [
-    path('', views.ProductListView.as_view(), name='product-list'),
-    path('<slug:slug>/', views.ProductDetailView.as_view(), name='product-detail'),
+    path('', list_view, name='product-list'),
+    path('batch/', batch_view, name='product-batch'),
+    path('<slug:slug>/', detail_view, name='product-detail'),
     path('create/', views.ProductCreateView.as_view(), name='product-create'),
     path('<slug:slug>/update/', views.ProductUpdateView.as_view(), name='product-update'),
 ]
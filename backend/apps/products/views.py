@@ -1,5 +1,6 @@
 from rest_framework import generics, filters, status
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
@@ -16,7 +17,7 @@ class ProductListView(generics.ListAPIView):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        queryset = Product.objects.filter(is_active=True).select_related('category').prefetch_related('images', 'tags')
+        queryset = Product.objects.filter(is_active=True).for_listing()
         
         # Filter by category slug
         category_slug = self.request.query_params.get('category')
@@ -49,9 +50,45 @@ class ProductDetailView(generics.RetrieveAPIView):
     lookup_field = 'slug'
     
     def get_queryset(self):
-        return Product.objects.filter(is_active=True).select_related('category').prefetch_related(
-            'images', 'specifications', 'tags'
-        )
+        return Product.objects.filter(is_active=True).for_listing().prefetch_related('specifications')
+
+
+MAX_BATCH_IDS = 100
+
+
+def batch_ids(query_params):
+    """The product ids in ``?ids=1,2,3``, without repeats, in the order given"""
+    try:
+        ids = list(dict.fromkeys(int(value) for value in query_params.get('ids', '').split(',') if value.strip()))
+    except ValueError:
+        raise ValidationError({'ids': 'Expected a comma-separated list of product ids.'})
+    if not ids:
+        raise ValidationError({'ids': 'This parameter is required.'})
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValidationError({'ids': f'At most {MAX_BATCH_IDS} ids per request.'})
+    return ids
+
+
+def batch_queryset(ids):
+    return Product.objects.filter(is_active=True, pk__in=ids).for_listing()
+
+
+def batch_data(ids, products, context):
+    found = {product.pk: product for product in products}
+    return {
+        'results': ProductListSerializer([found[pk] for pk in ids if pk in found], many=True, context=context).data,
+        'missing': [pk for pk in ids if pk not in found],
+    }
+
+
+@api_view(['GET'])
+def product_batch(request):
+    """
+    Products by id, in the order asked for: ?ids=1,2,3 (at most 100).
+    Ids that are unknown or of inactive products are listed in ``missing``.
+    """
+    ids = batch_ids(request.query_params)
+    return Response(batch_data(ids, batch_queryset(ids), {'request': request}))
 
 
 class ProductCreateView(generics.CreateAPIView):
@@ -0,0 +1,132 @@
+"""
+Gunicorn configuration
+
+The app is preloaded and warmed up in the master (apps.core.warmup), then
+frozen out of the garbage collector's reach before the workers are forked.
+Workers start ready to serve, and the memory they inherit stays shared
+instead of being copied page by page as the collector touches it. Each
+worker logs its memory when it starts and the latency of its first request.
+
+Worker and thread counts follow the CPUs available to the container.
+Override them with WEB_CONCURRENCY and GUNICORN_THREADS, and turn
+preloading off with GUNICORN_PRELOAD=False.
+"""
+import gc
+import itertools
+import math
+import os
+import shutil
+import tempfile
+import time
+
+
+# Workers write Prometheus samples to files here so that a scrape of any
+# worker reports the whole server. prometheus_client chooses between
+# in-process and file-backed values when it is first imported, so this must
+# be set before anything imports it.
+prometheus_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'prometheus-metrics')
+)
+
+
+def available_cpus():
+    """CPUs this process may use, honouring a cgroup v2 CPU quota"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as handle:
+            quota, period = handle.read().split()
+        if quota != 'max':
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def memory_usage(pid='self'):
+    """RSS, PSS and unshared memory of a process in MiB, from /proc"""
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as handle:
+            for line in handle:
+                name, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        return 'memory unavailable'
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return f"rss={fields.get('Rss', 0) / 1024:.1f}MiB pss={fields.get('Pss', 0) / 1024:.1f}MiB private={private / 1024:.1f}MiB"
+
+
+wsgi_app = 'ipswich_retail.wsgi:application'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+cpus = available_cpus()
+workers = int(os.environ.get('WEB_CONCURRENCY', cpus * 2 + 1))
+# More than one thread switches to the gthread worker, which keeps serving
+# while a request waits on the database
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() in ('true', '1', 'yes')
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be added to this one
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def run_warmup(log):
+    from apps.core.warmup import warm_up
+
+    timings = warm_up()
+    log.info('Warmed up in %.0fms (%s)', sum(timings.values()) * 1000,
+             ', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items()))
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        run_warmup(server.log)
+        # Objects loaded so far are never freed; frozen, the collector no
+        # longer writes to them and their pages stay shared with the workers
+        gc.collect()
+        gc.freeze()
+        server.log.info('Master %s', memory_usage())
+
+
+def pre_fork(server, worker):
+    # Runs in the master, so slots are unique among live workers. The slot
+    # becomes part of the worker's order number node id (apps.orders.ids).
+    taken = {getattr(other, 'slot', None) for other in server.WORKERS.values()}
+    worker.slot = next(slot for slot in itertools.count() if slot not in taken)
+
+
+def post_fork(server, worker):
+    from apps.orders.ids import set_worker_slot
+
+    set_worker_slot(worker.slot)
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        run_warmup(worker.log)
+    worker.log.info('Worker %s started: %s', worker.pid, memory_usage())
+
+
+def pre_request(worker, req):
+    if not hasattr(worker, 'first_request_started'):
+        worker.first_request_started = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):
+    if not getattr(worker, 'first_request_logged', False):
+        worker.first_request_logged = True
+        worker.log.info(
+            'Worker %s first request %s %s in %.1fms: %s', worker.pid, req.method, req.path,
+            (time.perf_counter() - worker.first_request_started) * 1000, memory_usage(),
+        )
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
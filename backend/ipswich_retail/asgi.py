@@ -1,5 +1,8 @@
 """
 ASGI config for ipswich_retail project.
+
+Run with an ASGI server, e.g.
+gunicorn -k uvicorn.workers.UvicornWorker ipswich_retail.asgi:application
 """
 
 import os
@@ -7,5 +10,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ipswich_retail.settings')
+# Hot read endpoints use the async views under ASGI (see settings)
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -45,9 +45,11 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.middleware.MetricsMiddleware',
+    'apps.core.middleware.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.core.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,6 +58,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Serve the hot read endpoints (product list, detail and batch, categories,
+# health probes, dashboard overview) with async views. Set by asgi.py, so
+# it follows the server: ASGI deployments get the async views.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
 # Disable CSRF for API endpoints
 CSRF_COOKIE_SECURE = False
 CSRF_COOKIE_HTTPONLY = False
@@ -134,6 +141,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.core.profiling.ProfiledJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'apps.core.pagination.StandardResultsSetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -154,6 +165,11 @@ SPECTACULAR_SETTINGS = {
     'SCHEMA_PATH_PREFIX': '/api/',
 }
 
+# /api/schema/ serves the schema file written by manage.py build_schema,
+# unless OPENAPI_SCHEMA_LIVE, which generates it on every request
+OPENAPI_SCHEMA_FILE = config('OPENAPI_SCHEMA_FILE', default=str(BASE_DIR / 'openapi-schema.json'))
+OPENAPI_SCHEMA_LIVE = config('OPENAPI_SCHEMA_LIVE', default=DEBUG, cast=bool)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -195,17 +211,67 @@ CSRF_TRUSTED_ORIGINS = [
     # "https://www.yourdomain.com",
 ]
 
-# Cache configuration (using local memory cache for SQLite3)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Cache configuration (local memory cache unless REDIS_URL is set). Anything
+# that must be shared between workers, such as idempotency keys, needs Redis
+# in production.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
+    }
+
+# Idempotency-Key handling for order submission: how long responses are kept
+# for replay, how long an in-flight marker lives if a worker dies, and how
+# long a concurrent duplicate waits for the first request to finish
+IDEMPOTENCY_CACHE_ALIAS = 'default'
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)
+IDEMPOTENCY_WAIT_TIMEOUT = config('IDEMPOTENCY_WAIT_TIMEOUT', default=10, cast=int)
+
+# Seconds the admin dashboard figures are cached for
+DASHBOARD_STATS_TTL = config('DASHBOARD_STATS_TTL', default=30, cast=int)
+
+# Admin list totals: seconds a count is cached per filter signature, and the
+# table size above which unfiltered lists use the database's row estimate
+ADMIN_COUNT_CACHE_TTL = config('ADMIN_COUNT_CACHE_TTL', default=15, cast=int)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+
+# Seconds an analytics time series is cached for, per set of parameters
+ANALYTICS_CACHE_TTL = config('ANALYTICS_CACHE_TTL', default=300, cast=int)
+
+# Prometheus metrics: request metrics middleware on/off, and how long the
+# business gauge snapshot (refreshed by Celery beat) stays fresh
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+BUSINESS_METRICS_TTL = config('BUSINESS_METRICS_TTL', default=120, cast=int)
+
+# Per-request profiling: Server-Timing header (staff only unless
+# PROFILING_SERVER_TIMING) and a log entry for requests slower than
+# PROFILING_SLOW_REQUEST_MS
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=True, cast=bool)
+PROFILING_SERVER_TIMING = config('PROFILING_SERVER_TIMING', default=DEBUG, cast=bool)
+PROFILING_SLOW_REQUEST_MS = config('PROFILING_SLOW_REQUEST_MS', default=500, cast=int)
+
+# Readiness checks run in a background thread every HEALTH_CHECK_INTERVAL
+# seconds; a check fails above these latencies or below this much free disk
+HEALTH_CHECK_BACKGROUND = config('HEALTH_CHECK_BACKGROUND', default=True, cast=bool)
+HEALTH_CHECK_INTERVAL = config('HEALTH_CHECK_INTERVAL', default=10, cast=int)
+HEALTH_DB_MAX_LATENCY_MS = config('HEALTH_DB_MAX_LATENCY_MS', default=500, cast=int)
+HEALTH_CACHE_MAX_LATENCY_MS = config('HEALTH_CACHE_MAX_LATENCY_MS', default=200, cast=int)
+HEALTH_DISK_MIN_FREE_PERCENT = config('HEALTH_DISK_MIN_FREE_PERCENT', default=5, cast=float)
 
-# Celery Configuration
-CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://redis:6379/0')
-CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://redis:6379/0')
+# Celery Configuration (in-memory broker unless CELERY_BROKER_URL is set)
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='memory://')
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='cache+memory://')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
@@ -213,9 +279,62 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 CELERY_TASK_SOFT_TIME_LIMIT = 60
+# Run tasks inline when no worker is available (local development, or no
+# broker configured, since nothing else would consume the in-memory queue)
+CELERY_TASK_ALWAYS_EAGER = config(
+    'CELERY_TASK_ALWAYS_EAGER', default=DEBUG or CELERY_BROKER_URL == 'memory://', cast=bool
+)
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-daily-sales': {
+        'task': 'apps.orders.tasks.reconcile_daily_sales',
+        'schedule': 15 * 60,
+    },
+    'refresh-metrics-snapshot': {
+        'task': 'apps.core.tasks.refresh_metrics_snapshot',
+        'schedule': 60,
+    },
+    'refresh-customer-segments': {
+        'task': 'apps.customers.tasks.refresh_customer_segments',
+        'schedule': 24 * 60 * 60,
+    },
+}
+
+# Order pipeline (apps.orders.tasks): seconds over which rollup, customer
+# metric and cache refreshes are coalesced into one task run, and the stock
+# level at or below which a product triggers a low-stock alert
+ORDER_PIPELINE_BATCH_SECONDS = config('ORDER_PIPELINE_BATCH_SECONDS', default=5, cast=int)
+LOW_STOCK_THRESHOLD = config('LOW_STOCK_THRESHOLD', default=5, cast=int)
+
+# Days of the daily sales rollup rebuilt by each reconciliation run
+DAILY_SALES_RECONCILE_DAYS = config('DAILY_SALES_RECONCILE_DAYS', default=2, cast=int)
+
+# Inventory: seconds a pending order holds its stock before the reservation
+# expires and the order is cancelled (0 disables expiry). Pending orders are
+# placed orders waiting for an admin to confirm them, not abandoned carts, so
+# expiry is off unless a deployment wants unconfirmed orders cancelled. When
+# it is on, beat releases expired reservations every 5 minutes.
+INVENTORY_RESERVATION_TTL = config('INVENTORY_RESERVATION_TTL', default=0, cast=int)
+if INVENTORY_RESERVATION_TTL:
+    CELERY_BEAT_SCHEDULE['release-expired-reservations'] = {
+        'task': 'apps.orders.tasks.release_expired_reservations',
+        'schedule': 5 * 60,
+    }
+
+# Order numbers: generator class and the node id base (0-1023). Each
+# gunicorn worker adds its slot to the base, so hosts need bases at least
+# their worker count apart (see apps.orders.ids).
+ORDER_NUMBER_GENERATOR = 'apps.orders.ids.SnowflakeOrderNumberGenerator'
+ORDER_NUMBER_NODE_ID = config('ORDER_NUMBER_NODE_ID', default=None)
+
+# manage.py boot (start.sh): whether it loads the sample catalogue, and the
+# file locked while it runs (default: next to the SQLite database, which
+# replicas starting together share)
+BOOT_SAMPLE_DATA = config('BOOT_SAMPLE_DATA', default=True, cast=bool)
+BOOT_LOCK_FILE = config('BOOT_LOCK_FILE', default=None)
 
 # Email configuration
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='orders@ipswichretail.example')
 
 # Logging
 LOGGING = {
@@ -238,5 +357,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'apps.profiling': {
+            'handlers': ['file', 'console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }